@@ -0,0 +1,138 @@
+"""
+Compares the compression strategies of the Remote Script on realistic
+payloads generated by the actual serializers.
+
+Usage: python benchmarks/compression.py
+"""
+from __future__ import print_function
+
+import json
+import os
+import random
+import sys
+import timeit
+import types
+import zlib
+
+MIDI_SCRIPT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "midi-script")
+
+# Load the Remote Script as a package without running its __init__,
+# which depends on Live's embedded modules. Live's API itself is only
+# used inside functions, so an empty module is enough to import the
+# serializers.
+sys.modules.setdefault("Live", types.ModuleType("Live"))
+package = types.ModuleType("AbletonJS")
+package.__path__ = [MIDI_SCRIPT_PATH]
+sys.modules["AbletonJS"] = package
+
+from AbletonJS import Compression  # noqa: E402
+from AbletonJS.Clip import Clip  # noqa: E402
+from AbletonJS.Track import Track  # noqa: E402
+
+random.seed(0)
+
+
+class FakeTrack(object):
+    def __init__(self, index):
+        self._live_ptr = 140000000000 + index * 4096
+        self.name = "%d-Track %d" % (index, index)
+        self.solo = False
+        self.mute = index % 7 == 0
+        self.color = random.choice([16725558, 8912743, 1090798, 16149507])
+        self.color_index = random.randint(0, 69)
+        self.is_foldable = index % 8 == 0
+        self.is_grouped = index % 8 != 0
+
+
+class FakeNote(object):
+    def __init__(self, index):
+        self.note_id = index + 1
+        self.pitch = random.randint(36, 84)
+        self.start_time = index * 0.25
+        self.duration = random.choice([0.25, 0.5, 1.0])
+        self.velocity = float(random.randint(60, 127))
+        self.mute = False
+        self.probability = 1.0
+        self.velocity_deviation = 0.0
+        self.release_velocity = 64.0
+
+
+class FakeClip(object):
+    def __init__(self, note_count):
+        self.notes = [FakeNote(i) for i in range(note_count)]
+
+    def get_notes_extended(self, from_pitch, pitch_span, from_time, time_span):
+        return self.notes
+
+
+def result(data):
+    return json.dumps({"event": "result", "data": data, "uuid": "a20f25a0-83e2-11e9-bbe1-bd3a580ef903"},
+                      ensure_ascii=False).encode("utf8")
+
+
+def event(data):
+    return json.dumps({"event": "922d2dc0-83e3-11e9-ba7c-917478f8b91b", "data": data, "uuid": None},
+                      ensure_ascii=False).encode("utf8")
+
+
+clip = Clip(None, None)
+
+PAYLOADS = [
+    ("listener event", event(0.7874015748031497)),
+    ("1 track", result(Track.serialize_track(FakeTrack(1)))),
+    ("16 tracks", result([Track.serialize_track(FakeTrack(i)) for i in range(16)])),
+    ("64 tracks", result([Track.serialize_track(FakeTrack(i)) for i in range(64)])),
+    ("16 notes", result(clip.get_notes_extended(FakeClip(16)))),
+    ("1k notes", result(clip.get_notes_extended(FakeClip(1000)))),
+    ("20k notes", result(clip.get_notes_extended(FakeClip(20000)))),
+]
+
+
+def zlib_default(data):
+    return zlib.compress(data)
+
+
+def zlib_fast(data):
+    return zlib.compress(data, Compression.FAST_LEVEL)
+
+
+def zlib_dict(data):
+    compressor = zlib.compressobj(
+        Compression.DICT_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS, 8,
+        zlib.Z_DEFAULT_STRATEGY, Compression.ZDICT)
+    return compressor.compress(data) + compressor.flush()
+
+
+def adaptive(data):
+    return Compression.compress(data)[1]
+
+
+STRATEGIES = [
+    ("none", lambda data: data),
+    ("zlib", zlib_default),
+    ("fast", zlib_fast),
+    ("dict", zlib_dict),
+    ("adaptive", adaptive),
+]
+
+
+def main():
+    print("%-16s %9s" % ("payload", "size") +
+          "".join("%20s" % name for name, _ in STRATEGIES))
+
+    for payload_name, payload in PAYLOADS:
+        row = "%-16s %9d" % (payload_name, len(payload))
+
+        for _, strategy in STRATEGIES:
+            size = len(strategy(payload))
+            runs = max(1, 200000 // len(payload))
+            duration = timeit.timeit(
+                lambda: strategy(payload), number=runs) / runs
+            row += "%11d %6.1fus" % (size, duration * 1e6)
+
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,9 @@ from .version import version
 from .Config import DEBUG, FAST_POLLING
 from .Logging import logger
 from .Socket import Socket
+from .Scheduler import Scheduler
+from .Telemetry import Telemetry
+from .Profiler import profiler
 from .Interface import Interface
 from .Application import Application
 from .Session import Session
@@ -41,8 +44,11 @@ class AbletonJS(ControlSurface):
 
         Socket.set_message(self.show_message)
         self.socket = Socket(self.command_handler)
+        self.handlers = {}
+        self.telemetry = Telemetry(self.socket, self.handlers)
+        self.scheduler = Scheduler(self.socket)
 
-        self.handlers = {
+        self.handlers.update({
             "application": Application(c_instance, self.socket, self.application()),
             "application-view": ApplicationView(c_instance, self.socket, self.application()),
             # added for red box control
@@ -54,7 +60,7 @@ class AbletonJS(ControlSurface):
             "device": Device(c_instance, self.socket),
             "device-parameter": DeviceParameter(c_instance, self.socket),
             "drum-pad": DrumPad(c_instance, self.socket),
-            "internal": Internal(c_instance, self.socket),
+            "internal": Internal(c_instance, self.socket, self.scheduler, self.handlers, self.telemetry),
             "midi": Midi(c_instance, self.socket, self.tracked_midi, self.request_rebuild_midi_map),
             "mixer-device": MixerDevice(c_instance, self.socket),
             "scene": Scene(c_instance, self.socket),
@@ -64,14 +70,18 @@ class AbletonJS(ControlSurface):
             "track-view": TrackView(c_instance, self.socket),
             "clip_slot": ClipSlot(c_instance, self.socket),
             "clip": Clip(c_instance, self.socket),
-        }
+        })
+
+        self.scheduler.tick_hooks.extend(
+            [self.handlers["midi"].flush_midi, self.telemetry.sample])
+        self.scheduler.background_tasks.append(self.handlers["browser"].index.run)
 
         self._last_tick = time.time() * 1000
         self.tick()
 
         if FAST_POLLING:
             self.recv_loop = Live.Base.Timer(
-                callback=self.socket.process, interval=10, repeat=True)
+                callback=self.process, interval=10, repeat=True)
 
             self.recv_loop.start()
 
@@ -83,15 +93,24 @@ class AbletonJS(ControlSurface):
                            str(round(tick_time - self._last_tick)) + "ms")
 
         self._last_tick = tick_time
-        self.socket.process()
 
-        process_time = time.time() * 1000
+        try:
+            self.process(background=True)
+            Interface.obj_ids.sweep()
+        except Exception as e:
+            logger.error("Error processing tick:")
+            logger.exception(e)
+        finally:
+            process_time = time.time() * 1000
+
+            if process_time - tick_time > 100:
+                logger.warning("UDP processing is taking long, delta: " +
+                               str(round(tick_time - process_time)) + "ms")
 
-        if process_time - tick_time > 100:
-            logger.warning("UDP processing is taking long, delta: " +
-                           str(round(tick_time - process_time)) + "ms")
+            self.schedule_message(1, self.tick)
 
-        self.schedule_message(1, self.tick)
+    def process(self, background=False):
+        self.scheduler.run(background)
 
     def build_midi_map(self, midi_map_handle):
         script_handle = self._c_instance.handle()
@@ -111,22 +130,56 @@ class AbletonJS(ControlSurface):
         if FAST_POLLING:
             self.recv_loop.stop()
         self.socket.send("disconnect", immediate=True)
+        self.telemetry.stop()
         self.socket.shutdown()
+        self.handlers["clip"].clear_note_indexes()
         Interface.listeners.clear()
+        Interface.dirty_listeners.clear()
+        Interface.held_listeners.clear()
+        del Interface.streams[:]
         Interface.obj_ids.clear()
         super(AbletonJS, self).disconnect()
 
+    def batch_handler(self, payload):
+        commands = payload.get("commands") or []
+
+        if DEBUG:
+            logger.debug("Received batch of " +
+                         str(len(commands)) + " commands")
+
+        self.socket.start_batch()
+        try:
+            for command in commands:
+                try:
+                    if command.get("ns") == "batch":
+                        raise Exception("Batches can't be nested")
+                    self.command_handler(command)
+                except Exception as e:
+                    logger.error("Error processing batched command:")
+                    logger.exception(e)
+                    self.socket.send("error", str(e), command.get("uuid"))
+        finally:
+            self.socket.finish_batch(payload.get("uuid"))
+
     def command_handler(self, payload):
 
         namespace = payload["ns"]
 
+        if namespace == "batch":
+            return self.batch_handler(payload)
+
         # Don't clutter the logs
         if not (namespace == "internal" and payload["name"] == "get_prop" and payload["args"]["prop"] == "ping") and DEBUG:
             logger.debug("Received command: " + str(payload))
 
         if namespace in self.handlers:
             handler = self.handlers[namespace]
-            handler.handle(payload)
+            # Internal commands are used to control profiling sessions,
+            # so they're left out of them
+            if namespace == "internal":
+                handler.handle(payload)
+            else:
+                profiler.call_command(handler.handle, payload)
         else:
             self.socket.send("error", "No handler for namespace " +
                              str(namespace), payload["uuid"])
@@ -1,57 +1,60 @@
 from __future__ import absolute_import
+from functools import partial
 from .Interface import Interface
 from .BrowserItem import BrowserItem
+from .BrowserIndex import BrowserIndex
 
 
 class Browser(Interface):
     def __init__(self, c_instance, socket, application):
         super(Browser, self).__init__(c_instance, socket)
         self.application = application
+        self.index = BrowserIndex(application)
 
     def get_ns(self, nsid=None):
         return self.application.browser
 
-    def get_audio_effects(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.audio_effects.children)
+    def get_audio_effects(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.audio_effects.children)
 
-    def get_clips(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.clips.children)
+    def get_clips(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.clips.children)
 
-    def get_colors(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.colors)
+    def get_colors(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.colors)
 
-    def get_current_project(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.current_project.children)
+    def get_current_project(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.current_project.children)
 
-    def get_drums(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.drums.children)
+    def get_drums(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.drums.children)
 
-    def get_instruments(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.instruments.children)
+    def get_instruments(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.instruments.children)
 
-    def get_max_for_live(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.max_for_live.children)
+    def get_max_for_live(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.max_for_live.children)
 
-    def get_midi_effects(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.midi_effects.children)
+    def get_midi_effects(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.midi_effects.children)
 
-    def get_packs(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.packs.children)
+    def get_packs(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.packs.children)
 
-    def get_plugins(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.plugins.children)
+    def get_plugins(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.plugins.children)
 
-    def get_samples(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.samples.children)
+    def get_samples(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.samples.children)
 
-    def get_sounds(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.sounds.children)
+    def get_sounds(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.sounds.children)
 
-    def get_user_folders(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.user_folders)
+    def get_user_folders(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.user_folders)
 
-    def get_user_library(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.user_library.children)
+    def get_user_library(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.user_library.children)
 
     def get_hotswap_target(self, ns):
         return BrowserItem.serialize_browser_item(ns.hotswap_target)
@@ -64,3 +67,18 @@ class Browser(Interface):
 
     def stop_preview(self, ns):
         return ns.stop_preview()
+
+    def search(self, ns, query, limit=50):
+        """Searches the browser index for items whose path contains all words of the query"""
+        return self.index.search(query, limit)
+
+    def resolve_item(self, ns, path):
+        """Returns the browser item at a path returned by search"""
+        return BrowserItem.serialize_browser_item(self.index.resolve(path))
+
+    def refresh_index(self, ns, roots=None):
+        """Indexes the given roots, or all roots, again in the background"""
+        return self.index.refresh(roots)
+
+    def get_index_status(self, ns):
+        return self.index.get_status()
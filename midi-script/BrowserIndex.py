@@ -0,0 +1,276 @@
+from __future__ import absolute_import
+import json
+import os
+import tempfile
+import time
+import zlib
+
+from .Logging import logger
+
+# Browser roots that are indexed, user_folders is a list of roots itself
+ROOTS = ("audio_effects", "clips", "current_project", "drums", "instruments",
+         "max_for_live", "midi_effects", "packs", "plugins", "samples",
+         "sounds", "user_library", "user_folders")
+
+# Fields of the index entries, in the order they're stored. The path is
+# a list of names, starting with the root and ending with the item.
+ENTRY_FIELDS = ("name", "uri", "path", "is_loadable", "is_device")
+
+CACHE_FORMAT = 2
+
+# Amount of entries per line of the cache file. It's read and written
+# one line per step, so this limits the work done in a single step.
+CACHE_CHUNK_SIZE = 500
+
+
+class BrowserIndex(object):
+    '''An index of the items in Live's browser that's searchable by name and path.
+
+    It's built incrementally in the time left at the end of ticks and cached in
+    the temp dir per Live version. On startup, the cache is loaded first, then
+    only roots whose direct children changed are indexed again. Changes deeper
+    in the tree are picked up by refreshing the root. Items stay searchable
+    until their root has been indexed again.'''
+
+    def __init__(self, application):
+        self.application = application
+        # {root: {"signature": ..., "items": [entry, ...]}}
+        self.roots = {}
+        self.state = "idle"
+        # Roots waiting to be indexed, in order
+        self._pending = []
+        self._current = None
+        self._job = None
+        self._cache_loaded = False
+        # Whether the index differs from the cache
+        self._changed = False
+        self._search_entries = None
+
+    def get_cache_path(self):
+        app = self.application
+        version = "%d.%d.%d" % (app.get_major_version(), app.get_minor_version(),
+                                app.get_bugfix_version())
+        return os.path.join(tempfile.gettempdir(),
+                            "ableton-js-browser-index-" + version + ".jsonl")
+
+    def get_root_items(self, root):
+        browser = self.application.browser
+        if root == "user_folders":
+            return list(browser.user_folders)
+
+        return list(getattr(browser, root).children)
+
+    @staticmethod
+    def get_signature(items):
+        '''A digest of the root's direct children to tell whether it changed'''
+        data = u"\n".join(item.name + u"|" + item.uri for item in items)
+        return "%08x%x" % (zlib.crc32(data.encode("utf8")) & 0xffffffff, len(items))
+
+    def load_cache(self):
+        '''Reads the cached index one line per step. Roots that have been
+        indexed in the meantime keep their items.'''
+        try:
+            with open(self.get_cache_path()) as f:
+                if json.loads(f.readline()).get("format") != CACHE_FORMAT:
+                    return
+
+                while True:
+                    line = f.readline()
+                    if not line:
+                        return
+
+                    header = json.loads(line)
+                    items = []
+                    for _ in range(header["chunks"]):
+                        items.extend(json.loads(f.readline()))
+                        yield
+
+                    if header["root"] not in self.roots:
+                        self.roots[header["root"]] = {
+                            "signature": header["signature"], "items": items}
+                        self._search_entries = None
+        except Exception as e:
+            logger.info("No browser index cache: " + str(e))
+
+    def save_cache(self):
+        '''Writes the index to a temporary file one line per step
+        and replaces the cache with it once it's complete'''
+        path = self.get_cache_path()
+        temp_path = path + ".tmp"
+
+        try:
+            with open(temp_path, "w") as f:
+                f.write(json.dumps({"format": CACHE_FORMAT}) + "\n")
+
+                for root, data in list(self.roots.items()):
+                    items = data["items"]
+                    starts = range(0, len(items), CACHE_CHUNK_SIZE)
+                    f.write(json.dumps({"root": root, "signature": data["signature"],
+                                        "chunks": len(starts)}) + "\n")
+
+                    for start in starts:
+                        f.write(json.dumps(
+                            items[start:start + CACHE_CHUNK_SIZE]) + "\n")
+                        yield
+
+            # Windows can't rename a file to an existing one
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temp_path, path)
+        except Exception as e:
+            logger.error("Couldn't save the browser index:")
+            logger.exception(e)
+
+    def refresh(self, roots=None):
+        '''Indexes the given roots, or all of them, again. Other roots keep their items.'''
+        requested = [root for root in ROOTS if roots is None or root in roots]
+        self._pending = requested + \
+            [root for root in self._pending if root not in requested]
+
+        if self._job is None:
+            self._job = self.build()
+        self.state = "building"
+        return self.get_status()
+
+    def queue_roots(self):
+        '''Queues the roots whose direct children changed since they were cached,
+        unless they've been requested already. Other roots keep their cached items.'''
+        for root in ROOTS:
+            data = self.roots.get(root)
+            try:
+                items = self.get_root_items(root)
+                if root not in self._pending and root != self._current and (
+                        data is None or data["signature"] != BrowserIndex.get_signature(items)):
+                    self._pending.append(root)
+            except Exception as e:
+                logger.error("Couldn't read browser root " + root + ": " + str(e))
+
+            yield
+
+    def build(self):
+        '''Loads the cache, indexes the pending roots, and saves the cache if anything
+        changed. Yields after every step, so it can be paused between any two steps.'''
+        if not self._cache_loaded:
+            for _ in self.load_cache():
+                yield
+            self._cache_loaded = True
+
+            for _ in self.queue_roots():
+                yield
+
+        while self._pending or self._changed:
+            while self._pending:
+                self._current = self._pending.pop(0)
+                try:
+                    for _ in self.walk(self._current):
+                        yield
+                except Exception as e:
+                    logger.error("Error indexing browser root " + self._current + ":")
+                    logger.exception(e)
+                self._current = None
+
+            if self._changed:
+                self._changed = False
+                for _ in self.save_cache():
+                    yield
+
+        self.state = "ready"
+
+    def walk(self, root):
+        '''Yields after every item. The previous items of the root stay searchable
+        until it's done.'''
+        root_items = self.get_root_items(root)
+        items = []
+        stack = [(item, [root]) for item in reversed(root_items)]
+
+        while stack:
+            item, parent = stack.pop()
+            path = parent + [item.name]
+            items.append([item.name, item.uri, path, item.is_loadable, item.is_device])
+
+            # Devices contain their presets
+            if item.is_folder or item.is_device:
+                stack.extend((child, path) for child in reversed(list(item.children)))
+
+            yield
+
+        data = self.roots.get(root)
+        if data is None or data["items"] != items:
+            self._changed = True
+            self._search_entries = None
+
+        self.roots[root] = {"signature": BrowserIndex.get_signature(root_items),
+                            "items": items}
+
+    def run(self, deadline):
+        '''Indexes items until the deadline has passed. Called at the end of every tick.'''
+        if self.state == "idle":
+            self.state = "building"
+            self._job = self.build()
+
+        while self._job is not None and time.time() < deadline:
+            try:
+                next(self._job)
+            except StopIteration:
+                self._job = None
+            except Exception as e:
+                logger.error("Error indexing the browser:")
+                logger.exception(e)
+                self._job = None
+                self.state = "failed"
+
+    def get_search_entries(self):
+        if self._search_entries is None:
+            self._search_entries = [
+                (entry[0].lower(), u"/".join(entry[2]).lower(), root, entry)
+                for root, data in self.roots.items()
+                for entry in data["items"]
+            ]
+        return self._search_entries
+
+    def search(self, query, limit=50):
+        '''Returns the items whose path contains all words of the query. Items whose
+        name starts with the query come first, then items whose name contains it.'''
+        query = query.lower().strip()
+        words = query.split()
+        matches = []
+
+        for name, path, root, entry in self.get_search_entries():
+            if all(word in path for word in words):
+                rank = 0 if name.startswith(query) else 1 if query in name else 2
+                matches.append((rank, len(path), root, entry))
+
+        matches.sort(key=lambda match: match[:2])
+        results = []
+        for _, _, root, entry in matches[:limit]:
+            result = dict(zip(ENTRY_FIELDS, entry))
+            result["root"] = root
+            results.append(result)
+        return results
+
+    def resolve(self, path):
+        '''Returns the browser item at the given list of names, starting with the root,
+        or None. Names are compared as a whole, so they may contain slashes.'''
+        if not isinstance(path, list) or not path:
+            raise ValueError("The path must be a list of names, starting with the root")
+
+        if path[0] not in ROOTS:
+            return None
+
+        items = self.get_root_items(path[0])
+        item = None
+        for name in path[1:]:
+            item = next((child for child in items if child.name == name), None)
+            if item is None:
+                return None
+            items = item.children
+
+        return item
+
+    def get_status(self):
+        pending = [self._current] if self._current else []
+        return {
+            "state": self.state,
+            "items": sum(len(data["items"]) for data in self.roots.values()),
+            "pending_roots": pending + self._pending,
+        }
@@ -1,26 +1,29 @@
 from __future__ import absolute_import
+from functools import partial
 from .Interface import Interface
 
 
 class BrowserItem(Interface):
+    serialized_fields = (
+        ("name", lambda item: item.name),
+        ("is_loadable", lambda item: item.is_loadable),
+        ("is_selected", lambda item: item.is_selected),
+        ("is_device", lambda item: item.is_device),
+        ("is_folder", lambda item: item.is_folder),
+        ("source", lambda item: item.source),
+        ("uri", lambda item: item.uri),
+    )
+
     @staticmethod
-    def serialize_browser_item(browser_item):
+    def serialize_browser_item(browser_item, fields=None):
         if browser_item is None:
             return None
-        browser_item_id = Interface.save_obj(browser_item)
-        return {
-            "id": browser_item_id,
-            "name": browser_item.name,
-            "is_loadable": browser_item.is_loadable,
-            "is_selected": browser_item.is_selected,
-            "is_device": browser_item.is_device,
-            "is_folder": browser_item.is_folder,
-            "source": browser_item.source,
-            "uri": browser_item.uri,
-        }
+        browser_item_id = Interface.save_obj(browser_item, transient=True)
+        return Interface.serialize_fields(
+            browser_item, browser_item_id, BrowserItem.serialized_fields, fields)
 
     def __init__(self, c_instance, socket):
         super(BrowserItem, self).__init__(c_instance, socket)
 
-    def get_children(self, ns):
-        return map(BrowserItem.serialize_browser_item, ns.children)
+    def get_children(self, ns, fields=None):
+        return map(partial(BrowserItem.serialize_browser_item, fields=fields), ns.children)
@@ -1,49 +1,31 @@
 from __future__ import absolute_import
+from functools import partial
 
 from .Interface import Interface
 
 
 class Chain(Interface):
+    serialized_fields = (
+        ("name", lambda chain: chain.name),
+        ("color", Interface.safe_reader("color")),
+        ("mute", Interface.safe_reader("mute", False)),
+        ("solo", Interface.safe_reader("solo", False)),
+    )
+
     @staticmethod
-    def serialize_chain(chain):
+    def serialize_chain(chain, fields=None):
         if chain is None:
             return None
 
         chain_id = Interface.save_obj(chain)
-
-        mute = False
-        solo = False
-        color = None
-
-        try:
-            mute = chain.mute
-        except:
-            pass
-
-        try:
-            solo = chain.solo
-        except:
-            pass
-
-        try:
-            color = chain.color
-        except:
-            pass
-
-        return {
-            "id": chain_id,
-            "name": chain.name,
-            "color": color,
-            "mute": mute,
-            "solo": solo,
-        }
+        return Interface.serialize_fields(chain, chain_id, Chain.serialized_fields, fields)
 
     def __init__(self, c_instance, socket):
         super(Chain, self).__init__(c_instance, socket)
 
-    def get_devices(self, ns):
+    def get_devices(self, ns, fields=None):
         from .Device import Device
-        return map(Device.serialize_device, ns.devices)
+        return map(partial(Device.serialize_device, fields=fields), ns.devices)
 
     def get_mixer_device(self, ns):
         from .MixerDevice import MixerDevice
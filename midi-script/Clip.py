@@ -1,33 +1,113 @@
 from __future__ import absolute_import
+import base64
+import bisect
+import struct
+from collections import OrderedDict
+
 from .Interface import Interface
 
+import Live
+
+# Amount of notes per page when paging or streaming notes
+NOTES_PAGE_SIZE = 1000
+
+# Amount of clips whose note index is kept, least recently used ones are dropped first
+MAX_NOTE_INDEXES = 32
+
+# Added to the time span of bounded note fetches, so the latest note is included
+NOTE_TIME_EPSILON = 0.001
+
+# Fields of columnar note lists and the struct type of their packed, little-endian form
+NOTE_COLUMNS = (
+    ("note_id", "I"),
+    ("pitch", "B"),
+    ("start_time", "d"),
+    ("duration", "d"),
+    ("velocity", "f"),
+    ("mute", "B"),
+    ("probability", "f"),
+    ("velocity_deviation", "f"),
+    ("release_velocity", "f"),
+)
+
+# Optional properties of notes added with apply_note_delta
+NOTE_SPECIFICATION_FIELDS = ("velocity", "mute", "probability",
+                             "velocity_deviation", "release_velocity")
+
 
 class Clip(Interface):
+    serialized_fields = (
+        ("name", lambda clip: clip.name),
+        ("color", lambda clip: clip.color),
+        ("color_index", lambda clip: clip.color_index),
+        ("is_audio_clip", lambda clip: clip.is_audio_clip),
+        ("is_midi_clip", lambda clip: clip.is_midi_clip),
+        ("start_time", lambda clip: clip.start_time),
+        ("end_time", lambda clip: clip.end_time),
+        ("muted", lambda clip: clip.muted),
+    )
+
     @staticmethod
-    def serialize_clip(clip):
+    def serialize_clip(clip, fields=None):
         if clip is None:
             return None
 
         clip_id = Interface.save_obj(clip)
+        return Interface.serialize_fields(clip, clip_id, Clip.serialized_fields, fields)
+
+    @staticmethod
+    def serialize_note(note):
         return {
-            "id": clip_id,
-            "name": clip.name,
-            "color": clip.color,
-            "color_index": clip.color_index,
-            "is_audio_clip": clip.is_audio_clip,
-            "is_midi_clip": clip.is_midi_clip,
-            "start_time": clip.start_time,
-            "end_time": clip.end_time,
-            "muted": clip.muted
+            "duration": note.duration,
+            "mute": note.mute,
+            "note_id": note.note_id,
+            "pitch": note.pitch,
+            "probability": note.probability,
+            "release_velocity": note.release_velocity,
+            "start_time": note.start_time,
+            "velocity": note.velocity,
+            "velocity_deviation": note.velocity_deviation
         }
 
+    def serialize_note_columns(self, notes, layout):
+        """Returns the notes as one list per field, or, with the "packed" layout, as one
+        little-endian typed array per field. Packed arrays are base64-encoded for JSON."""
+        result = {"count": len(notes)}
+
+        for field, type_code in NOTE_COLUMNS:
+            values = [getattr(note, field) for note in notes]
+
+            if layout == "packed":
+                data = struct.pack("<%d%s" % (len(values), type_code), *values)
+                if not self.socket.has_feature("msgpack"):
+                    data = base64.b64encode(data).decode("ascii")
+                result[field] = data
+            else:
+                result[field] = values
+
+        return result
+
+    @staticmethod
+    def read_note_column(columns, field, type_code):
+        values = columns[field]
+        if isinstance(values, list):
+            return values
+
+        data = base64.b64decode(values)
+        return struct.unpack("<%d%s" % (len(data) // struct.calcsize(type_code), type_code), data)
+
     def __init__(self, c_instance, socket):
         super(Clip, self).__init__(c_instance, socket)
+        # {clip key: {"clip": clip, "fn": listener, "notes": {note_id: (pitch, start_time)},
+        #             "snapshot": sorted notes for paging}}
+        self.note_indexes = OrderedDict()
+        self._applying = False
 
     def get_notes(self, ns, from_time=0, from_pitch=0, time_span=99999999999999, pitch_span=128):
         return ns.get_notes(from_time, from_pitch, time_span, pitch_span)
 
-    def get_notes_extended(self, ns, from_time=0, from_pitch=0, time_span=99999999999999, pitch_span=128):
+    def get_notes_extended(self, ns, from_time=0, from_pitch=0, time_span=99999999999999, pitch_span=128,
+                           layout="rows"):
         # from_time/time_span must be doubles - Live's C++ binding for
         # get_notes_extended is strict about int vs. double and rejects int
         # arguments here (unlike get_notes above, which accepts either).
@@ -38,37 +118,244 @@ class Clip(Interface):
         midi_note_vector = ns.get_notes_extended(
             from_pitch, pitch_span, float(from_time), float(time_span)
         )
-        return [
-            {
-                "duration": note.duration,
-                "mute": note.mute,
-                "note_id": note.note_id,
-                "pitch": note.pitch,
-                "probability": note.probability,
-                "release_velocity": note.release_velocity,
-                "start_time": note.start_time,
-                "velocity": note.velocity,
-                "velocity_deviation": note.velocity_deviation
+
+        # A list per field, so field names aren't repeated for every note
+        if layout == "columns" or layout == "packed":
+            return self.serialize_note_columns(midi_note_vector, layout)
+
+        return [Clip.serialize_note(note) for note in midi_note_vector]
+
+    @staticmethod
+    def note_sort_key(note):
+        return (note.start_time, note.pitch, note.note_id)
+
+    def sorted_notes(self, ns, from_time, from_pitch, time_span, pitch_span):
+        """Returns the notes in the given range in a stable order, so they can be paged"""
+        midi_note_vector = ns.get_notes_extended(
+            from_pitch, pitch_span, float(from_time), float(time_span)
+        )
+        return sorted(midi_note_vector, key=Clip.note_sort_key)
+
+    def get_notes_page(self, ns, cursor=None, limit=NOTES_PAGE_SIZE, from_time=0, from_pitch=0,
+                       time_span=99999999999999, pitch_span=128):
+        """Returns up to `limit` notes of the given range that come after the cursor,
+        and the cursor of the next page, which is None after the last page. Cursors
+        are the [start_time, pitch, note_id] of a page's last note, so notes added or
+        removed in between don't shift the following pages. The sorted notes are kept
+        until the clip's notes change, so following pages don't read them again."""
+        if limit < 1:
+            raise ValueError("The limit must be at least 1")
+
+        entry = self.watch_notes(ns)
+        bounds = (from_time, from_pitch, time_span, pitch_span)
+        snapshot = entry.get("snapshot")
+
+        if snapshot is None or snapshot["bounds"] != bounds:
+            notes = self.sorted_notes(ns, *bounds)
+            snapshot = {"bounds": bounds, "notes": notes,
+                        "keys": [Clip.note_sort_key(note) for note in notes]}
+            entry["snapshot"] = snapshot
+
+        notes = snapshot["notes"]
+        start = bisect.bisect_right(
+            snapshot["keys"], tuple(cursor)) if cursor else 0
+        end = start + limit
+
+        if end < len(notes):
+            next_cursor = list(snapshot["keys"][end - 1])
+        else:
+            next_cursor = None
+            entry.pop("snapshot", None)
+
+        return {
+            "notes": [Clip.serialize_note(note) for note in notes[start:end]],
+            "next": next_cursor,
+            "total": len(notes),
+        }
+
+    def stream_notes_extended(self, ns, from_time=0, from_pitch=0, time_span=99999999999999,
+                              pitch_span=128, page_size=NOTES_PAGE_SIZE):
+        """Streams the notes in the given range in pages of `page_size` notes, one page per tick"""
+        notes = self.sorted_notes(
+            ns, from_time, from_pitch, time_span, pitch_span)
+
+        for cursor in range(0, len(notes), page_size):
+            yield {
+                "notes": [Clip.serialize_note(note) for note in notes[cursor:cursor + page_size]],
+                "cursor": cursor,
+                "total": len(notes),
             }
-            for note in midi_note_vector
-        ]
-        
-    def apply_note_modifications(self, ns, notes):
-        # Same int-vs-double issue as get_notes_extended above.
-        existing_notes = ns.get_notes_extended(0, 128, 0.0, 99999999999999.0)
-        existing_notes_map = {note.note_id: note for note in existing_notes}
-        
+
+    @staticmethod
+    def note_index_key(clip):
+        try:
+            return clip._live_ptr
+        except:
+            return id(clip)
+
+    def drop_note_index(self, key):
+        entry = self.note_indexes.pop(key, None)
+        if entry is None:
+            return
+
+        try:
+            entry["clip"].remove_notes_listener(entry["fn"])
+        except:
+            # The clip has been deleted
+            pass
+
+    def clear_note_indexes(self):
+        """Drops all note indexes and removes their listeners from the clips"""
+        while self.note_indexes:
+            self.drop_note_index(next(iter(self.note_indexes)))
+
+    def watch_notes(self, clip):
+        """Returns the clip's entry in note_indexes, which is kept until the clip's
+        notes are changed by anything but this handler or too many clips are watched"""
+        key = Clip.note_index_key(clip)
+        entry = self.note_indexes.pop(key, None)
+
+        if entry is None:
+            def invalidate():
+                # Any change reorders the notes, even if it's tracked in the index
+                entry.pop("snapshot", None)
+                if not self._applying:
+                    self.drop_note_index(key)
+
+            clip.add_notes_listener(invalidate)
+            entry = {"clip": clip, "fn": invalidate}
+
+        self.note_indexes[key] = entry
+
+        while len(self.note_indexes) > MAX_NOTE_INDEXES:
+            self.drop_note_index(next(iter(self.note_indexes)))
+
+        return entry
+
+    def get_note_index(self, clip):
+        entry = self.note_indexes.get(Clip.note_index_key(clip))
+        return None if entry is None else entry.get("notes")
+
+    def index_notes(self, clip):
+        """Reads all notes of the clip and keeps the position of each note until
+        the clip's notes are changed by anything but this handler"""
+        notes = clip.get_notes_extended(0, 128, 0.0, 99999999999999.0)
+        entry = self.watch_notes(clip)
+        entry["notes"] = dict((note.note_id, (note.pitch, note.start_time))
+                              for note in notes)
+        return notes
+
+    def fetch_indexed_notes(self, clip, note_ids):
+        """Reads the notes with the given ids, only fetching the time and pitch
+        range they're in according to the clip's note index"""
+        index = self.get_note_index(clip)
+        if index is None or not note_ids:
+            return self.index_notes(clip)
+
+        positions = [index.get(note_id) for note_id in note_ids]
+        if None in positions:
+            return self.index_notes(clip)
+
+        pitches = [pitch for pitch, _ in positions]
+        times = [start_time for _, start_time in positions]
+        notes = clip.get_notes_extended(
+            min(pitches), max(pitches) - min(pitches) + 1,
+            float(min(times)), float(max(times) - min(times) + NOTE_TIME_EPSILON))
+
+        # The index is outdated, e.g. because Live didn't report a change yet
+        found = set(note.note_id for note in notes)
+        if any(note_id not in found for note_id in note_ids):
+            return self.index_notes(clip)
+
+        return notes
+
+    def update_note_index(self, clip, notes):
+        index = self.get_note_index(clip)
+        if index is not None:
+            for note in notes:
+                index[note.note_id] = (note.pitch, note.start_time)
+
+    def apply_note_modifications(self, ns, notes, from_time=None, from_pitch=None,
+                                 time_span=None, pitch_span=None):
+        """Modifies the notes with the given ids. Only the notes in the given range are
+        fetched, or, without a range, the range of the notes according to the clip's index."""
+        note_ids = []
         for modified_note_data in notes:
             note_id = modified_note_data.get("note_id")
             if note_id is None:
                 raise ValueError("The note_id parameter is required to modify the note.")
+            note_ids.append(note_id)
+
+        if from_time is None and from_pitch is None and time_span is None and pitch_span is None:
+            existing_notes = self.fetch_indexed_notes(ns, note_ids)
+        else:
+            # Same int-vs-double issue as get_notes_extended above.
+            existing_notes = ns.get_notes_extended(
+                from_pitch or 0, 128 if pitch_span is None else pitch_span,
+                float(from_time or 0), float(99999999999999 if time_span is None else time_span))
+
+        existing_notes_map = {note.note_id: note for note in existing_notes}
+
+        for modified_note_data in notes:
+            note_id = modified_note_data.get("note_id")
             if note_id in existing_notes_map:
                 note_to_update = existing_notes_map[note_id]
                 for key, value in modified_note_data.items():
                     if key != "note_id" and hasattr(note_to_update, key):
                         setattr(note_to_update, key, value)
-        
-        return ns.apply_note_modifications(existing_notes)
+
+        # Changes made here are tracked in the index, so they don't invalidate it
+        applying = self._applying
+        self._applying = True
+        try:
+            result = ns.apply_note_modifications(existing_notes)
+        finally:
+            self._applying = applying
+
+        self.update_note_index(ns, existing_notes)
+        return result
+
+    @staticmethod
+    def create_note_specification(note):
+        kwargs = dict((field, note[field])
+                      for field in NOTE_SPECIFICATION_FIELDS if field in note)
+        return Live.Clip.MidiNoteSpecification(
+            pitch=note["pitch"], start_time=float(note["start_time"]),
+            duration=float(note["duration"]), **kwargs)
+
+    def apply_note_delta(self, ns, add=None, remove=None, modify=None):
+        """Modifies, removes, and adds notes in one undo step. Added notes need a pitch,
+        start_time, and duration, the other properties are optional. Modified notes
+        need a note_id. Returns the ids of the added notes in the same order."""
+        song = self.ableton.song()
+        note_ids = []
+
+        song.begin_undo_step()
+        self._applying = True
+        try:
+            if modify:
+                self.apply_note_modifications(ns, modify)
+
+            # The modifications may have indexed the notes again
+            if remove:
+                ns.remove_notes_by_id(list(remove))
+                index = self.get_note_index(ns)
+                if index is not None:
+                    for note_id in remove:
+                        index.pop(note_id, None)
+
+            if add:
+                note_ids = list(ns.add_new_notes(
+                    tuple(Clip.create_note_specification(note) for note in add)))
+                index = self.get_note_index(ns)
+                if index is not None:
+                    for note_id, note in zip(note_ids, add):
+                        index[note_id] = (note["pitch"], note["start_time"])
+        finally:
+            self._applying = False
+            song.end_undo_step()
+
+        return note_ids
 
     def get_warp_markers(self, ns):
         dict_markers = []
@@ -80,6 +367,15 @@ class Clip(Interface):
         return dict_markers
 
     def set_notes(self, ns, notes):
+        """Adds the notes, given as (pitch, time, duration, velocity, mute) tuples,
+        or in the columnar layout returned by get_notes_extended"""
+        if isinstance(notes, dict):
+            types = dict(NOTE_COLUMNS)
+            columns = [Clip.read_note_column(notes, field, types[field]) for field in
+                       ("pitch", "start_time", "duration", "velocity", "mute")]
+            notes = [(pitch, time, duration, velocity, bool(mute))
+                     for pitch, time, duration, velocity, mute in zip(*columns)]
+
         return ns.set_notes(tuple(notes))
 
     def replace_selected_notes(self, ns, notes):
@@ -4,20 +4,22 @@ from .Clip import Clip
 
 
 class ClipSlot(Interface):
+    serialized_fields = (
+        ("color", lambda clip_slot: clip_slot.color),
+        ("has_clip", lambda clip_slot: clip_slot.has_clip),
+        ("is_playing", lambda clip_slot: clip_slot.is_playing),
+        ("is_recording", lambda clip_slot: clip_slot.is_recording),
+        ("is_triggered", lambda clip_slot: clip_slot.is_triggered),
+    )
+
     @staticmethod
-    def serialize_clip_slot(clip_slot):
+    def serialize_clip_slot(clip_slot, fields=None):
         if clip_slot is None:
             return None
 
         clip_slot_id = Interface.save_obj(clip_slot)
-        return {
-            "id": clip_slot_id,
-            "color": clip_slot.color,
-            "has_clip": clip_slot.has_clip,
-            "is_playing": clip_slot.is_playing,
-            "is_recording": clip_slot.is_recording,
-            "is_triggered": clip_slot.is_triggered
-        }
+        return Interface.serialize_fields(
+            clip_slot, clip_slot_id, ClipSlot.serialized_fields, fields)
 
     def __init__(self, c_instance, socket):
         super(ClipSlot, self).__init__(c_instance, socket)
@@ -0,0 +1,71 @@
+import zlib
+
+# Compression strategies, stored in bits 2-3 of the frame flags.
+# Plain zlib is 0, so frames without the flag set stay compatible.
+COMPRESSION_ZLIB = 0x00
+COMPRESSION_NONE = 0x04
+COMPRESSION_FAST = 0x08
+COMPRESSION_DICT = 0x0C
+COMPRESSION_MASK = 0x0C
+
+# Payloads below this size grow when compressed, so they're sent as-is
+RAW_THRESHOLD = 128
+
+# Payloads above this size are compressed with the fastest level. The
+# dictionary doesn't make a difference for them, but compression time does.
+FAST_THRESHOLD = 64 * 1024
+
+FAST_LEVEL = 1
+DICT_LEVEL = 6
+
+# Preset dictionary containing fragments that recur in most JSON messages.
+# zlib prefers matches close to the end, so the most common fragments
+# come last. This has to be kept in sync with the JS client.
+ZDICT = (
+    '"velocity_deviation": 0.0, "release_velocity": 64.0, '
+    '"probability": 1.0, "mute": false, "note_id": '
+    '"is_audio_clip": false, "is_midi_clip": true, "muted": false, '
+    '"start_time": 0.0, "end_time": '
+    '"has_clip": false, "is_playing": false, "is_recording": false, '
+    '"is_triggered": false, "is_loadable": true, "is_selected": false, '
+    '"is_device": false, "is_folder": false, "source": "", "uri": "'
+    '"type": "Device.DeviceType.audio_effect", "class_name": "'
+    '"value": 0.0, "is_quantized": false}, '
+    '"is_foldable": false, "is_grouped": false}, '
+    '"solo": false, "mute": false, "color": 16725558, "color_index": '
+    '"pitch": 60, "duration": 0.25, "velocity": 100.0, '
+    '{"event": "result", "data": {"data": [{"id": "live_'
+    '"etag": "'
+    ', "name": "'
+    '"}, {"id": "live_'
+    '", "uuid": null}'
+    '{"event": "result", "data": '
+    ', "uuid": "'
+).encode("utf8")
+
+
+def compress(data, dictionary=True):
+    '''Compresses the given bytes using the cheapest suitable strategy.
+    The preset dictionary only consists of JSON fragments, so it should
+    be disabled for MessagePack and binary payloads.
+    Returns the strategy and the compressed bytes.'''
+    size = len(data)
+
+    if size < RAW_THRESHOLD:
+        return COMPRESSION_NONE, data
+
+    if size > FAST_THRESHOLD:
+        return COMPRESSION_FAST, zlib.compress(data, FAST_LEVEL)
+
+    if not dictionary:
+        return COMPRESSION_ZLIB, zlib.compress(data, DICT_LEVEL)
+
+    try:
+        compressor = zlib.compressobj(
+            DICT_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS, 8,
+            zlib.Z_DEFAULT_STRATEGY, ZDICT)
+    except TypeError:
+        # Python 2 doesn't support preset dictionaries
+        return COMPRESSION_FAST, zlib.compress(data, FAST_LEVEL)
+
+    return COMPRESSION_DICT, compressor.compress(data) + compressor.flush()
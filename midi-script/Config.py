@@ -1,3 +1,11 @@
 DEBUG = False
 
 FAST_POLLING = True
+
+# Time that may be spent handling commands, listeners, and
+# streams per tick. Remaining work is resumed in the next tick.
+TICK_BUDGET_MS = 20
+
+# Time that may be spent on background work, like indexing the
+# browser, per tick. It's not taken from the tick's budget.
+BACKGROUND_BUDGET_MS = 3
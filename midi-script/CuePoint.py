@@ -3,13 +3,19 @@ from .Interface import Interface
 
 
 class CuePoint(Interface):
+    serialized_fields = (
+        ("name", lambda cue_point: cue_point.name),
+        ("time", lambda cue_point: cue_point.time),
+    )
+
     @staticmethod
-    def serialize_cue_point(cue_point):
+    def serialize_cue_point(cue_point, fields=None):
         if cue_point is None:
             return None
 
         cue_point_id = Interface.save_obj(cue_point)
-        return {"id": cue_point_id, "name": cue_point.name, "time": cue_point.time}
+        return Interface.serialize_fields(
+            cue_point, cue_point_id, CuePoint.serialized_fields, fields)
 
     def __init__(self, c_instance, socket):
         super(CuePoint, self).__init__(c_instance, socket)
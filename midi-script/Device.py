@@ -1,35 +1,37 @@
 from __future__ import absolute_import
+from functools import partial
 from .Interface import Interface
 from .DeviceParameter import DeviceParameter
 
 
 class Device(Interface):
+    serialized_fields = (
+        ("name", lambda device: device.name),
+        ("type", lambda device: str(device.type)),
+        ("class_name", lambda device: device.class_name),
+    )
+
     @staticmethod
-    def serialize_device(device):
+    def serialize_device(device, fields=None):
         if device is None:
             return None
 
         device_id = Interface.save_obj(device)
-        return {
-            "id": device_id,
-            "name": device.name,
-            "type": str(device.type),
-            "class_name": device.class_name,
-        }
+        return Interface.serialize_fields(device, device_id, Device.serialized_fields, fields)
 
     def __init__(self, c_instance, socket):
         super(Device, self).__init__(c_instance, socket)
 
-    def get_parameters(self, ns):
-        return map(DeviceParameter.serialize_device_parameter, ns.parameters)
+    def get_parameters(self, ns, fields=None):
+        return map(partial(DeviceParameter.serialize_device_parameter, fields=fields), ns.parameters)
 
     def get_type(self, ns):
         return str(ns.type)
 
-    def get_chains(self, ns):
+    def get_chains(self, ns, fields=None):
         from .Chain import Chain
         try:
-            return map(Chain.serialize_chain, ns.chains)
+            return map(partial(Chain.serialize_chain, fields=fields), ns.chains)
         except AttributeError:
             return []
 
@@ -40,9 +42,9 @@ class Device(Interface):
         except AttributeError:
             return None
 
-    def get_drum_pads(self, ns):
+    def get_drum_pads(self, ns, fields=None):
         from .DrumPad import DrumPad
         try:
-            return map(DrumPad.serialize_drum_pad, ns.drum_pads)
+            return map(partial(DrumPad.serialize_drum_pad, fields=fields), ns.drum_pads)
         except AttributeError:
             return []
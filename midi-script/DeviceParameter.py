@@ -3,18 +3,20 @@ from .Interface import Interface
 
 
 class DeviceParameter(Interface):
+    serialized_fields = (
+        ("name", lambda param: param.name),
+        ("value", lambda param: param.value),
+        ("is_quantized", lambda param: param.is_quantized),
+    )
+
     @staticmethod
-    def serialize_device_parameter(param):
+    def serialize_device_parameter(param, fields=None):
         if param is None:
             return None
 
         device_parameter_id = Interface.save_obj(param)
-        return {
-            "id": device_parameter_id,
-            "name": param.name,
-            "value": param.value,
-            "is_quantized": param.is_quantized
-        }
+        return Interface.serialize_fields(
+            param, device_parameter_id, DeviceParameter.serialized_fields, fields)
 
     def __init__(self, c_instance, socket):
         super(DeviceParameter, self).__init__(c_instance, socket)
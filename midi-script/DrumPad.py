@@ -1,46 +1,28 @@
 from __future__ import absolute_import
+from functools import partial
 
 from .Interface import Interface
 
 
 class DrumPad(Interface):
+    serialized_fields = (
+        ("name", lambda pad: pad.name),
+        ("note", Interface.safe_reader("note")),
+        ("mute", Interface.safe_reader("mute", False)),
+        ("solo", Interface.safe_reader("solo", False)),
+    )
+
     @staticmethod
-    def serialize_drum_pad(pad):
+    def serialize_drum_pad(pad, fields=None):
         if pad is None:
             return None
 
         pad_id = Interface.save_obj(pad)
-
-        mute = False
-        solo = False
-        note = None
-
-        try:
-            mute = pad.mute
-        except:
-            pass
-
-        try:
-            solo = pad.solo
-        except:
-            pass
-
-        try:
-            note = pad.note
-        except:
-            pass
-
-        return {
-            "id": pad_id,
-            "name": pad.name,
-            "note": note,
-            "mute": mute,
-            "solo": solo,
-        }
+        return Interface.serialize_fields(pad, pad_id, DrumPad.serialized_fields, fields)
 
     def __init__(self, c_instance, socket):
         super(DrumPad, self).__init__(c_instance, socket)
 
-    def get_chains(self, ns):
+    def get_chains(self, ns, fields=None):
         from .Chain import Chain
-        return map(Chain.serialize_chain, ns.chains)
+        return map(partial(Chain.serialize_chain, fields=fields), ns.chains)
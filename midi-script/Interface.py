@@ -1,34 +1,188 @@
-import hashlib
-import json
+import time
+import types
+import zlib
+from collections import OrderedDict
 
 from .Config import DEBUG
 from .Logging import logger
+from .Metrics import metrics
+from .Profiler import profiler
+from .Registry import ObjectRegistry
+from .Socket import Encoded, LANE_BULK
+
+
+def get_etag(data):
+    """A cheap digest of the encoded data. It only has to tell
+    different versions of the same prop apart, so CRC32 and
+    the length are enough."""
+    return "%08x%x" % (zlib.crc32(data) & 0xffffffff, len(data))
 
 
 class Interface(object):
-    obj_ids = dict()
+    obj_ids = ObjectRegistry()
     listeners = dict()
+    # Listeners that fired since the last flush: {key: send_fn}
+    dirty_listeners = OrderedDict()
+    # Rate-limited listeners whose latest value hasn't been sent yet: {key: send_fn}
+    held_listeners = OrderedDict()
+    # Generators returned by handlers that are sent in chunks
+    streams = []
+    # Functions of Live types that have been called through the fallback path:
+    # {(type, name): function}
+    type_functions = {}
+
+    @staticmethod
+    def flush_listeners(deadline=None):
+        """Sends the current value of every coalesced listener that fired since the last flush.
+        Listeners that can't be sent before the deadline stay dirty until the next flush."""
+        # Held listeners are checked again in every flush until they've sent their value
+        Interface.dirty_listeners.update(Interface.held_listeners)
+        Interface.held_listeners.clear()
+
+        while Interface.dirty_listeners:
+            if deadline is not None and time.time() >= deadline:
+                return
+
+            key, send_fn = Interface.dirty_listeners.popitem(last=False)
+            try:
+                send_fn()
+            except Exception as e:
+                logger.error("Error flushing listener " + key + ":")
+                logger.exception(e)
+
+    @staticmethod
+    def process_streams(deadline=None):
+        """Sends the next chunk of every pending stream, or a done marker once it's exhausted.
+        Everything is sent in the bulk lane, so the result can't overtake the last chunks.
+        Streams are advanced further until the deadline has passed, if there's one, except
+        for streams that yielded None, which wait for the next call."""
+        paused = set()
+
+        while True:
+            streams = [stream for stream in Interface.streams if id(stream) not in paused]
+            if not streams:
+                return
+
+            for stream in streams:
+                if not Interface.advance_stream(stream):
+                    paused.add(id(stream))
+
+            if deadline is None or time.time() >= deadline:
+                return
+
+    @staticmethod
+    def advance_stream(stream):
+        """Returns whether a chunk was sent and the stream may be advanced again"""
+        socket = stream["socket"]
+        uuid = stream["uuid"]
+
+        try:
+            chunk = next(stream["generator"])
+        except StopIteration:
+            Interface.streams.remove(stream)
+            socket.send("result", {"done": True, "chunks": stream["chunks"]},
+                        uuid, lane=LANE_BULK)
+            return
+        except Exception as e:
+            Interface.streams.remove(stream)
+            logger.error("Stream Error:")
+            logger.exception(e)
+            socket.send("error", str(e), uuid, lane=LANE_BULK)
+            return
+
+        # Handlers yield None to pause until the next step without sending anything
+        if chunk is None:
+            return False
+
+        stream["chunks"] += 1
+        socket.send("stream", chunk, uuid, lane=LANE_BULK)
+        return True
 
     @staticmethod
-    def save_obj(obj):
+    def save_obj(obj, transient=False):
+        """Registers the object and returns its id. Transient objects,
+        like browser items, are evicted once too many are registered."""
         try:
             obj_id = "live_" + str(obj._live_ptr)
         except:
-            obj_id = "id_" + str(id(obj))
+            return Interface.obj_ids.add_anonymous(obj, transient)
 
-        Interface.obj_ids[obj_id] = obj
+        Interface.obj_ids.add(obj_id, obj, transient)
         return obj_id
 
     @staticmethod
     def get_obj(obj_id):
-        obj = Interface.obj_ids.get(obj_id)
-        if obj is None:
-            raise Exception("Unknown object id: %s" % obj_id)
-        return obj
+        return Interface.obj_ids.get(obj_id)
+
+    @staticmethod
+    def serialize_fields(obj, obj_id, readers, fields=None):
+        """Reads the given fields of the object using the (field, reader) pairs,
+        or all of them if fields is None. The id is always included."""
+        result = {"id": obj_id}
+        for field, read in readers:
+            if fields is None or field in fields:
+                result[field] = read(obj)
+        return result
+
+    @staticmethod
+    def safe_reader(prop, default=None):
+        """Returns a reader for properties that don't exist on every object."""
+        def read(obj):
+            try:
+                return getattr(obj, prop)
+            except:
+                return default
+        return read
+
+    @staticmethod
+    def get_type_function(ns, name):
+        """Returns the function of the object's type with the given name,
+        or None if it doesn't have one. Lookups are cached per type."""
+        key = (type(ns), name)
+        fn = Interface.type_functions.get(key)
+        if fn is not None:
+            return fn
+
+        fn = getattr(type(ns), name, None)
+        if callable(fn):
+            Interface.type_functions[key] = fn
+            return fn
+
+        # Callables that only exist on the instance can't be cached
+        fn = getattr(ns, name, None)
+        if callable(fn):
+            return lambda ns, *args, **kwargs: fn(*args, **kwargs)
+
+        return None
 
     def __init__(self, c_instance, socket):
         self.ableton = c_instance
         self.socket = socket
+        self.build_dispatch_tables()
+
+    def build_dispatch_tables(self):
+        """Collects the public functions, custom getters, and custom
+        setters of the handler, so commands don't need to probe for them"""
+        self.functions = {}
+        self.getters = {}
+        self.setters = {}
+        # Getters that take a fields argument for projections
+        self.projectable = set()
+
+        cls = type(self)
+        for name in dir(cls):
+            if name.startswith("_") or not callable(getattr(cls, name)):
+                continue
+
+            fn = getattr(self, name)
+            self.functions[name] = fn
+            if name.startswith("get_"):
+                self.getters[name[4:]] = fn
+                code = getattr(fn, "__func__", fn).__code__
+                if "fields" in code.co_varnames[:code.co_argcount]:
+                    self.projectable.add(name[4:])
+            elif name.startswith("set_"):
+                self.setters[name[4:]] = fn
 
     def log_debug(self, message):
         if DEBUG:
@@ -38,22 +192,67 @@ class Interface(object):
         return Interface.get_obj(nsid)
 
     def send_result(self, result, uuid, etag, cache):
-        """Sends an empty response if the etag matches the result, or the result together with an etag."""
+        """Sends an empty response if the etag matches the result, or the result
+        together with an etag. Returns the etag of cached results."""
         if not cache:
-            return self.socket.send("result", result, uuid)
+            self.socket.send("result", result, uuid)
+            return None
 
-        def jsonReplace(o):
-            return str(o)
+        # Iterators like map objects can only be consumed once
+        if hasattr(result, "__next__"):
+            result = list(result)
 
-        response = json.dumps(result, default=jsonReplace, ensure_ascii=False)
-        hash = hashlib.md5(response.encode("utf-8", "replace")).hexdigest()
+        # The encoded result is reused for the response, so it's only encoded once
+        response = self.socket.encode(result)
+        hash = get_etag(response)
 
         if hash == etag:
-            return self.socket.send("result", {"__cached": True}, uuid)
+            self.socket.send("result", {"__cached": True}, uuid)
         else:
-            return self.socket.send("result", {"data": result, "etag": hash}, uuid)
+            data = {"data": result, "etag": hash}
+            encoded = self.socket.encode_map(
+                (("data", Encoded(response, result)), ("etag", hash)))
+            self.socket.send("result", Encoded(encoded, data), uuid)
+
+        return hash
+
+    @staticmethod
+    def freeze(value):
+        """Returns a hashable version of JSON-like command arguments"""
+        if isinstance(value, dict):
+            return tuple(sorted((key, Interface.freeze(item)) for key, item in value.items()))
+        if isinstance(value, list):
+            return tuple(Interface.freeze(item) for item in value)
+        return value
+
+    def get_etag_listener(self, nsid, name, args):
+        """Returns the listener that tells whether the requested prop changed
+        since its etags were memoized, or None if there is no such listener.
+        This includes props with custom getters, whose etags are memoized per
+        arguments, e.g. per projection, and cleared once the listener fires."""
+        if name != "get_prop" or not isinstance(args, dict):
+            return None
+
+        prop = args.get("prop")
+        if prop is None:
+            return None
+
+        key = str(nsid if nsid is not None else "Default") + ":" + prop
+        listener = self.listeners.get(key)
+
+        if listener is None or listener.get("owner") is not self:
+            return None
+
+        return listener
 
     def handle(self, payload):
+        start = time.time()
+        succeeded = self.run_command(payload)
+        metrics.record_command(str(payload.get("ns")) + "." + str(payload.get("name")),
+                               (time.time() - start) * 1000, not succeeded)
+
+    def run_command(self, payload):
+        """Runs the command and sends its result. Returns False if it failed."""
         name = payload.get("name")
         uuid = payload.get("uuid")
         etag = payload.get("etag")
@@ -62,31 +261,95 @@ class Interface(object):
         nsid = payload.get("nsid")
 
         try:
+            listener = self.get_etag_listener(nsid, name, args) if cache else None
+            memo_key = Interface.freeze(args) if listener is not None else None
+
+            # The value hasn't changed since the client received it
+            if listener is not None and etag is not None and \
+                    listener["etags"].get(memo_key) == etag:
+                self.socket.send("result", {"__cached": True}, uuid)
+                return True
+
             ns = self.get_ns(nsid)
+            fn = self.functions.get(name)
             # Try self-defined functions first
-            if hasattr(self, name) and callable(getattr(self, name)):
-                result = getattr(self, name)(ns=ns, **args)
-                self.send_result(result, uuid, etag, cache)
-            # Check if the function exists in the Ableton API as fallback
-            elif hasattr(ns, name) and callable(getattr(ns, name)):
+            if fn is not None:
+                result = fn(ns=ns, **args)
+            else:
+                # Check if the function exists in the Ableton API as fallback
+                fn = Interface.get_type_function(ns, name)
+                if fn is None:
+                    self.socket.send("error", "Function call failed: " + payload["name"] +
+                                     " doesn't exist or isn't callable", uuid)
+                    return False
+
                 if isinstance(args, dict):
-                    result = getattr(ns, name)(**args)
-                    self.send_result(result, uuid, etag, cache)
+                    result = fn(ns, **args)
                 elif isinstance(args, list):
-                    result = getattr(ns, name)(*args)
-                    self.send_result(result, uuid, etag, cache)
+                    result = fn(ns, *args)
                 else:
                     self.socket.send("error", "Function call failed: " + str(args) +
                                      " are invalid arguments", uuid)
+                    return False
+
+            # Generators are sent in chunks over multiple ticks
+            if isinstance(result, types.GeneratorType):
+                self.send_stream(result, uuid)
             else:
-                self.socket.send("error", "Function call failed: " + payload["name"] +
-                                 " doesn't exist or isn't callable", uuid)
+                result_etag = self.send_result(result, uuid, etag, cache)
+                if listener is not None:
+                    listener["etags"][memo_key] = result_etag
         except Exception as e:
             logger.error("Handler Error:")
             logger.exception(e)
             self.socket.send("error", str(e.args[0]), uuid)
+            return False
+
+        return True
+
+    def send_stream(self, generator, uuid):
+        Interface.streams.append(
+            {"generator": generator, "uuid": uuid, "socket": self.socket, "chunks": 0})
+
+    @staticmethod
+    def is_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    @staticmethod
+    def throttle(key, read, emit, min_interval=None, deadband=None):
+        """Returns a send function for coalesced listeners that sends at most once per
+        min_interval ms and holds back values within the deadband of the last sent one.
+        Held listeners are flushed again until their value settles, so the last value
+        always gets sent."""
+        state = {"time": 0, "sent": False, "value": None, "read": None}
+        interval = (min_interval or 0) / 1000.0
+
+        def send():
+            if time.time() < state["time"] + interval:
+                Interface.held_listeners[key] = Interface.listeners[key]["send"]
+                return
+
+            value = read()
+
+            if deadband is not None and state["sent"] and Interface.is_number(value) \
+                    and Interface.is_number(state["value"]) \
+                    and abs(value - state["value"]) <= deadband:
+                if value == state["value"]:
+                    return
 
-    def add_listener(self, ns, prop, eventId, nsid="Default"):
+                # Wait until the value has stopped moving
+                if value != state["read"]:
+                    state["read"] = value
+                    Interface.held_listeners[key] = Interface.listeners[key]["send"]
+                    return
+
+            state.update(time=time.time(), sent=True, value=value, read=value)
+            return emit(value)
+
+        return send
+
+    def add_listener(self, ns, prop, eventId, nsid="Default", coalesce=False, multiplex=None,
+                     min_interval=None, deadband=None):
         try:
             add_fn = getattr(ns, "add_" + prop + "_listener")
         except:
@@ -99,14 +362,49 @@ class Interface(object):
             self.log_debug("Key already has a listener")
             return self.listeners[key]["id"]
 
-        def fn():
-            value = self.get_prop(ns, prop)
-            return self.socket.send(eventId, value)
+        # The etags of the prop's values that were last sent to the client,
+        # per arguments of get_prop. They're memoized until the listener fires.
+        listener = {"id": eventId, "owner": self, "etags": {}}
+
+        def read():
+            return self.get_prop(ns, prop)
+
+        if multiplex is None:
+            def emit(value):
+                return self.socket.send(eventId, value)
+        else:
+            # Values of many listeners are sent under one event id,
+            # tagged with the listener's own event id
+            def emit(value):
+                return self.socket.send(multiplex, {"id": eventId, "value": value})
+
+        if min_interval is None and deadband is None:
+            def send():
+                return emit(read())
+        else:
+            # Rate-limited listeners are always coalesced
+            send = Interface.throttle(key, read, emit, min_interval, deadband)
+            coalesce = True
+
+        send = profiler.wrap(send)
+        listener["send"] = send
+
+        if coalesce:
+            # Only mark the key as dirty, the value is read and
+            # sent once per tick in flush_listeners
+            def fn():
+                listener["etags"].clear()
+                Interface.dirty_listeners[key] = send
+        else:
+            def fn():
+                listener["etags"].clear()
+                return send()
 
         self.log_debug("Attaching listener: " +
                        key + ", event ID: " + eventId)
         add_fn(fn)
-        self.listeners[key] = {"id": eventId, "fn": fn}
+        listener["fn"] = fn
+        self.listeners[key] = listener
         return eventId
 
     def remove_listener(self, ns, prop, nsid="Default"):
@@ -119,25 +417,31 @@ class Interface(object):
             remove_fn = getattr(ns, "remove_" + prop + "_listener")
             remove_fn(self.listeners[key]["fn"])
             self.listeners.pop(key, None)
+            Interface.dirty_listeners.pop(key, None)
+            Interface.held_listeners.pop(key, None)
             return True
         except Exception as e:
             raise Exception("Listener " + str(prop) +
                             " could not be removed: " + str(e))
 
-    def get_prop(self, ns, prop):
-        try:
-            get_fn = getattr(self, "get_" + prop)
-        except:
-            def get_fn(ns):
-                result = getattr(ns, prop)
-                return result
+    def get_prop(self, ns, prop, fields=None):
+        get_fn = self.getters.get(prop)
+
+        # Only getters for collections of Live objects support projections
+        if fields is not None:
+            if prop not in self.projectable:
+                raise Exception(
+                    "Property %s doesn't support selecting fields" % prop)
+            return get_fn(ns, fields=fields)
+
+        if get_fn is None:
+            return getattr(ns, prop)
 
         return get_fn(ns)
 
     def set_prop(self, ns, prop, value):
-        try:
-            set_fn = getattr(self, "set_" + prop)
-        except:
-            def set_fn(ns, value): return setattr(ns, prop, value)
+        set_fn = self.setters.get(prop)
+        if set_fn is None:
+            return setattr(ns, prop, value)
 
         return set_fn(ns, value)
@@ -1,11 +1,18 @@
 from __future__ import absolute_import
 from .Interface import Interface
+from .Logging import logger
+from .Metrics import metrics
+from .Profiler import profiler
+from .Telemetry import DEFAULT_INTERVAL_MS
 from .version import version
 
 
 class Internal(Interface):
-    def __init__(self, c_instance, socket):
+    def __init__(self, c_instance, socket, scheduler, handlers, telemetry):
         super(Internal, self).__init__(c_instance, socket)
+        self.scheduler = scheduler
+        self.handlers = handlers
+        self.telemetry = telemetry
 
     def get_ns(self, nsid):
         return self
@@ -16,6 +23,115 @@ class Internal(Interface):
     def get_version(self, ns):
         return version
 
+    def get_registry_stats(self, ns):
+        return Interface.obj_ids.get_stats()
+
     def set_client_port(self, nsid, port):
         self.socket.set_client_port(port)
         return True
+
+    def negotiate_features(self, ns, features):
+        return self.socket.set_features(features)
+
+    def retransmit(self, ns, message_id, chunks):
+        """Sends the given chunks of a frame again that the client didn't receive"""
+        return self.socket.retransmit(message_id, chunks)
+
+    def get_stats(self, ns):
+        stats = metrics.get_stats()
+        stats["send"] = self.socket.get_send_stats()
+        stats["scheduler"] = self.scheduler.get_stats()
+        stats["registry"] = Interface.obj_ids.get_stats()
+        stats["listeners"] = len(Interface.listeners)
+        stats["dirty_listeners"] = len(Interface.dirty_listeners)
+        stats["held_listeners"] = len(Interface.held_listeners)
+        stats["streams"] = len(Interface.streams)
+        return stats
+
+    def reset_stats(self, ns):
+        metrics.reset()
+        Interface.obj_ids.reset_stats()
+        self.scheduler.overruns = 0
+        return True
+
+    def get_scheduler_stats(self, ns):
+        return self.scheduler.get_stats()
+
+    def get_tick_budget(self, ns):
+        return self.scheduler.budget_ms
+
+    def set_tick_budget(self, ns, value):
+        """Sets the time in ms that may be spent on commands, listeners, and streams per tick"""
+        self.scheduler.budget_ms = max(1, float(value))
+
+    def get_send_stats(self, ns):
+        return self.socket.get_send_stats()
+
+    def report_dropped_frames(self, ns, count):
+        """Called by the client when chunked frames didn't arrive completely"""
+        logger.info("Client dropped " + str(count) + " frames")
+        self.socket.report_congestion()
+        return self.socket.get_send_stats()
+
+    def start_profiling(self, ns, commands=None, seconds=None, limit=20):
+        """Profiles the next `commands` commands and listener callbacks, or
+        all of them for the next `seconds` seconds"""
+        profiler.start(commands, seconds, limit)
+        return profiler.get_status()
+
+    def stop_profiling(self, ns):
+        """Ends the running profiling session early and returns its summary"""
+        return profiler.stop()
+
+    def get_profile(self, ns):
+        return profiler.get_status()
+
+    def add_listeners(self, ns, listeners, coalesce=False, multiplex=None,
+                      min_interval=None, deadband=None):
+        """Attaches listeners to the props of many objects at once. Every listener
+        is a dict of ns, nsid, prop, and eventId. Returns the event ids in the same
+        order, or None for listeners that couldn't be attached. If multiplex is set,
+        values are sent as {id, value} under that event id."""
+        ids = []
+        for listener in listeners:
+            try:
+                handler = self.handlers[listener["ns"]]
+                nsid = listener.get("nsid")
+                ids.append(handler.add_listener(
+                    handler.get_ns(nsid), listener["prop"], listener["eventId"],
+                    nsid="Default" if nsid is None else nsid,
+                    coalesce=coalesce, multiplex=multiplex,
+                    min_interval=min_interval, deadband=deadband))
+            except Exception as e:
+                logger.error("Error adding listener " + str(listener) + ":")
+                logger.exception(e)
+                ids.append(None)
+        return ids
+
+    def remove_listeners(self, ns, listeners):
+        """Removes the listeners given as dicts of ns, nsid, and prop.
+        Returns whether each of them has been removed."""
+        removed = []
+        for listener in listeners:
+            try:
+                handler = self.handlers[listener["ns"]]
+                nsid = listener.get("nsid")
+                removed.append(handler.remove_listener(
+                    handler.get_ns(nsid), listener["prop"],
+                    nsid="Default" if nsid is None else nsid))
+            except Exception as e:
+                logger.error("Error removing listener " + str(listener) + ":")
+                logger.exception(e)
+                removed.append(False)
+        return removed
+
+    def start_telemetry(self, ns, channels, interval=DEFAULT_INTERVAL_MS):
+        """Sends the values of the given channels, dicts of ns, nsid, and numeric prop,
+        every `interval` ms as a binary frame. Replaces the previous channels."""
+        return self.telemetry.start(channels, interval)
+
+    def stop_telemetry(self, ns):
+        return self.telemetry.stop()
+
+    def get_telemetry(self, ns):
+        return self.telemetry.get_status()
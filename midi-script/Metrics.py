@@ -0,0 +1,102 @@
+from __future__ import absolute_import
+import time
+
+# Upper bounds of the latency histogram buckets in ms. The last
+# bucket counts everything above the largest bound.
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class CommandStats(object):
+    __slots__ = ("count", "errors", "total_ms", "max_ms", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, duration_ms, error):
+        self.count += 1
+        self.total_ms += duration_ms
+
+        if error:
+            self.errors += 1
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+
+        bucket = 0
+        for bound in LATENCY_BUCKETS_MS:
+            if duration_ms <= bound:
+                break
+            bucket += 1
+        self.histogram[bucket] += 1
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": self.total_ms,
+            "max_ms": self.max_ms,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "histogram": self.histogram,
+        }
+
+
+class Metrics(object):
+    '''Counters for the commands and traffic handled by the script.
+    Recording only touches a few ints, so it's always enabled.'''
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.since = time.time()
+        self.commands = {}
+        self.bytes_in = 0
+        self.packets_in = 0
+        self.bytes_out = 0
+        self.packets_out = 0
+        self.frames_out = 0
+        self.uncompressed_bytes_out = 0
+        self.compressed_bytes_out = 0
+
+    def record_command(self, key, duration_ms, error=False):
+        stats = self.commands.get(key)
+        if stats is None:
+            stats = self.commands[key] = CommandStats()
+        stats.record(duration_ms, error)
+
+    def record_packet_in(self, size):
+        self.packets_in += 1
+        self.bytes_in += size
+
+    def record_packet_out(self, size):
+        self.packets_out += 1
+        self.bytes_out += size
+
+    def record_frame_out(self, uncompressed_size, compressed_size):
+        self.frames_out += 1
+        self.uncompressed_bytes_out += uncompressed_size
+        self.compressed_bytes_out += compressed_size
+
+    def get_stats(self):
+        ratio = None
+        if self.uncompressed_bytes_out:
+            ratio = float(self.compressed_bytes_out) / \
+                self.uncompressed_bytes_out
+
+        return {
+            "duration_s": time.time() - self.since,
+            "latency_buckets_ms": list(LATENCY_BUCKETS_MS),
+            "commands": dict((key, stats.to_dict()) for key, stats in self.commands.items()),
+            "bytes_in": self.bytes_in,
+            "packets_in": self.packets_in,
+            "bytes_out": self.bytes_out,
+            "packets_out": self.packets_out,
+            "frames_out": self.frames_out,
+            "compression_ratio": ratio,
+        }
+
+
+metrics = Metrics()
@@ -1,17 +1,43 @@
 from __future__ import absolute_import
+import struct
+import time
 
 from .Interface import Interface
 from .Logging import logger
+from .Socket import LANE_MIDI
+
+# Kind of binary frame, stored in its first byte
+MIDI_FRAME = 2
+
+# [kind][event id length][message count][time of the earliest message in s],
+# followed by the event id, and by [time offset in us][length][bytes] per message
+_frame_header = struct.Struct(">BBHd")
+_message_header = struct.Struct(">IH")
+
+# Messages with one value per (type, channel, target) that can be coalesced
+CONTINUOUS_MESSAGES = (0xA0, 0xB0, 0xD0, 0xE0)
+# Messages with a target in their second byte
+TARGETED_MESSAGES = (0x80, 0x90, 0xA0, 0xB0)
+NOTE_MESSAGES = (0x80, 0x90)
+
+MAX_BUFFERED_MESSAGES = 0xffff
 
 
 class Midi(Interface):
     event_id = None
+    multiplex = None
+    coalesce = False
+    immediate_notes = False
 
     def __init__(self, c_instance, socket, tracked_midi, update_midi_callback):
         super(Midi, self).__init__(c_instance, socket)
         self.outputs = set()
         self.tracked_midi = tracked_midi
         self.update_midi = update_midi_callback
+        # Messages received since the last flush: [(time, bytes)]
+        self._buffer = []
+        # Index of the buffered message per (status, target) when coalescing
+        self._coalesced = {}
 
     def get_ns(self, nsid):
         return self
@@ -32,10 +58,16 @@ class Midi(Interface):
 
     def remove_midi_listener(self, fn):
         self.event_id = None
+        del self._buffer[:]
+        self._coalesced.clear()
         self.tracked_midi.clear()
         self.update_midi()
 
-    def add_listener(self, ns, prop, eventId, nsid="Default"):
+    def add_listener(self, ns, prop, eventId, nsid="Default", coalesce=False, multiplex=None,
+                     min_interval=None, deadband=None, immediate_notes=False):
+        """With the binary protocol feature, MIDI messages are buffered and sent once per tick.
+        coalesce only keeps the latest CC, pitch bend, and pressure message per channel
+        and target, immediate_notes sends notes and everything before them right away."""
         if prop != "midi":
             raise Exception("Listener " + str(prop) + " does not exist.")
 
@@ -49,9 +81,63 @@ class Midi(Interface):
         self.tracked_midi.update(self.outputs)
         self.update_midi()
         self.event_id = eventId
+        self.multiplex = multiplex
+        self.coalesce = coalesce
+        self.immediate_notes = immediate_notes
 
         return eventId
 
     def send_midi(self, midi_bytes):
-        if self.event_id is not None:
-            self.socket.send(self.event_id, {"bytes": midi_bytes})
+        if self.event_id is None:
+            return
+
+        if self.socket.has_feature("binary"):
+            return self.buffer_midi(midi_bytes)
+
+        if self.multiplex is None:
+            self.socket.send(self.event_id, {"bytes": midi_bytes},
+                             lane=LANE_MIDI)
+        else:
+            self.socket.send(self.multiplex, {"id": self.event_id, "value": {"bytes": midi_bytes}},
+                             lane=LANE_MIDI)
+
+    def buffer_midi(self, midi_bytes):
+        now = time.time()
+        status = midi_bytes[0] & 0xF0
+
+        if self.coalesce and status in CONTINUOUS_MESSAGES:
+            target = midi_bytes[1] if status in TARGETED_MESSAGES else None
+            key = (midi_bytes[0], target)
+            index = self._coalesced.get(key)
+
+            # The latest message keeps the position of the first one
+            if index is not None:
+                self._buffer[index] = (now, midi_bytes)
+                return
+
+            self._coalesced[key] = len(self._buffer)
+
+        self._buffer.append((now, midi_bytes))
+
+        if (self.immediate_notes and status in NOTE_MESSAGES) or \
+                len(self._buffer) >= MAX_BUFFERED_MESSAGES:
+            self.flush_midi(immediate=True)
+
+    def flush_midi(self, immediate=False):
+        """Sends all buffered messages in one binary frame. Called once per tick."""
+        if not self._buffer or self.event_id is None:
+            return
+
+        messages = self._buffer
+        self._buffer = []
+        self._coalesced.clear()
+
+        start = min(t for t, _ in messages)
+        event_id = self.event_id.encode("utf8")
+        parts = [_frame_header.pack(MIDI_FRAME, len(event_id), len(messages), start), event_id]
+
+        for t, midi_bytes in messages:
+            parts.append(_message_header.pack(int((t - start) * 1000000), len(midi_bytes)))
+            parts.append(bytes(bytearray(midi_bytes)))
+
+        self.socket.send_binary(b"".join(parts), LANE_MIDI, immediate)
@@ -1,17 +1,23 @@
 from __future__ import absolute_import
+from functools import partial
 
 from .DeviceParameter import DeviceParameter
 from .Interface import Interface
 
 
 class MixerDevice(Interface):
+    serialized_fields = (
+        ("volume", lambda mixer_device: mixer_device.volume),
+    )
+
     @staticmethod
-    def serialize_mixer_device(mixer_device):
+    def serialize_mixer_device(mixer_device, fields=None):
         if mixer_device is None:
             return None
 
         device_id = Interface.save_obj(mixer_device)
-        return {"id": device_id, "volume": mixer_device.volume}
+        return Interface.serialize_fields(
+            mixer_device, device_id, MixerDevice.serialized_fields, fields)
 
     def __init__(self, c_instance, socket):
         super(MixerDevice, self).__init__(c_instance, socket)
@@ -31,8 +37,8 @@ class MixerDevice(Interface):
     def get_right_split_stereo(self, ns):
         return DeviceParameter.serialize_device_parameter(ns.right_split_stereo)
 
-    def get_sends(self, ns):
-        return map(DeviceParameter.serialize_device_parameter, ns.sends)
+    def get_sends(self, ns, fields=None):
+        return map(partial(DeviceParameter.serialize_device_parameter, fields=fields), ns.sends)
 
     def get_song_tempo(self, ns):
         return DeviceParameter.serialize_device_parameter(ns.song_tempo)
@@ -0,0 +1,153 @@
+import struct
+import sys
+
+# A minimal, pure Python MessagePack encoder that runs inside Live's
+# embedded interpreter. Objects that aren't natively supported, like
+# Live's vectors or map objects, are encoded as arrays if they're
+# iterable, and as strings otherwise.
+
+if sys.version_info[0] >= 3:
+    text_type = str
+    binary_type = bytes
+    integer_types = (int,)
+else:
+    text_type = unicode  # noqa: F821
+    binary_type = None
+    integer_types = (int, long)  # noqa: F821
+
+_uint8 = struct.Struct(">BB").pack
+_uint16 = struct.Struct(">BH").pack
+_uint32 = struct.Struct(">BI").pack
+_uint64 = struct.Struct(">BQ").pack
+_int8 = struct.Struct(">Bb").pack
+_int16 = struct.Struct(">Bh").pack
+_int32 = struct.Struct(">Bi").pack
+_int64 = struct.Struct(">Bq").pack
+_float64 = struct.Struct(">Bd").pack
+_byte = struct.Struct("B").pack
+
+
+def _encode_int(value, out):
+    if 0 <= value < 0x80:
+        out.append(_byte(value))
+    elif -0x20 <= value < 0:
+        out.append(_byte(value & 0xff))
+    elif value >= 0:
+        if value <= 0xff:
+            out.append(_uint8(0xcc, value))
+        elif value <= 0xffff:
+            out.append(_uint16(0xcd, value))
+        elif value <= 0xffffffff:
+            out.append(_uint32(0xce, value))
+        elif value <= 0xffffffffffffffff:
+            out.append(_uint64(0xcf, value))
+        else:
+            out.append(_float64(0xcb, float(value)))
+    else:
+        if value >= -0x80:
+            out.append(_int8(0xd0, value))
+        elif value >= -0x8000:
+            out.append(_int16(0xd1, value))
+        elif value >= -0x80000000:
+            out.append(_int32(0xd2, value))
+        elif value >= -0x8000000000000000:
+            out.append(_int64(0xd3, value))
+        else:
+            out.append(_float64(0xcb, float(value)))
+
+
+def _encode_str(value, out):
+    if isinstance(value, text_type):
+        value = value.encode("utf8")
+
+    length = len(value)
+    if length < 32:
+        out.append(_byte(0xa0 | length))
+    elif length <= 0xff:
+        out.append(_uint8(0xd9, length))
+    elif length <= 0xffff:
+        out.append(_uint16(0xda, length))
+    else:
+        out.append(_uint32(0xdb, length))
+    out.append(value)
+
+
+def _encode_bin(value, out):
+    length = len(value)
+    if length <= 0xff:
+        out.append(_uint8(0xc4, length))
+    elif length <= 0xffff:
+        out.append(_uint16(0xc5, length))
+    else:
+        out.append(_uint32(0xc6, length))
+    out.append(value)
+
+
+def _encode_array(values, out):
+    length = len(values)
+    if length < 16:
+        out.append(_byte(0x90 | length))
+    elif length <= 0xffff:
+        out.append(_uint16(0xdc, length))
+    else:
+        out.append(_uint32(0xdd, length))
+
+    for value in values:
+        _encode(value, out)
+
+
+def _encode_map_header(length, out):
+    if length < 16:
+        out.append(_byte(0x80 | length))
+    elif length <= 0xffff:
+        out.append(_uint16(0xde, length))
+    else:
+        out.append(_uint32(0xdf, length))
+
+
+def _encode_map(values, out):
+    _encode_map_header(len(values), out)
+
+    for key, value in values.items():
+        _encode_str(key if isinstance(key, (text_type, str)) else str(key), out)
+        _encode(value, out)
+
+
+def _encode(value, out):
+    if value is None:
+        out.append(b"\xc0")
+    elif value is True:
+        out.append(b"\xc3")
+    elif value is False:
+        out.append(b"\xc2")
+    elif isinstance(value, float):
+        out.append(_float64(0xcb, value))
+    elif isinstance(value, integer_types):
+        _encode_int(value, out)
+    elif isinstance(value, (text_type, str)):
+        _encode_str(value, out)
+    elif isinstance(value, dict):
+        _encode_map(value, out)
+    elif isinstance(value, (list, tuple)):
+        _encode_array(value, out)
+    elif binary_type is not None and isinstance(value, (binary_type, bytearray)):
+        _encode_bin(bytes(value), out)
+    elif hasattr(value, "__iter__"):
+        # Live's vectors, map objects, and generators
+        _encode_array(list(value), out)
+    else:
+        _encode_str(str(value), out)
+
+
+def packb(value):
+    '''Encodes the given value as MessagePack'''
+    out = []
+    _encode(value, out)
+    return b"".join(out)
+
+
+def pack_map_header(length):
+    '''Encodes the header of a map with the given amount of entries'''
+    out = []
+    _encode_map_header(length, out)
+    return b"".join(out)
@@ -0,0 +1,135 @@
+from __future__ import absolute_import
+import os
+import tempfile
+import time
+
+from .Logging import logger
+
+try:
+    import cProfile
+except ImportError:
+    cProfile = None
+
+profile_path = os.path.join(tempfile.gettempdir(), "ableton-js-profile.pstats")
+
+# Bounds of a profiling session
+DEFAULT_COMMANDS = 100
+MAX_SECONDS = 60
+
+
+class Profiler(object):
+    '''Profiles command handlers and listener callbacks on demand.
+
+    A session covers either the next N commands or everything that runs
+    in the next T seconds. Live's interpreter only runs inside callbacks
+    like ticks, so a sampling thread wouldn't see much. Instead, timed
+    sessions profile every handler deterministically until time is up.'''
+
+    def __init__(self):
+        self._profile = None
+        self._depth = 0
+        self._commands_left = None
+        self._end_time = None
+        self._summary_limit = 20
+        self.last_summary = None
+
+    def is_running(self):
+        return self._profile is not None
+
+    def start(self, commands=None, seconds=None, limit=20):
+        if cProfile is None:
+            raise Exception("Profiling isn't available in this version of Live")
+        if self.is_running():
+            raise Exception("A profiling session is already running")
+
+        if seconds is not None:
+            self._end_time = time.time() + min(float(seconds), MAX_SECONDS)
+            self._commands_left = None
+        else:
+            self._end_time = None
+            self._commands_left = int(commands or DEFAULT_COMMANDS)
+
+        self._summary_limit = limit
+        self._profile = cProfile.Profile()
+        logger.info("Started profiling")
+
+    def call(self, fn, *args, **kwargs):
+        '''Calls the function, profiling it if a session is running'''
+        if self._profile is None or self._depth > 0:
+            return fn(*args, **kwargs)
+
+        self._depth += 1
+        try:
+            return self._profile.runcall(fn, *args, **kwargs)
+        finally:
+            self._depth -= 1
+
+    def wrap(self, fn):
+        '''Returns a function that profiles fn while a session is running'''
+        def profiled(*args, **kwargs):
+            return self.call(fn, *args, **kwargs)
+        return profiled
+
+    def call_command(self, fn, *args, **kwargs):
+        '''Profiles a command handler and counts it towards the session's commands'''
+        if self._profile is None:
+            return fn(*args, **kwargs)
+
+        try:
+            return self.call(fn, *args, **kwargs)
+        finally:
+            if self._commands_left is not None:
+                self._commands_left -= 1
+                if self._commands_left <= 0:
+                    self.stop()
+
+    def check(self):
+        '''Ends timed sessions once their time is up. Called once per tick.'''
+        if self._end_time is not None and time.time() >= self._end_time:
+            self.stop()
+
+    def stop(self):
+        '''Ends the session, writes the stats to the temp dir, and returns a summary'''
+        if self._profile is None:
+            return self.last_summary
+
+        profile = self._profile
+        self._profile = None
+        self._end_time = None
+        self._commands_left = None
+
+        # Also collects the profile's stats
+        profile.dump_stats(profile_path)
+        self.last_summary = self.summarize(profile.stats, self._summary_limit)
+        logger.info("Stopped profiling, stats saved to " + profile_path)
+        return self.last_summary
+
+    @staticmethod
+    def summarize(stats, limit):
+        '''Returns the call sites with the highest cumulative time'''
+        sites = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+
+        return {
+            "path": profile_path,
+            "top": [
+                {
+                    "function": "%s:%d(%s)" % (os.path.basename(path), line, name),
+                    "calls": calls,
+                    "total_ms": total_time * 1000,
+                    "cumulative_ms": cumulative_time * 1000,
+                }
+                for (path, line, name), (_, calls, total_time, cumulative_time, _)
+                in sites[:limit]
+            ],
+        }
+
+    def get_status(self):
+        return {
+            "running": self.is_running(),
+            "commands_left": self._commands_left,
+            "seconds_left": max(0, self._end_time - time.time()) if self._end_time else None,
+            "summary": self.last_summary,
+        }
+
+
+profiler = Profiler()
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+
+# Maximum amount of transient objects, like browser items, to keep
+MAX_TRANSIENT_OBJECTS = 10000
+
+# Amount of objects to check for liveness per sweep
+SWEEP_BATCH_SIZE = 200
+
+
+class StaleObjectError(Exception):
+    pass
+
+
+def is_alive(obj):
+    '''Live's objects compare equal to None once they've been deleted'''
+    try:
+        return obj is not None and obj != None
+    except:
+        return False
+
+
+class ObjectRegistry(object):
+    '''Maps object ids sent to the client to Live objects.
+
+    Persistent objects are kept until they've been deleted in Live,
+    transient objects are kept in an LRU and evicted when it's full.'''
+
+    def __init__(self, max_transient=MAX_TRANSIENT_OBJECTS):
+        self.max_transient = max_transient
+        self._objects = dict()
+        self._transient = OrderedDict()
+        # Ids of registered objects without a Live pointer by their Python
+        # id. Python ids are reused once an object is gone, so these
+        # objects get ids from a counter instead.
+        self._anonymous = dict()
+        self._next_id = 0
+        self._sweep_ids = []
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._objects) + len(self._transient)
+
+    def __contains__(self, obj_id):
+        return obj_id in self._objects or obj_id in self._transient
+
+    def add(self, obj_id, obj, transient=False):
+        if not transient:
+            self._objects[obj_id] = obj
+            return
+
+        if obj_id in self._transient:
+            del self._transient[obj_id]
+
+        self._transient[obj_id] = obj
+
+        while len(self._transient) > self.max_transient:
+            evicted_id, evicted = self._transient.popitem(last=False)
+            self._forget(evicted_id, evicted)
+            self.evictions += 1
+
+    def add_anonymous(self, obj, transient=False):
+        '''Registers an object that has no Live pointer and returns its id.
+        The id stays the same as long as the object is registered and is
+        never given to another object.'''
+        obj_id = self._anonymous.get(id(obj))
+
+        if obj_id is None:
+            self._next_id += 1
+            obj_id = "id_" + str(self._next_id)
+            self._anonymous[id(obj)] = obj_id
+
+        self.add(obj_id, obj, transient)
+        return obj_id
+
+    def _forget(self, obj_id, obj):
+        if self._anonymous.get(id(obj)) == obj_id:
+            del self._anonymous[id(obj)]
+
+    def get(self, obj_id):
+        obj = self._objects.get(obj_id)
+
+        if obj is None:
+            obj = self._transient.get(obj_id)
+            if obj is not None:
+                # Mark the object as recently used
+                del self._transient[obj_id]
+                self._transient[obj_id] = obj
+
+        if obj is not None and not is_alive(obj):
+            self.remove(obj_id)
+            obj = None
+
+        if obj is None:
+            self.misses += 1
+            raise StaleObjectError(
+                "Stale object id: %s. The object doesn't exist anymore, please re-resolve it." % obj_id)
+
+        self.hits += 1
+        return obj
+
+    def remove(self, obj_id):
+        for objects in (self._objects, self._transient):
+            obj = objects.pop(obj_id, None)
+            if obj is not None:
+                self._forget(obj_id, obj)
+
+    def sweep(self, limit=SWEEP_BATCH_SIZE):
+        '''Removes objects that have been deleted in Live. Each call
+        checks a limited amount of objects to keep ticks short.'''
+        if not self._sweep_ids:
+            self._sweep_ids = list(self._objects.keys())
+
+        removed = 0
+        for _ in range(min(limit, len(self._sweep_ids))):
+            obj_id = self._sweep_ids.pop()
+            obj = self._objects.get(obj_id)
+
+            if obj is not None and not is_alive(obj):
+                del self._objects[obj_id]
+                self._forget(obj_id, obj)
+                removed += 1
+
+        return removed
+
+    def clear(self):
+        self._objects.clear()
+        self._transient.clear()
+        self._anonymous.clear()
+        self._sweep_ids = []
+
+    def get_stats(self):
+        return {
+            "size": len(self),
+            "persistent": len(self._objects),
+            "transient": len(self._transient),
+            "max_transient": self.max_transient,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
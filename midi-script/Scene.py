@@ -1,19 +1,25 @@
 from __future__ import absolute_import
+from functools import partial
 from .Interface import Interface
 from .ClipSlot import ClipSlot
 
 
 class Scene(Interface):
+    serialized_fields = (
+        ("name", lambda scene: scene.name),
+        ("color", lambda scene: scene.color),
+    )
+
     @staticmethod
-    def serialize_scene(scene):
+    def serialize_scene(scene, fields=None):
         if scene is None:
             return None
 
         scene_id = Interface.save_obj(scene)
-        return {"id": scene_id, "name": scene.name, "color": scene.color}
+        return Interface.serialize_fields(scene, scene_id, Scene.serialized_fields, fields)
 
     def __init__(self, c_instance, socket):
         super(Scene, self).__init__(c_instance, socket)
 
-    def get_clip_slots(self, ns):
-        return map(ClipSlot.serialize_clip_slot, ns.clip_slots)
+    def get_clip_slots(self, ns, fields=None):
+        return map(partial(ClipSlot.serialize_clip_slot, fields=fields), ns.clip_slots)
@@ -0,0 +1,73 @@
+from __future__ import absolute_import
+import time
+
+from .Config import BACKGROUND_BUDGET_MS, TICK_BUDGET_MS
+from .Interface import Interface
+from .Logging import logger
+from .Profiler import profiler
+
+
+class Scheduler(object):
+    '''Runs the work of one tick on Live's main thread within a time budget.
+
+    Work that doesn't fit into the budget is resumed in the next tick:
+    unhandled packets stay in the socket's receive buffer, dirty listeners
+    stay dirty, and streams are advanced one step per tick at least. Long
+    handlers can return a generator that yields None to pause until then.
+
+    Background tasks get a small slice of their own, so they never delay
+    the time-critical work of the next tick.'''
+
+    def __init__(self, socket, budget_ms=TICK_BUDGET_MS,
+                 background_budget_ms=BACKGROUND_BUDGET_MS):
+        self.socket = socket
+        # Functions producing time-critical data, like buffered
+        # MIDI or telemetry samples, called first in every tick
+        self.tick_hooks = []
+        # Functions doing work that can be spread over many ticks, like
+        # indexing the browser. They're called with the deadline of
+        # their own slice once everything else has been done.
+        self.background_tasks = []
+        self.budget_ms = budget_ms
+        self.background_budget_ms = background_budget_ms
+        self.overruns = 0
+
+    def run(self, background=False):
+        '''Runs the work of one tick. Background tasks only run if background
+        is set, which Live's tick does, but not the fast polling timer.'''
+        start = time.time()
+        deadline = start + self.budget_ms / 1000.0
+
+        # Hooks and listener events first, they're the most time-critical
+        for hook in self.tick_hooks:
+            self._guard(hook)
+        self._guard(Interface.flush_listeners, deadline)
+        # Send queued packets and handle incoming commands
+        self._guard(self.socket.process, deadline)
+        self._guard(Interface.process_streams, deadline)
+        # Send what listeners and streams produced in this tick
+        self._guard(self.socket.flush)
+
+        if time.time() > deadline:
+            self.overruns += 1
+
+        if background:
+            background_deadline = time.time() + self.background_budget_ms / 1000.0
+            for task in self.background_tasks:
+                self._guard(task, background_deadline)
+
+        self._guard(profiler.check)
+
+    def _guard(self, fn, *args):
+        # A failing phase must not keep the others, or the next tick,
+        # from running
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.error("Error running scheduled work:")
+            logger.exception(e)
+
+    def get_stats(self):
+        return {"budget_ms": self.budget_ms,
+                "background_budget_ms": self.background_budget_ms,
+                "overruns": self.overruns}
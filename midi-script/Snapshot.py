@@ -0,0 +1,129 @@
+from __future__ import absolute_import
+
+from .Chain import Chain
+from .Clip import Clip
+from .ClipSlot import ClipSlot
+from .Device import Device
+from .DeviceParameter import DeviceParameter
+from .DrumPad import DrumPad
+from .MixerDevice import MixerDevice
+from .Scene import Scene
+from .Track import Track
+
+# Builds nested models of Live objects using the serialize_* helpers.
+# The depth defines how many levels of children are included below
+# the given object, None includes all of them.
+
+
+def _child_depth(depth):
+    return None if depth is None else depth - 1
+
+
+def _has_children(depth):
+    return depth is None or depth > 0
+
+
+def _list(obj, attr):
+    '''Returns the given list property or an empty list if the object doesn't have it'''
+    try:
+        return list(getattr(obj, attr))
+    except AttributeError:
+        return []
+
+
+def snapshot_device(device, depth):
+    result = Device.serialize_device(device)
+
+    if result is None or not _has_children(depth):
+        return result
+
+    child_depth = _child_depth(depth)
+    result["parameters"] = [
+        DeviceParameter.serialize_device_parameter(p) for p in device.parameters]
+    result["chains"] = [snapshot_chain(c, child_depth)
+                        for c in _list(device, "chains")]
+    result["return_chains"] = [snapshot_chain(c, child_depth)
+                               for c in _list(device, "return_chains")]
+    result["drum_pads"] = [snapshot_drum_pad(p, child_depth)
+                           for p in _list(device, "drum_pads")]
+    return result
+
+
+def snapshot_chain(chain, depth):
+    result = Chain.serialize_chain(chain)
+
+    if result is None or not _has_children(depth):
+        return result
+
+    child_depth = _child_depth(depth)
+    result["devices"] = [snapshot_device(d, child_depth)
+                         for d in chain.devices]
+    return result
+
+
+def snapshot_drum_pad(pad, depth):
+    result = DrumPad.serialize_drum_pad(pad)
+
+    if result is None or not _has_children(depth):
+        return result
+
+    child_depth = _child_depth(depth)
+    result["chains"] = [snapshot_chain(c, child_depth) for c in pad.chains]
+    return result
+
+
+def snapshot_mixer_device(mixer_device):
+    result = MixerDevice.serialize_mixer_device(mixer_device)
+
+    if result is None:
+        return result
+
+    for prop in ("volume", "panning", "track_activator", "crossfader", "cue_volume", "song_tempo"):
+        try:
+            result[prop] = DeviceParameter.serialize_device_parameter(
+                getattr(mixer_device, prop))
+        except AttributeError:
+            pass
+
+    result["sends"] = [DeviceParameter.serialize_device_parameter(s)
+                       for s in _list(mixer_device, "sends")]
+    return result
+
+
+def snapshot_clip_slot(clip_slot):
+    result = ClipSlot.serialize_clip_slot(clip_slot)
+
+    if result is not None and clip_slot.has_clip:
+        result["clip"] = Clip.serialize_clip(clip_slot.clip)
+
+    return result
+
+
+def snapshot_track(track, depth):
+    result = Track.serialize_track(track)
+
+    if result is None or not _has_children(depth):
+        return result
+
+    child_depth = _child_depth(depth)
+    result["mixer_device"] = snapshot_mixer_device(track.mixer_device)
+    result["clip_slots"] = [snapshot_clip_slot(s)
+                            for s in _list(track, "clip_slots")]
+    result["devices"] = [snapshot_device(d, child_depth)
+                         for d in track.devices]
+    return result
+
+
+def snapshot_song(song, depth):
+    '''A generator that yields the song's model in chunks of one
+    track, return track, the master track, or all scenes each.'''
+    for i, track in enumerate(song.tracks):
+        yield {"section": "tracks", "index": i, "data": snapshot_track(track, depth)}
+
+    for i, track in enumerate(song.return_tracks):
+        yield {"section": "return_tracks", "index": i, "data": snapshot_track(track, depth)}
+
+    yield {"section": "master_track", "index": 0, "data": snapshot_track(song.master_track, depth)}
+
+    scenes = [Scene.serialize_scene(s) for s in song.scenes]
+    yield {"section": "scenes", "index": 0, "data": scenes}
@@ -1,22 +1,97 @@
 import socket
 import json
+import errno
 import struct
 import zlib
 import os
 import tempfile
 import sys
+import time
+from collections import deque, OrderedDict
 
 from .Logging import logger
+from .Metrics import metrics
+from . import Compression
+from . import MsgPack
 
 import Live
 
 
+def json_replace(o):
+    try:
+        return list(o)
+    except:
+        pass
+
+    return str(o)
+
+
+class Encoded(object):
+    '''A value that has already been encoded using Socket.encode. It's
+    embedded into messages as-is instead of being encoded again.'''
+    __slots__ = ("data", "value")
+
+    def __init__(self, data, value):
+        self.data = data
+        self.value = value
+
+
 def split_by_n(seq, n):
     '''A generator to divide a sequence into chunks of n units.'''
-    while seq:
-        yield seq[:n]
-        seq = seq[n:]
-
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+
+# Protocol features that can be negotiated by the client
+SUPPORTED_FEATURES = ("aggregate", "compression", "msgpack",
+                      "wide_header", "retransmit", "binary")
+
+# Extended header: [version][flags][0][message id][chunk index][chunk count]
+# Version 1 uses one byte for the last three fields, version 2 uses
+# big-endian 16 bit integers. Version 2 is used with "wide_header".
+HEADER_VERSION = 1
+WIDE_HEADER_VERSION = 2
+_header_v1 = struct.Struct("BBBBBB")
+_header_v2 = struct.Struct(">BBBHHH")
+# The frame contains multiple newline-delimited messages
+FLAG_AGGREGATED = 0x01
+# The frame is encoded using MessagePack instead of JSON. Aggregated
+# MessagePack frames are concatenated without a delimiter.
+FLAG_MSGPACK = 0x02
+# Bits 2-3 of the flags contain the compression strategy, see Compression.py
+# The frame contains binary data whose first byte tells its kind, e.g.
+# telemetry samples. Binary frames are never aggregated.
+FLAG_BINARY = 0x10
+
+# Send queues, drained in this order. Chunks of large frames stay in the
+# lane of their frame, so they can't be overtaken by later frames of the
+# same lane. Streamed results are sent through the bulk lane, so large
+# transfers can't hold up listener events and MIDI.
+LANE_MIDI = 0
+LANE_TELEMETRY = 1
+LANE_EVENTS = 2
+LANE_RESULTS = 3
+LANE_BULK = 4
+LANES = (LANE_MIDI, LANE_TELEMETRY, LANE_EVENTS, LANE_RESULTS, LANE_BULK)
+
+# Bytes sent per process() call. The budget grows additively while the
+# queues can't be drained within it, and is halved when the OS send
+# buffer is full or the client reports dropped frames.
+INITIAL_SEND_BUDGET = 128 * 1024
+MIN_SEND_BUDGET = 16 * 1024
+MAX_SEND_BUDGET = 4 * 1024 * 1024
+SEND_BUDGET_STEP = 32 * 1024
+
+# Incomplete incoming messages are discarded after this many seconds,
+# or when all incomplete messages together take up more than this many bytes
+PARTIAL_MESSAGE_TIMEOUT = 10
+MAX_PARTIAL_MESSAGE_BYTES = 16 * 1024 * 1024
+
+# Bytes of recently sent chunked frames to keep for retransmission
+RETRANSMIT_BUFFER_BYTES = 8 * 1024 * 1024
+
+# Errors that mean the OS send buffer is full and the packet can be retried
+RETRY_ERRNOS = (errno.EAGAIN, errno.EWOULDBLOCK, errno.ENOBUFS, 35, 10035, 10055)
 
 server_port_file = "ableton-js-server.port"
 client_port_file = "ableton-js-client.port"
@@ -37,11 +112,21 @@ class Socket(object):
         self._last_error = ""
         self._socket = None
         self._chunk_limit = None
-        self._send_buffer = []
+        self._send_queues = [deque() for _ in LANES]
+        self._send_budget = INITIAL_SEND_BUDGET
+        self._budget_left = INITIAL_SEND_BUDGET
+        self._batch = None
+        self._features = set()
+        self._pending_messages = [[] for _ in LANES]
         self._message_id = 0
         self._receive_buffer = bytearray()
-        # Dictionary to store chunks per message: {message_id: {chunk_index: chunk_data}}
-        self._chunks = {}
+        # Incomplete incoming messages, oldest first:
+        # {message_id: {"chunks": {chunk_index: chunk_data}, "time": ..., "size": ...}}
+        self._chunks = OrderedDict()
+        self._chunks_size = 0
+        # Recently sent chunked frames, oldest first: {message_id: [packet, ...]}
+        self._sent_frames = OrderedDict()
+        self._sent_frames_size = 0
 
         self.read_remote_port()
         self.init_socket()
@@ -55,6 +140,8 @@ class Socket(object):
         logger.info("Setting client port: " + str(port))
         self.show_message("Client connected on port " + str(port))
         self._client_addr = ("127.0.0.1", int(port))
+        # A new client has to negotiate its own features
+        self.set_features([])
 
     def read_remote_port(self):
         '''Reads the port our client is listening on'''
@@ -75,6 +162,7 @@ class Socket(object):
                     logger.info("[" + str(id(self)) + "] Client port changed from " +
                                 str(old_port) + " to " + str(port))
                     self._client_addr = ("127.0.0.1", port)
+                    self.set_features([])
 
                     if self._socket:
                         self.send(
@@ -85,14 +173,16 @@ class Socket(object):
 
     def shutdown(self):
         logger.info("Shutting down...")
-        send_buffer_length = len(self._send_buffer)
-
-        for i, packet in enumerate(self._send_buffer):
-            logger.info("Sending remaining packet " + str(i) +
-                        " of " + str(send_buffer_length))
-            self._socket.sendto(packet, self._client_addr)
-
-        self._send_buffer.clear()
+        self._flush_pending_messages()
+        send_buffer_length = sum(len(queue) for queue in self._send_queues)
+        i = 0
+
+        for queue in self._send_queues:
+            while queue:
+                logger.info("Sending remaining packet " + str(i) +
+                            " of " + str(send_buffer_length))
+                self._socket.sendto(queue.popleft(), self._client_addr)
+                i += 1
         self._socket.close()
         self._socket = None
 
@@ -146,141 +236,367 @@ class Socket(object):
                 callback=self.init_socket, interval=5000, repeat=False)
             t.start()
 
-    def _sendto(self, msg, immediate):
-        '''Send a raw message to the client, compressed and chunked, if necessary'''
-        compressed = zlib.compress(msg.encode("utf8")) + b'\n'
+    def encode(self, obj):
+        '''Encodes the given object in the format negotiated with the client'''
+        if "msgpack" in self._features:
+            return MsgPack.packb(obj)
 
+        return json.dumps(obj, default=json_replace, ensure_ascii=False).encode("utf8")
+
+    def encode_map(self, items):
+        '''Encodes a map of the given (key, value) pairs. Encoded
+        values are embedded without encoding them again.'''
+        msgpack = "msgpack" in self._features
+        parts = []
+
+        for key, value in items:
+            data = value.data if isinstance(value, Encoded) else self.encode(value)
+            if msgpack:
+                parts.append(MsgPack.packb(key) + data)
+            else:
+                parts.append(self.encode(key) + b": " + data)
+
+        if msgpack:
+            return MsgPack.pack_map_header(len(parts)) + b"".join(parts)
+
+        return b"{" + b", ".join(parts) + b"}"
+
+    def _sendto(self, data, immediate, lane):
+        '''Send an encoded message to the client, compressed and chunked, if necessary'''
         if self._socket == None or self._chunk_limit == None:
             return
 
-        self._message_id = (self._message_id + 1) % 256
-        message_id_byte = struct.pack("B", self._message_id)
+        if not immediate and "aggregate" in self._features:
+            self._pending_messages[lane].append(data)
+            return
+
+        self._send_frame(data, 0, immediate, lane)
+
+    def _flush_pending_messages(self):
+        '''Packs all messages queued since the last flush into one frame per lane'''
+        # JSON-encoded messages never contain raw newlines, so they can
+        # safely be used as a delimiter. MessagePack is self-delimiting.
+        delimiter = b"" if "msgpack" in self._features else b"\n"
+
+        for lane in LANES:
+            messages = self._pending_messages[lane]
+            if messages:
+                self._pending_messages[lane] = []
+                self._send_frame(delimiter.join(messages),
+                                 FLAG_AGGREGATED, False, lane)
+
+    def _header(self, flags, index, count):
+        if not self._features:
+            return struct.pack("BBB", self._message_id, index, count)
+
+        # The chunk count is never 0 in the legacy header, so the
+        # client can use the third byte to tell both formats apart
+        if "wide_header" in self._features:
+            return _header_v2.pack(WIDE_HEADER_VERSION, flags, 0,
+                                   self._message_id, index, count)
+
+        return _header_v1.pack(HEADER_VERSION, flags, 0,
+                               self._message_id, index, count)
+
+    def _send_frame(self, data, flags, immediate, lane):
+        if "msgpack" in self._features and not flags & FLAG_BINARY:
+            flags |= FLAG_MSGPACK
+
+        if "compression" in self._features:
+            # The preset dictionary only helps with JSON payloads
+            strategy, compressed = Compression.compress(
+                data, not flags & (FLAG_MSGPACK | FLAG_BINARY))
+            flags |= strategy
+        else:
+            compressed = zlib.compress(data) + b'\n'
+
+        metrics.record_frame_out(len(data), len(compressed))
+
+        max_id = 0x10000 if "wide_header" in self._features else 0x100
+        self._message_id = (self._message_id + 1) % max_id
 
         if len(compressed) < self._chunk_limit:
-            packet = message_id_byte + b'\x00\x01' + compressed
+            packet = self._header(flags, 0, 1) + compressed
 
             if immediate:
                 self._socket.sendto(packet, self._client_addr)
+                metrics.record_packet_out(len(packet))
             else:
-                self._send_buffer.append(packet)
+                self._send_queues[lane].append(packet)
         else:
             chunks = list(split_by_n(compressed, self._chunk_limit))
             count = len(chunks)
-            count_byte = struct.pack("B", count)
-            for i, chunk in enumerate(chunks):
-                packet_byte = struct.pack("B", i)
-                self._send_buffer.append(
-                    message_id_byte + packet_byte + count_byte + chunk)
-
-    def send(self, name, obj=None, uuid=None, immediate=False):
-        def jsonReplace(o):
-            try:
-                return list(o)
-            except:
-                pass
 
-            return str(o)
+            if count >= max_id:
+                logger.error("Dropping message of " + str(len(compressed)) +
+                             " bytes, it doesn't fit into " + str(max_id - 1) + " chunks")
+                return
+
+            packets = [self._header(flags, i, count) + chunk
+                       for i, chunk in enumerate(chunks)]
+            self._send_queues[lane].extend(packets)
+
+            if "retransmit" in self._features:
+                self._keep_for_retransmit(self._message_id, packets)
+
+    def _keep_for_retransmit(self, message_id, packets):
+        old_packets = self._sent_frames.pop(message_id, None)
+        if old_packets is not None:
+            self._sent_frames_size -= sum(len(p) for p in old_packets)
+
+        self._sent_frames[message_id] = packets
+        self._sent_frames_size += sum(len(p) for p in packets)
+
+        # Always keep the latest frame, even if it exceeds the limit
+        while self._sent_frames_size > RETRANSMIT_BUFFER_BYTES and len(self._sent_frames) > 1:
+            _, old_packets = self._sent_frames.popitem(last=False)
+            self._sent_frames_size -= sum(len(p) for p in old_packets)
+
+    def retransmit(self, message_id, chunks):
+        '''Queues the given chunks of a recently sent frame again.
+        Returns False if the frame isn't available anymore.'''
+        packets = self._sent_frames.get(message_id)
+        if packets is None:
+            return False
+
+        for index in chunks:
+            if 0 <= index < len(packets):
+                self._send_queues[LANE_BULK].append(packets[index])
+
+        return True
+
+    def _drain_send_queues(self):
+        '''Sends queued packets, highest priority first, until
+        the budget of the current process() call is used up'''
+        for queue in self._send_queues:
+            while queue and self._budget_left > 0:
+                packet = queue[0]
+
+                try:
+                    self._socket.sendto(packet, self._client_addr)
+                    metrics.record_packet_out(len(packet))
+                except socket.error as e:
+                    if e.errno in RETRY_ERRNOS:
+                        # Keep the packet and try again in the next call
+                        self.report_congestion()
+                        return
+                    logger.error("Dropping packet: " + str(e))
+
+                queue.popleft()
+                self._budget_left -= len(packet)
+
+    def _update_send_budget(self):
+        '''Grows the budget if the last process() call couldn't drain the queues'''
+        if self._budget_left <= 0 and any(self._send_queues):
+            self._send_budget = min(
+                MAX_SEND_BUDGET, self._send_budget + SEND_BUDGET_STEP)
+
+        self._budget_left = self._send_budget
+
+    def report_congestion(self):
+        '''Halves the send budget, e.g. when the client dropped frames'''
+        self._send_budget = max(MIN_SEND_BUDGET, self._send_budget // 2)
+        self._budget_left = min(self._budget_left, self._send_budget)
+
+    def get_send_stats(self):
+        return {
+            "budget": self._send_budget,
+            "queued": [len(queue) for queue in self._send_queues],
+            "queued_bytes": sum(len(p) for queue in self._send_queues for p in queue),
+            "partial_messages": len(self._chunks),
+            "partial_bytes": self._chunks_size,
+            "retransmit_bytes": self._sent_frames_size,
+        }
+
+    def set_features(self, features):
+        '''Enables the given protocol features, if supported, and returns the enabled ones'''
+        self._flush_pending_messages()
+        self._features = set(f for f in features if f in SUPPORTED_FEATURES)
+        self._sent_frames.clear()
+        self._sent_frames_size = 0
+        logger.info("Enabled protocol features: " + str(sorted(self._features)))
+        return sorted(self._features)
+
+    def has_feature(self, feature):
+        return feature in self._features
+
+    def send_binary(self, data, lane, immediate=False):
+        '''Sends the bytes as a binary frame, if the client supports them.
+        Only the latest frame is kept queued in the telemetry lane.'''
+        if self._socket == None or self._chunk_limit == None or "binary" not in self._features:
+            return
+
+        if lane == LANE_TELEMETRY:
+            self._send_queues[lane].clear()
+
+        try:
+            self._send_frame(data, FLAG_BINARY, immediate, lane)
+        except socket.error as e:
+            logger.error("Socket error sending binary frame:")
+            logger.exception(e)
+
+    def start_batch(self):
+        '''Collects all results and errors until finish_batch is called'''
+        self._batch = []
+
+    def finish_batch(self, uuid):
+        '''Sends all collected results and errors in a single message'''
+        results = self._batch
+        self._batch = None
+        self.send("batch", results, uuid)
+
+    def send(self, name, obj=None, uuid=None, immediate=False, lane=None):
+        if self._batch is not None and uuid is not None and (name == "result" or name == "error"):
+            if isinstance(obj, Encoded):
+                obj = obj.value
+            self._batch.append({"event": name, "data": obj, "uuid": uuid})
+            return
 
         data = None
 
         try:
-            data = json.dumps(
-                {"event": name, "data": obj, "uuid": uuid}, default=jsonReplace, ensure_ascii=False)
-            self._sendto(data, immediate)
+            if isinstance(obj, Encoded):
+                data = self.encode_map(
+                    (("event", name), ("data", obj), ("uuid", uuid)))
+            else:
+                data = self.encode({"event": name, "data": obj, "uuid": uuid})
+            if lane is None:
+                lane = LANE_EVENTS if uuid is None else LANE_RESULTS
+            self._sendto(data, immediate, lane)
         except socket.error as e:
             logger.error("Socket error:")
             logger.exception(e)
             logger.error("Server: " + str(self._server_addr) + ", client: " +
                          str(self._client_addr) + ", socket: " + str(self._socket))
-            logger.error("Data:" + data)
+            logger.error("Data:" + str(data))
         except Exception as e:
             logger.error("Error " + name + "(" + str(uuid) + "):")
             logger.exception(e)
 
-    def process(self):
+    def _parse_header(self, data):
+        '''Returns the message id, chunk index, chunk count, and data of a packet'''
+        # Handle Python 2/3 compatibility
+        header = bytearray(data[:3])
+
+        # The chunk count is never 0 in the legacy header
+        if header[2] != 0:
+            return header[0], header[1], header[2], data[3:]
+
+        version = header[0]
+        if version == HEADER_VERSION:
+            _, _, _, message_id, index, count = _header_v1.unpack_from(data)
+            return message_id, index, count, data[_header_v1.size:]
+        if version == WIDE_HEADER_VERSION:
+            _, _, _, message_id, index, count = _header_v2.unpack_from(data)
+            return message_id, index, count, data[_header_v2.size:]
+
+        raise ValueError("Unsupported header version: " + str(version))
+
+    def _receive_chunk(self, data):
+        '''Stores the chunk and returns the reassembled message once all of its chunks arrived'''
+        try:
+            message_id, chunk_index, total_chunks, chunk_data = self._parse_header(data)
+        except Exception as e:
+            logger.error("Invalid packet: " + str(e))
+            return None
+
+        if total_chunks == 1:
+            return chunk_data
+
+        message = self._chunks.get(message_id)
+        if message is None:
+            message = {"chunks": {}, "time": time.time(), "size": 0}
+            self._chunks[message_id] = message
+
+        if chunk_index not in message["chunks"]:
+            message["chunks"][chunk_index] = chunk_data
+            message["size"] += len(chunk_data)
+            self._chunks_size += len(chunk_data)
+
+        if len(message["chunks"]) < total_chunks:
+            self._expire_partial_messages()
+            return None
+
+        del self._chunks[message_id]
+        self._chunks_size -= message["size"]
+
+        try:
+            return b''.join(message["chunks"][i] for i in range(total_chunks))
+        except KeyError:
+            logger.error("Missing chunks for message " + str(message_id))
+            return None
+
+    def _expire_partial_messages(self):
+        '''Discards incomplete messages whose chunks got lost'''
+        min_time = time.time() - PARTIAL_MESSAGE_TIMEOUT
+
+        while self._chunks:
+            message_id, message = next(iter(self._chunks.items()))
+            if message["time"] >= min_time and self._chunks_size <= MAX_PARTIAL_MESSAGE_BYTES:
+                break
+
+            logger.error("Discarding incomplete message " + str(message_id) + " with " +
+                         str(len(message["chunks"])) + " chunks")
+            del self._chunks[message_id]
+            self._chunks_size -= message["size"]
+
+    def flush(self):
+        '''Sends queued messages within the remaining budget, without receiving'''
+        if self._socket is None:
+            return
+
+        self._flush_pending_messages()
+        self._drain_send_queues()
+
+    def process(self, deadline=None):
+        '''Sends queued messages and handles incoming commands. If there's a deadline,
+        at least one packet is handled and the rest stays in the receive buffer
+        until the next call once the deadline has passed.'''
+        self._flush_pending_messages()
+        self._update_send_budget()
+        self._expire_partial_messages()
+
+        received = False
+
         try:
             while 1:
-                try:
-                    # Send 30 UDP packets at a time, to avoid
-                    # Node's receive buffer from overflowing
-                    for i in range(30):
-                        self._socket.sendto(
-                            self._send_buffer.pop(0), self._client_addr)
-                except:
-                    pass
+                # Pace sending, to avoid Node's receive buffer from overflowing
+                self._drain_send_queues()
+
+                if received and deadline is not None and time.time() >= deadline:
+                    return
 
                 data = self._socket.recv(65536)
+                received = True
+                metrics.record_packet_in(len(data))
+
                 if len(data) and self.input_handler:
-                    # Parse packet format: [messageId][chunkIndex][totalChunks][chunkData]
-                    if len(data) < 3:
-                        # Packet too short, skip it
+                    packet = self._receive_chunk(data)
+                    if packet is None:
+                        continue
+
+                    # Handle Python 2/3 compatibility for zlib.decompress
+                    if sys.version_info[0] < 3:
+                        packet = str(packet)
+
+                    try:
+                        unzipped = zlib.decompress(packet)
+
+                        # Handle bytes to string conversion for Python 3
+                        if sys.version_info[0] >= 3 and isinstance(unzipped, bytes):
+                            unzipped = unzipped.decode('utf-8')
+
+                        payload = json.loads(unzipped)
+                    except Exception as e:
+                        logger.error("Error processing request:")
+                        logger.exception(e)
                         continue
 
-                    # Get message ID, chunk index, and total chunks from first 3 bytes
-                    message_id = data[0]
-                    chunk_index = data[1]
-                    total_chunks = data[2]
-
-                    # Handle Python 2/3 compatibility
-                    if isinstance(message_id, bytes):
-                        message_id = ord(message_id)
-                    if isinstance(chunk_index, bytes):
-                        chunk_index = ord(chunk_index)
-                    if isinstance(total_chunks, bytes):
-                        total_chunks = ord(total_chunks)
-
-                    chunk_data = data[3:]
-
-                    # Initialize message tracking if this is the first chunk for this message
-                    if message_id not in self._chunks:
-                        self._chunks[message_id] = {}
-
-                    # Store the chunk
-                    self._chunks[message_id][chunk_index] = chunk_data
-
-                    # Check if we have all chunks for this message
-                    if len(self._chunks[message_id]) == total_chunks:
-                        # We have all chunks! Reassemble in order
-                        packet_parts = []
-                        for i in range(total_chunks):
-                            if i in self._chunks[message_id]:
-                                packet_parts.append(
-                                    self._chunks[message_id][i])
-                            else:
-                                # Missing chunk - this shouldn't happen if total_chunks is correct
-                                logger.error(
-                                    "Missing chunk %d for message %d" % (i, message_id))
-                                break
-                        else:
-                            # All chunks present, reassemble
-                            packet = b''.join(packet_parts)
-
-                            # Remove this message from tracking
-                            del self._chunks[message_id]
-
-                            # Handle Python 2/3 compatibility for zlib.decompress
-                            if sys.version_info[0] < 3:
-                                packet = str(packet)
-
-                            try:
-                                unzipped = zlib.decompress(packet)
-
-                                # Handle bytes to string conversion for Python 3
-                                if sys.version_info[0] >= 3 and isinstance(unzipped, bytes):
-                                    unzipped = unzipped.decode('utf-8')
-
-                                payload = json.loads(unzipped)
-                            except Exception as e:
-                                logger.error("Error processing request:")
-                                logger.exception(e)
-                                self._chunks.pop(message_id, None)
-                                continue
-
-                            try:
-                                self.input_handler(payload)
-                            except Exception as e:
-                                logger.error("Error processing request:")
-                                logger.exception(e)
+                    try:
+                        self.input_handler(payload)
+                    except Exception as e:
+                        logger.error("Error processing request:")
+                        logger.exception(e)
 
         except socket.error as e:
             if (e.errno != 35 and e.errno != 10035 and e.errno != 10054 and e.errno != 10022):
@@ -1,9 +1,12 @@
 from __future__ import absolute_import
+from functools import partial
 from .Interface import Interface
 from .CuePoint import CuePoint
 from .Device import Device
 from .Scene import Scene
 from .Track import Track
+from .Snapshot import snapshot_song
+from .Registry import StaleObjectError
 
 import Live
 
@@ -36,6 +39,15 @@ REC_QUANTIZATIONS = {
     'rec_q_thirtysecond': Live.Song.RecordingQuantization.rec_q_thirtysecond,
 }
 
+# Status of each value written with set_parameter_values
+PARAMETER_OK = 0
+PARAMETER_STALE = 1
+PARAMETER_OUT_OF_RANGE = 2
+PARAMETER_DISABLED = 3
+PARAMETER_FAILED = 4
+# Not written because another value of an atomic write is invalid
+PARAMETER_SKIPPED = 5
+
 
 class Song(Interface):
     def __init__(self, c_instance, socket):
@@ -60,9 +72,9 @@ class Song(Interface):
     def get_clip_trigger_quantization(self, ns):
         return str(ns.clip_trigger_quantization)
 
-    def get_cue_points(self, ns):
+    def get_cue_points(self, ns, fields=None):
         sorted_points = sorted(ns.cue_points, key=lambda cue: cue.time)
-        return map(CuePoint.serialize_cue_point, sorted_points)
+        return map(partial(CuePoint.serialize_cue_point, fields=fields), sorted_points)
 
     def get_appointed_device(self, ns):
         return Device.serialize_device(ns.appointed_device)
@@ -73,17 +85,22 @@ class Song(Interface):
     def get_midi_recording_quantization(self, ns):
         return str(ns.midi_recording_quantization)
 
-    def get_return_tracks(self, ns):
-        return map(Track.serialize_track, ns.return_tracks)
+    def get_return_tracks(self, ns, fields=None):
+        return map(partial(Track.serialize_track, fields=fields), ns.return_tracks)
+
+    def get_scenes(self, ns, fields=None):
+        return map(partial(Scene.serialize_scene, fields=fields), ns.scenes)
 
-    def get_scenes(self, ns):
-        return map(Scene.serialize_scene, ns.scenes)
+    def get_tracks(self, ns, fields=None):
+        return map(partial(Track.serialize_track, fields=fields), ns.tracks)
 
-    def get_tracks(self, ns):
-        return map(Track.serialize_track, ns.tracks)
+    def get_visible_tracks(self, ns, fields=None):
+        return map(partial(Track.serialize_track, fields=fields), ns.visible_tracks)
 
-    def get_visible_tracks(self, ns):
-        return map(Track.serialize_track, ns.visible_tracks)
+    def get_snapshot(self, ns, depth=None):
+        """Streams a model of all tracks, return tracks, the master track and
+        scenes, including children up to the given depth below each track."""
+        return snapshot_song(ns, depth)
 
     def get_data(self, ns, key):
         return ns.get_data(key, None)
@@ -116,3 +133,57 @@ class Song(Interface):
             return True
 
         return False
+
+    def set_parameter_values(self, ns, values, atomic=True, clamp=False):
+        """Writes a list of [parameter id, value] pairs in one undo step and returns
+        a status per pair. Values outside of the parameter's range are rejected, or
+        clamped if clamp is set. If atomic is set, nothing is written if any pair is
+        invalid."""
+        statuses = []
+        writes = []
+
+        for index, pair in enumerate(values):
+            try:
+                param_id, value = pair
+                # NaN isn't equal to itself and would pass clamping
+                if not Interface.is_number(value) or value != value:
+                    raise ValueError("Invalid parameter value: " + repr(value))
+
+                param = Interface.get_obj(param_id)
+                if not param.is_enabled:
+                    statuses.append(PARAMETER_DISABLED)
+                    continue
+
+                if clamp:
+                    value = min(max(value, param.min), param.max)
+                elif not param.min <= value <= param.max:
+                    statuses.append(PARAMETER_OUT_OF_RANGE)
+                    continue
+            except StaleObjectError:
+                statuses.append(PARAMETER_STALE)
+                continue
+            except (AttributeError, TypeError, ValueError) as e:
+                # The id doesn't belong to a parameter, or the pair is malformed
+                self.log_debug("Invalid parameter write: " + str(e))
+                statuses.append(PARAMETER_FAILED)
+                continue
+
+            statuses.append(PARAMETER_OK)
+            writes.append((index, param, value))
+
+        if atomic and len(writes) < len(statuses):
+            return [PARAMETER_SKIPPED if status == PARAMETER_OK else status
+                    for status in statuses]
+
+        ns.begin_undo_step()
+        try:
+            for index, param, value in writes:
+                try:
+                    param.value = value
+                except Exception as e:
+                    self.log_debug("Couldn't set parameter: " + str(e))
+                    statuses[index] = PARAMETER_FAILED
+        finally:
+            ns.end_undo_step()
+
+        return statuses
@@ -0,0 +1,94 @@
+from __future__ import absolute_import
+import struct
+import time
+
+from .Socket import LANE_TELEMETRY
+
+# Kind of binary frame, stored in its first byte
+TELEMETRY_FRAME = 1
+
+# [kind][padding][channel count][sequence number], followed by
+# a big-endian 32 bit float per channel in the configured order
+_header = struct.Struct(">BxHI")
+
+DEFAULT_INTERVAL_MS = 33
+MAX_CHANNELS = 0xffff
+
+
+class Telemetry(object):
+    '''Samples a fixed set of scalar props at a fixed rate and sends
+    each sample as one binary frame in the telemetry lane.'''
+
+    def __init__(self, socket, handlers):
+        self.socket = socket
+        self.handlers = handlers
+        self.channels = []
+        self.interval_ms = DEFAULT_INTERVAL_MS
+        self.sequence = 0
+        self._readers = []
+        self._values = None
+        self._next_sample = 0
+
+    def start(self, channels, interval=DEFAULT_INTERVAL_MS):
+        '''Starts sampling the given channels, which are dicts of ns, nsid, and prop'''
+        if not self.socket.has_feature("binary"):
+            raise Exception("Telemetry requires the binary protocol feature")
+        if len(channels) > MAX_CHANNELS:
+            raise Exception("Telemetry supports up to " + str(MAX_CHANNELS) + " channels")
+
+        self._readers = [self.create_reader(channel) for channel in channels]
+        self._values = struct.Struct(">" + "f" * len(channels))
+        self.channels = channels
+        self.interval_ms = max(1, float(interval))
+        self.sequence = 0
+        self._next_sample = 0
+        return self.get_status()
+
+    def stop(self):
+        self._readers = []
+        self.channels = []
+        return True
+
+    def create_reader(self, channel):
+        handler = self.handlers[channel["ns"]]
+        ns = handler.get_ns(channel.get("nsid"))
+        prop = channel["prop"]
+
+        # Fail early for props that don't exist or aren't numbers
+        float(handler.get_prop(ns, prop))
+
+        def read():
+            try:
+                return float(handler.get_prop(ns, prop))
+            except:
+                # E.g. the object has been deleted in Live
+                return float("nan")
+
+        return read
+
+    def sample(self):
+        '''Sends a sample if the interval has passed. Called once per tick.'''
+        if not self._readers:
+            return
+
+        now = time.time()
+        if now < self._next_sample:
+            return
+
+        # Keep a steady rate, but don't catch up on samples missed by slow ticks
+        self._next_sample += self.interval_ms / 1000.0
+        if self._next_sample <= now:
+            self._next_sample = now + self.interval_ms / 1000.0
+
+        values = [read() for read in self._readers]
+        data = _header.pack(TELEMETRY_FRAME, len(values), self.sequence) + \
+            self._values.pack(*values)
+        self.sequence = (self.sequence + 1) & 0xffffffff
+        self.socket.send_binary(data, LANE_TELEMETRY)
+
+    def get_status(self):
+        return {
+            "channels": len(self._readers),
+            "interval": self.interval_ms,
+            "sequence": self.sequence,
+        }
@@ -1,4 +1,5 @@
 from __future__ import absolute_import
+from functools import partial
 
 from .Interface import Interface
 from .MixerDevice import MixerDevice
@@ -8,36 +9,23 @@ from .ClipSlot import ClipSlot
 
 
 class Track(Interface):
+    serialized_fields = (
+        ("name", lambda track: track.name),
+        ("solo", Interface.safe_reader("solo", False)),
+        ("mute", Interface.safe_reader("mute", False)),
+        ("color", lambda track: track.color),
+        ("color_index", lambda track: track.color_index),
+        ("is_foldable", lambda track: track.is_foldable),
+        ("is_grouped", lambda track: track.is_grouped),
+    )
+
     @staticmethod
-    def serialize_track(track):
+    def serialize_track(track, fields=None):
         if track is None:
             return None
 
         track_id = Interface.save_obj(track)
-
-        solo = False
-        mute = False
-
-        try:
-            solo = track.solo
-        except:
-            pass
-
-        try:
-            mute = track.mute
-        except:
-            pass
-
-        return {
-            "id": track_id,
-            "name": track.name,
-            "solo": solo,
-            "mute": mute,
-            "color": track.color,
-            "color_index": track.color_index,
-            "is_foldable": track.is_foldable,
-            "is_grouped": track.is_grouped
-        }
+        return Interface.serialize_fields(track, track_id, Track.serialized_fields, fields)
 
     @staticmethod
     def serialize_routing_channel(channel):
@@ -50,8 +38,8 @@ class Track(Interface):
     def __init__(self, c_instance, socket):
         super(Track, self).__init__(c_instance, socket)
 
-    def get_arrangement_clips(self, ns):
-        return map(Clip.serialize_clip, ns.arrangement_clips)
+    def get_arrangement_clips(self, ns, fields=None):
+        return map(partial(Clip.serialize_clip, fields=fields), ns.arrangement_clips)
 
     def get_available_input_routing_channels(self, ns):
         return map(Track.serialize_routing_channel, ns.available_input_routing_channels)
@@ -65,11 +53,11 @@ class Track(Interface):
     def get_available_output_routing_types(self, ns):
         return map(Track.serialize_routing_type, ns.available_output_routing_types)
 
-    def get_devices(self, ns):
-        return map(Device.serialize_device, ns.devices)
+    def get_devices(self, ns, fields=None):
+        return map(partial(Device.serialize_device, fields=fields), ns.devices)
 
-    def get_clip_slots(self, ns):
-        return map(ClipSlot.serialize_clip_slot, ns.clip_slots)
+    def get_clip_slots(self, ns, fields=None):
+        return map(partial(ClipSlot.serialize_clip_slot, fields=fields), ns.clip_slots)
 
     def get_group_track(self, ns):
         return Track.serialize_track(ns.group_track)
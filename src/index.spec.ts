@@ -1,4 +1,4 @@
-import { describe, it } from "vitest";
+import { describe, it, expect } from "vitest";
 import { withAbleton } from "./util/tests";
 
 describe("AbletonJS", () => {
@@ -14,4 +14,18 @@ describe("AbletonJS", () => {
       );
     });
   });
+
+  it("should execute batched commands in order", async () => {
+    await withAbleton(async (ab) => {
+      const [tempo, version, missing] = await ab.sendBatch([
+        { ns: "song", name: "get_prop", args: { prop: "tempo" } },
+        { ns: "internal", name: "get_prop", args: { prop: "version" } },
+        { ns: "song", name: "get_prop", args: { prop: "does_not_exist" } },
+      ]);
+
+      expect(tempo.status).toBe("fulfilled");
+      expect(version.status).toBe("fulfilled");
+      expect(missing.status).toBe("rejected");
+    });
+  });
 });
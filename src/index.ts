@@ -5,7 +5,7 @@ import truncate from "lodash/truncate.js";
 import { EventEmitter } from "events";
 import { v4 } from "uuid";
 import semver from "semver";
-import { unzipSync, deflateSync } from "zlib";
+import { deflateSync } from "zlib";
 import LruCache from "lru-cache";
 import { unwatchFile, watchFile } from "node:fs";
 import { readFile, writeFile } from "node:fs/promises";
@@ -18,6 +18,8 @@ import { Midi } from "./ns/midi.js";
 import { packageVersion } from "./util/package-version.js";
 import { Cache, isCached, CacheResponse } from "./util/cache.js";
 import { Logger } from "./util/logger.js";
+import { decompress } from "./util/compression.js";
+import { decodeAll } from "./util/msgpack.js";
 import { Session } from "./ns/session.js";
 
 const SERVER_PORT_FILE = "ableton-js-server.port";
@@ -25,6 +27,171 @@ const CLIENT_PORT_FILE = "ableton-js-client.port";
 
 const limit = pLimit(200);
 
+/** Protocol features that can be negotiated with the Remote Script. */
+export type ProtocolFeature =
+  | "aggregate"
+  | "compression"
+  | "msgpack"
+  | "wide_header"
+  | "retransmit"
+  | "binary";
+
+const SUPPORTED_FEATURES: ProtocolFeature[] = [
+  "aggregate",
+  "compression",
+  "msgpack",
+  "wide_header",
+  "retransmit",
+  "binary",
+];
+
+const HEADER_VERSION = 1;
+const WIDE_HEADER_VERSION = 2;
+
+enum FrameFlags {
+  /** The frame contains multiple newline-delimited messages */
+  Aggregated = 0x01,
+  /** The frame contains one or more concatenated MessagePack messages */
+  MsgPack = 0x02,
+  /** The frame contains binary data whose first byte tells its kind */
+  Binary = 0x10,
+}
+
+enum BinaryFrameKind {
+  Telemetry = 1,
+  Midi = 2,
+}
+
+/** A sample of the channels passed to `internal.startTelemetry`. */
+export interface TelemetrySample {
+  /** Incremented with every sample, so gaps can be detected */
+  sequence: number;
+  /** The values of the channels in the configured order */
+  values: number[];
+}
+
+/**
+ * Parses a telemetry frame:
+ * [kind][padding][channel count: u16][sequence: u32][value: f32]...
+ */
+const parseTelemetryFrame = (frame: Buffer): TelemetrySample => {
+  const count = frame.readUInt16BE(2);
+  const values = new Array<number>(count);
+  for (let i = 0; i < count; i++) {
+    values[i] = frame.readFloatBE(8 + i * 4);
+  }
+  return { sequence: frame.readUInt32BE(4), values };
+};
+
+/**
+ * Parses a frame of buffered MIDI messages:
+ * [kind][event id length: u8][count: u16][time of the earliest message: f64]
+ * [event id], followed by [time offset in µs: u32][length: u16][bytes]
+ * per message. Times are in seconds.
+ */
+const parseMidiFrame = (frame: Buffer) => {
+  const idLength = frame[1];
+  const count = frame.readUInt16BE(2);
+  const start = frame.readDoubleBE(4);
+  const eventId = frame.toString("utf8", 12, 12 + idLength);
+  const messages = new Array<{ bytes: number[]; time: number }>(count);
+
+  let offset = 12 + idLength;
+  for (let i = 0; i < count; i++) {
+    const time = start + frame.readUInt32BE(offset) / 1e6;
+    const length = frame.readUInt16BE(offset + 4);
+    offset += 6;
+    messages[i] = {
+      bytes: Array.from(frame.subarray(offset, offset + length)),
+      time,
+    };
+    offset += length;
+  }
+
+  return { eventId, messages };
+};
+
+/**
+ * Chunked frames that haven't received a chunk for this time are discarded
+ * and reported to the Remote Script, so it can send at a slower pace.
+ */
+const INCOMPLETE_FRAME_TIMEOUT_MS = 1000;
+
+/**
+ * With the retransmit feature, missing chunks of a frame that hasn't
+ * received a chunk for this time are requested again.
+ */
+const RETRANSMIT_DELAY_MS = 200;
+const MAX_RETRANSMITS = 3;
+
+interface PartialFrame {
+  chunks: Buffer[];
+  received: number;
+  total: number;
+  flags: number;
+  lastChunk: number;
+  retransmits: number;
+}
+
+/**
+ * Parses the header of a packet sent by the Remote Script. The
+ * chunk count is never 0 in the legacy header, so a 0 in the third
+ * byte marks the extended header: [version][flags][0][id][index][count]
+ * Version 1 uses one byte per field, version 2 uses 16 bit integers.
+ */
+const parseHeader = (msg: Buffer) => {
+  if (msg[2] !== 0) {
+    return {
+      messageId: msg[0],
+      messageIndex: msg[1],
+      totalMessages: msg[2],
+      flags: 0,
+      message: msg.subarray(3),
+    };
+  }
+
+  if (msg[0] === WIDE_HEADER_VERSION) {
+    return {
+      messageId: msg.readUInt16BE(3),
+      messageIndex: msg.readUInt16BE(5),
+      totalMessages: msg.readUInt16BE(7),
+      flags: msg[1],
+      message: msg.subarray(9),
+    };
+  }
+
+  if (msg[0] !== HEADER_VERSION) {
+    throw new Error(`Unsupported header version: ${msg[0]}`);
+  }
+
+  return {
+    messageId: msg[3],
+    messageIndex: msg[4],
+    totalMessages: msg[5],
+    flags: msg[1],
+    message: msg.subarray(6),
+  };
+};
+
+/** Creates the header of a packet sent to the Remote Script. */
+const createHeader = (
+  messageId: number,
+  index: number,
+  count: number,
+  wide: boolean,
+) => {
+  if (!wide) {
+    return Buffer.from([messageId, index, count]);
+  }
+
+  const header = Buffer.alloc(9);
+  header.writeUInt8(WIDE_HEADER_VERSION, 0);
+  header.writeUInt16BE(messageId, 3);
+  header.writeUInt16BE(index, 5);
+  header.writeUInt16BE(count, 7);
+  return header;
+};
+
 interface Command {
   uuid: string;
   ns: string;
@@ -35,6 +202,13 @@ interface Command {
   args?: { [k: string]: any };
 }
 
+interface BatchCommand {
+  uuid: string;
+  ns: "batch";
+  name: "batch";
+  commands: Command[];
+}
+
 interface Response {
   uuid: string;
   event: "result" | "error" | "connect" | "disconnect" | string;
@@ -51,6 +225,7 @@ interface EventMap {
   message: [any];
   error: [Error];
   ping: [number];
+  telemetry: [TelemetrySample];
 }
 
 export interface EventListener {
@@ -59,6 +234,79 @@ export interface EventListener {
   listener: (data: any) => any;
 }
 
+/** The final result of a command that has been streamed in chunks. */
+export interface StreamResult {
+  done: true;
+  chunks: number;
+}
+
+export interface ListenerOptions {
+  /**
+   * If set, the Remote Script only marks the property as changed
+   * when Live fires the listener and sends its latest value once
+   * per tick. This bounds the amount of events for properties that
+   * change many times between two ticks, e.g. under automation.
+   *
+   * For the MIDI listener, only the latest CC, pitch bend, and pressure
+   * message per channel and target is sent per tick. This requires the
+   * `binary` protocol feature.
+   *
+   * @default false
+   */
+  coalesce?: boolean;
+  /**
+   * If set, the Remote Script sends at most one event per interval in ms.
+   * The latest value is sent once the interval has passed, so the last
+   * change is never lost. Implies `coalesce`.
+   */
+  minInterval?: number;
+  /**
+   * If set, numeric values that differ from the last sent value by at
+   * most this amount are only sent once they stop changing. Implies
+   * `coalesce`.
+   */
+  deadband?: number;
+  /**
+   * For the MIDI listener, sends note messages right away instead of
+   * buffering them until the end of the tick. This requires the `binary`
+   * protocol feature.
+   *
+   * @default false
+   */
+  immediateNotes?: boolean;
+}
+
+/** Converts listener options to the arguments of `add_listener`. */
+const listenerArgs = ({
+  coalesce,
+  minInterval,
+  deadband,
+  immediateNotes,
+}: ListenerOptions = {}) => ({
+  coalesce,
+  min_interval: minInterval,
+  deadband,
+  immediate_notes: immediateNotes,
+});
+
+/** A listener for a property of any object, used to attach many at once. */
+export interface PropSubscription {
+  ns: string;
+  nsid?: string;
+  prop: string;
+  listener: (data: any) => any;
+}
+
+export interface BulkListenerOptions extends ListenerOptions {
+  /**
+   * If set, the Remote Script sends the values of all listeners under
+   * one event id instead of a separate event id per listener.
+   *
+   * @default false
+   */
+  multiplex?: boolean;
+}
+
 export class TimeoutError extends Error {
   constructor(
     public message: string,
@@ -68,6 +316,17 @@ export class TimeoutError extends Error {
   }
 }
 
+/**
+ * Thrown when a command references an object that doesn't exist in
+ * Live anymore, or that has been evicted by the Remote Script. The
+ * object has to be fetched again, e.g. from its parent.
+ */
+export class StaleObjectError extends Error {
+  constructor(public message: string) {
+    super(message);
+  }
+}
+
 export class DisconnectError extends Error {
   constructor(
     public message: string,
@@ -128,6 +387,15 @@ export interface AbletonOptions {
    */
   disableCache?: boolean;
 
+  /**
+   * Protocol features to request from the Remote Script when a
+   * connection is established. Features that aren't supported by
+   * the installed Remote Script are ignored.
+   *
+   * @default all features supported by this version
+   */
+  protocolFeatures?: ProtocolFeature[];
+
   /**
    * Set this to allow ableton-js to log messages. If you set this to
    * `console`, log messages are printed to the standard output.
@@ -143,15 +411,20 @@ export class Ableton extends EventEmitter<EventMap> {
       res: (data: any) => any;
       rej: (data: any) => any;
       clearTimeout: () => any;
+      chunk?: (data: any) => any;
     }
   >();
   private timeoutMap = new Map<number, () => unknown>();
   private eventListeners = new Map<string, Array<(data: any) => any>>();
+  /** Event ids of the listeners sent under each multiplexed event id */
+  private multiplexedEvents = new Map<string, Set<string>>();
   private heartbeatInterval: NodeJS.Timeout | undefined;
   private _isConnected = false;
-  private buffer: Buffer[][] = [];
+  private frames = new Map<number, PartialFrame>();
+  private frameCheckTimeout: NodeJS.Timeout | undefined;
   private latency: number = 0;
   private messageId: number = 0;
+  private features: ProtocolFeature[] = [];
 
   private serverPort: number | undefined;
 
@@ -196,13 +469,35 @@ export class Ableton extends EventEmitter<EventMap> {
     if (!this._isConnected) {
       this._isConnected = true;
       this.logger?.info("Live connected", { type });
+      this.negotiateFeatures();
       this.emit("connect", type);
     }
   }
 
+  /**
+   * Requests the configured protocol features from the Remote Script.
+   * This has to happen on every connect, as the Remote Script falls
+   * back to the legacy protocol whenever it's restarted.
+   */
+  private async negotiateFeatures() {
+    const requested = this.options?.protocolFeatures ?? SUPPORTED_FEATURES;
+
+    try {
+      this.features = await this.internal.negotiateFeatures(requested);
+      this.logger?.info("Negotiated protocol features", {
+        features: this.features,
+      });
+    } catch (e) {
+      // Older versions of the Remote Script don't support negotiation
+      this.features = [];
+      this.logger?.info("Protocol features couldn't be negotiated", { e });
+    }
+  }
+
   private handleDisconnect(type: DisconnectEventType) {
     if (this._isConnected) {
       this._isConnected = false;
+      this.features = [];
       this.eventListeners.clear();
       this.cache?.clear();
 
@@ -395,6 +690,11 @@ export class Ableton extends EventEmitter<EventMap> {
       clearInterval(this.heartbeatInterval);
     }
 
+    if (this.frameCheckTimeout) {
+      clearTimeout(this.frameCheckTimeout);
+      this.frameCheckTimeout = undefined;
+    }
+
     if (this.client) {
       const closePromise = new Promise((res) =>
         this.client?.once("close", res),
@@ -423,44 +723,194 @@ export class Ableton extends EventEmitter<EventMap> {
 
   private handleIncoming(msg: Buffer, info: dgram.RemoteInfo) {
     try {
-      const messageId = msg[0];
-      const messageIndex = msg[1];
-      const totalMessages = msg[2];
-      const message = msg.subarray(3);
+      const { messageId, messageIndex, totalMessages, flags, message } =
+        parseHeader(msg);
 
       // Reset the timeout when receiving a new message
       this.timeoutMap.get(messageId)?.();
 
       if (messageIndex === 0 && totalMessages === 1) {
-        this.handleUncompressedMessage(unzipSync(message).toString());
+        this.handleFrame(decompress(message, flags), flags);
         return;
       }
 
-      if (!this.buffer[messageId]) {
-        this.buffer[messageId] = [];
+      let frame = this.frames.get(messageId);
+
+      // A different frame with the same id is still incomplete
+      if (frame && frame.total !== totalMessages) {
+        this.frames.delete(messageId);
+        frame = undefined;
+      }
+
+      if (!frame) {
+        frame = {
+          chunks: new Array(totalMessages),
+          received: 0,
+          total: totalMessages,
+          flags,
+          lastChunk: 0,
+          retransmits: 0,
+        };
+        this.frames.set(messageId, frame);
+        this.scheduleFrameCheck();
       }
 
-      this.buffer[messageId][messageIndex] = message;
+      if (!frame.chunks[messageIndex]) {
+        frame.chunks[messageIndex] = message;
+        frame.received++;
+      }
+      frame.lastChunk = Date.now();
 
-      if (this.buffer[messageId].filter(Boolean).length === totalMessages) {
-        this.handleUncompressedMessage(
-          unzipSync(Buffer.concat(this.buffer[messageId])).toString(),
-        );
-        delete this.buffer[messageId];
+      if (frame.received === frame.total) {
+        this.frames.delete(messageId);
+        this.handleFrame(decompress(Buffer.concat(frame.chunks), flags), flags);
       }
     } catch (e) {
-      this.buffer = [];
+      // Only this packet is affected, other frames may still complete
       this.emit("error", e as Error);
     }
   }
 
+  private scheduleFrameCheck() {
+    if (this.frameCheckTimeout) {
+      return;
+    }
+
+    this.frameCheckTimeout = setTimeout(() => {
+      this.frameCheckTimeout = undefined;
+      this.checkIncompleteFrames();
+    }, RETRANSMIT_DELAY_MS);
+  }
+
+  /**
+   * Requests missing chunks of stalled frames again, if the Remote Script
+   * supports it, and discards frames that couldn't be completed. The
+   * Remote Script is told about dropped frames to reduce its sending rate.
+   */
+  private checkIncompleteFrames() {
+    const now = Date.now();
+    const retransmit = this.features.includes("retransmit");
+    let dropped = 0;
+
+    for (const [messageId, frame] of this.frames) {
+      const idle = now - frame.lastChunk;
+
+      if (idle > INCOMPLETE_FRAME_TIMEOUT_MS) {
+        this.frames.delete(messageId);
+        dropped++;
+      } else if (
+        retransmit &&
+        idle > RETRANSMIT_DELAY_MS &&
+        frame.retransmits < MAX_RETRANSMITS
+      ) {
+        const missing: number[] = [];
+        for (let i = 0; i < frame.total; i++) {
+          if (!frame.chunks[i]) {
+            missing.push(i);
+          }
+        }
+
+        frame.retransmits++;
+        frame.lastChunk = now;
+        this.internal
+          .retransmit(messageId, missing)
+          .then((available) => {
+            // The Remote Script doesn't have the frame anymore
+            if (!available && this.frames.get(messageId) === frame) {
+              this.frames.delete(messageId);
+            }
+          })
+          .catch(() => {});
+      }
+    }
+
+    if (dropped) {
+      this.logger?.warn("Dropped incomplete frames:", { dropped });
+
+      // Remote Scripts that negotiate features know the command
+      if (this.features.length) {
+        this.internal.reportDroppedFrames(dropped).catch(() => {});
+      }
+    }
+
+    if (this.frames.size) {
+      this.scheduleFrameCheck();
+    }
+  }
+
+  private handleFrame(frame: Buffer, flags: number) {
+    if (flags & FrameFlags.Binary) {
+      this.handleBinaryFrame(frame);
+    } else if (flags & FrameFlags.MsgPack) {
+      const messages = decodeAll(frame) as Response[];
+
+      // Only serialize the message if someone is interested in it
+      if (this.listenerCount("raw_message")) {
+        messages.forEach((m) => this.emit("raw_message", JSON.stringify(m)));
+      }
+
+      this.handleEach(messages, (m) => this.handleResponse(m));
+    } else if (flags & FrameFlags.Aggregated) {
+      this.handleEach(frame.toString().split("\n"), (msg) =>
+        this.handleUncompressedMessage(msg),
+      );
+    } else {
+      this.handleUncompressedMessage(frame.toString());
+    }
+  }
+
+  /**
+   * Handles each message of an aggregated frame on its own, so a message
+   * that fails to parse or a throwing listener doesn't drop the rest.
+   */
+  private handleEach<T>(messages: T[], handle: (msg: T) => void) {
+    messages.forEach((msg) => {
+      try {
+        handle(msg);
+      } catch (e) {
+        this.emit("error", e as Error);
+      }
+    });
+  }
+
+  private handleBinaryFrame(frame: Buffer) {
+    switch (frame[0]) {
+      case BinaryFrameKind.Telemetry:
+        this.emit("telemetry", parseTelemetryFrame(frame));
+        break;
+      case BinaryFrameKind.Midi: {
+        const { eventId, messages } = parseMidiFrame(frame);
+        const listeners = this.eventListeners.get(eventId);
+        this.handleEach(messages, (msg) =>
+          listeners?.forEach((cb) => cb(msg)),
+        );
+        break;
+      }
+      default:
+        this.logger?.warn("Unknown binary frame:", { kind: frame[0] });
+    }
+  }
+
   private handleUncompressedMessage(msg: string) {
     this.emit("raw_message", msg);
-    const data: Response = JSON.parse(msg);
+    this.handleResponse(JSON.parse(msg));
+  }
+
+  private handleResponse(data: Response) {
     const functionCallback = this.msgMap.get(data.uuid);
 
     this.emit("message", data);
 
+    if (data.event === "batch") {
+      return (data.data as Response[]).forEach((response) =>
+        this.handleResponse(response),
+      );
+    }
+
+    if (data.event === "stream" && functionCallback) {
+      return functionCallback.chunk?.(data.data);
+    }
+
     if (data.event === "result" && functionCallback) {
       this.msgMap.delete(data.uuid);
       return functionCallback.res(data.data);
@@ -468,7 +918,12 @@ export class Ableton extends EventEmitter<EventMap> {
 
     if (data.event === "error" && functionCallback) {
       this.msgMap.delete(data.uuid);
-      return functionCallback.rej(new Error(data.data));
+      const message = String(data.data);
+      return functionCallback.rej(
+        message.startsWith("Stale object id")
+          ? new StaleObjectError(message)
+          : new Error(message),
+      );
     }
 
     if (data.event === "disconnect") {
@@ -487,6 +942,12 @@ export class Ableton extends EventEmitter<EventMap> {
         this.serverPort = data.data.port;
       }
 
+      // The Remote Script has been restarted without a disconnect
+      // event, so the protocol features have to be negotiated again
+      if (this._isConnected) {
+        this.negotiateFeatures();
+      }
+
       return this.handleConnect(
         this.clientState === "starting" ? "start" : "realtime",
       );
@@ -499,91 +960,181 @@ export class Ableton extends EventEmitter<EventMap> {
 
     if (data.uuid) {
       this.logger?.warn("Message could not be assigned to any request:", {
-        msg,
+        msg: data,
       });
     }
   }
 
+  /**
+   * Creates a payload for the given command and registers its callbacks,
+   * so the response can be matched to the returned promise.
+   */
+  private registerCommand(
+    command: Omit<Command, "uuid">,
+    onChunk?: (chunk: any) => unknown,
+  ) {
+    const msgId = v4();
+    const payload: Command = {
+      uuid: msgId,
+      ...command,
+    };
+    const timeout = this.options?.commandTimeoutMs ?? 2000;
+    const arg = truncate(JSON.stringify(command.args), { length: 100 });
+    const cls = command.nsid ? `${command.ns}(${command.nsid})` : command.ns;
+
+    let timeoutId: NodeJS.Timeout | null = null;
+    let rejectCommand: (reason: any) => unknown = () => {};
+
+    const clearCurrentTimeout = () => {
+      if (timeoutId) {
+        clearTimeout(timeoutId);
+      }
+    };
+
+    const startTimeout = () => {
+      clearCurrentTimeout();
+
+      timeoutId = setTimeout(() => {
+        rejectCommand(
+          new TimeoutError(
+            `The command ${cls}.${command.name}(${arg}) timed out after ${timeout} ms.`,
+            payload,
+          ),
+        );
+      }, timeout);
+    };
+
+    const result = new Promise<any>((res, rej) => {
+      rejectCommand = rej;
+
+      const currentTimestamp = Date.now();
+      this.msgMap.set(msgId, {
+        res: (result: any) => {
+          const duration = Date.now() - currentTimestamp;
+
+          if (duration > (this.options?.commandWarnMs ?? 1000)) {
+            this.logger?.warn(`Command took longer than expected`, {
+              command,
+              duration,
+            });
+          }
+
+          this.setPing(duration);
+          clearCurrentTimeout();
+          res(result);
+        },
+        rej,
+        clearTimeout: () => {
+          clearCurrentTimeout();
+          rej(
+            new DisconnectError(
+              `Live disconnected before being able to respond to ${cls}.${command.name}(${arg})`,
+              payload,
+            ),
+          );
+        },
+        chunk: onChunk
+          ? (chunk: any) => {
+              // Every chunk shows that Live is still working on the command
+              startTimeout();
+              onChunk(chunk);
+            }
+          : undefined,
+      });
+    });
+
+    return { payload, result, startTimeout };
+  }
+
+  /**
+   * Registers the function that restarts the timeouts of the message
+   * with the given id, until its commands are settled. A message that
+   * reuses the id replaces the entry.
+   */
+  private trackTimeout(
+    messageId: number,
+    startTimeout: () => unknown,
+    settled: Promise<unknown>,
+  ) {
+    this.timeoutMap.set(messageId, startTimeout);
+
+    const release = () => {
+      if (this.timeoutMap.get(messageId) === startTimeout) {
+        this.timeoutMap.delete(messageId);
+      }
+    };
+    settled.then(release, release);
+  }
+
   /**
    * Sends a raw command to Ableton. Usually, you won't need this.
    * A good starting point in general is the `song` prop.
+   *
+   * @param onChunk Called for every chunk of commands whose result is
+   * streamed. Their promise resolves with a `StreamResult` at the end.
    */
-  async sendCommand(command: Omit<Command, "uuid">): Promise<any> {
-    return limit(
-      () =>
-        new Promise((res, rej) => {
-          const msgId = v4();
-          const payload: Command = {
-            uuid: msgId,
-            ...command,
-          };
-          const msg = JSON.stringify(payload);
-          const timeout = this.options?.commandTimeoutMs ?? 2000;
-          const arg = truncate(JSON.stringify(command.args), { length: 100 });
-          const cls = command.nsid
-            ? `${command.ns}(${command.nsid})`
-            : command.ns;
-
-          this.messageId = (this.messageId + 1) % 256;
-
-          let timeoutId: NodeJS.Timeout | null = null;
-
-          const clearCurrentTimeout = () => {
-            if (timeoutId) {
-              clearTimeout(timeoutId);
-            }
-          };
-
-          const startTimeout = () => {
-            clearCurrentTimeout();
-
-            timeoutId = setTimeout(() => {
-              rej(
-                new TimeoutError(
-                  `The command ${cls}.${command.name}(${arg}) timed out after ${timeout} ms.`,
-                  payload,
-                ),
-              );
-            }, timeout);
-          };
-
-          this.timeoutMap.set(this.messageId, startTimeout);
-
-          const currentTimestamp = Date.now();
-          this.msgMap.set(msgId, {
-            res: (result: any) => {
-              const duration = Date.now() - currentTimestamp;
-
-              if (duration > (this.options?.commandWarnMs ?? 1000)) {
-                this.logger?.warn(`Command took longer than expected`, {
-                  command,
-                  duration,
-                });
-              }
+  async sendCommand(
+    command: Omit<Command, "uuid">,
+    onChunk?: (chunk: any) => unknown,
+  ): Promise<any> {
+    return limit(() => {
+      const { payload, result, startTimeout } = this.registerCommand(
+        command,
+        onChunk,
+      );
 
-              this.setPing(duration);
-              clearCurrentTimeout();
-              res(result);
-            },
-            rej,
-            clearTimeout: () => {
-              clearCurrentTimeout();
-              rej(
-                new DisconnectError(
-                  `Live disconnected before being able to respond to ${cls}.${command.name}(${arg})`,
-                  payload,
-                ),
-              );
-            },
-          });
-
-          this.sendRaw(msg, this.messageId).finally(startTimeout);
-        }),
-    );
+      this.messageId = this.nextMessageId();
+      this.trackTimeout(this.messageId, startTimeout, result);
+      this.sendRaw(JSON.stringify(payload), this.messageId).finally(
+        startTimeout,
+      );
+
+      return result;
+    });
+  }
+
+  /**
+   * Sends multiple raw commands to Ableton in a single message.
+   * The Remote Script executes them back-to-back in one tick and
+   * answers with a single, combined response.
+   *
+   * @returns the settled result of each command, in the given order
+   */
+  async sendBatch(
+    commands: Omit<Command, "uuid">[],
+  ): Promise<PromiseSettledResult<any>[]> {
+    if (!commands.length) {
+      return [];
+    }
+
+    return limit(() => {
+      const registered = commands.map((c) => this.registerCommand(c));
+      const payload: BatchCommand = {
+        uuid: v4(),
+        ns: "batch",
+        name: "batch",
+        commands: registered.map((r) => r.payload),
+      };
+
+      const startTimeouts = () => registered.forEach((r) => r.startTimeout());
+
+      const results = Promise.allSettled(registered.map((r) => r.result));
+
+      this.messageId = this.nextMessageId();
+      this.trackTimeout(this.messageId, startTimeouts, results);
+      this.sendRaw(JSON.stringify(payload), this.messageId).finally(
+        startTimeouts,
+      );
+
+      return results;
+    });
   }
 
   async sendCachedCommand(command: Omit<Command, "uuid" | "cache">) {
-    const args = command.args?.prop ?? JSON.stringify(command.args);
+    // Projections of the same prop have to be cached separately
+    const args = command.args?.fields
+      ? JSON.stringify(command.args)
+      : command.args?.prop ?? JSON.stringify(command.args);
     const cacheKey = [command.ns, command.nsid, args].filter(Boolean).join("/");
     const cached = this.cache?.get(cacheKey);
 
@@ -613,8 +1164,14 @@ export class Ableton extends EventEmitter<EventMap> {
     nsid: string | undefined,
     prop: string,
     cache?: boolean,
+    fields?: string[],
   ) {
-    const params = { ns, nsid, name: "get_prop", args: { prop } };
+    const params = {
+      ns,
+      nsid,
+      name: "get_prop",
+      args: fields ? { prop, fields } : { prop },
+    };
 
     if (cache && this.cache) {
       return this.sendCachedCommand(params);
@@ -642,13 +1199,14 @@ export class Ableton extends EventEmitter<EventMap> {
     nsid: string | undefined,
     prop: string,
     listener: (data: any) => any,
+    options?: ListenerOptions,
   ) {
     const eventId = v4();
     const result = await this.sendCommand({
       ns,
       nsid,
       name: "add_listener",
-      args: { prop, nsid, eventId },
+      args: { prop, nsid, eventId, ...listenerArgs(options) },
     });
 
     if (!this.eventListeners.has(result)) {
@@ -675,23 +1233,145 @@ export class Ableton extends EventEmitter<EventMap> {
       return false;
     }
 
+    if (this.detachPropListener(eventId, listener)) {
+      await this.sendCommand({
+        ns,
+        nsid,
+        name: "remove_listener",
+        args: { prop, nsid },
+      });
+    }
+
+    return true;
+  }
+
+  /**
+   * Removes the listener locally.
+   * @returns true if it was the last listener of the event
+   */
+  private detachPropListener(eventId: string, listener: (data: any) => any) {
+    const listeners = this.eventListeners.get(eventId);
+    if (!listeners) {
+      return false;
+    }
+
     if (listeners.length > 1) {
       this.eventListeners.set(
         eventId,
         listeners.filter((l) => l !== listener),
       );
-      return true;
+      return false;
+    }
+
+    this.eventListeners.delete(eventId);
+    return true;
+  }
+
+  /**
+   * Attaches listeners to properties of many objects with one command.
+   * Subscriptions can be created with `Namespace.subscription`.
+   * @returns the attached subscriptions with their event ids, which can
+   * be passed to `removePropListeners`, or null for listeners that
+   * couldn't be attached
+   */
+  async addPropListeners(
+    subscriptions: PropSubscription[],
+    options: BulkListenerOptions = {},
+  ) {
+    const { multiplex, ...listenerOptions } = options;
+    const multiplexId = multiplex ? v4() : undefined;
+
+    if (multiplexId) {
+      this.eventListeners.set(multiplexId, [
+        (data: { id: string; value: any }) =>
+          this.eventListeners.get(data.id)?.forEach((cb) => cb(data.value)),
+      ]);
+    }
+
+    let eventIds: Array<string | null>;
+
+    try {
+      eventIds = await this.sendCommand({
+        ns: "internal",
+        name: "add_listeners",
+        args: {
+          listeners: subscriptions.map(({ ns, nsid, prop }) => ({
+            ns,
+            nsid,
+            prop,
+            eventId: v4(),
+          })),
+          multiplex: multiplexId,
+          ...listenerArgs(listenerOptions),
+        },
+      });
+    } catch (e) {
+      if (multiplexId) {
+        this.eventListeners.delete(multiplexId);
+      }
+      throw e;
     }
 
-    if (listeners.length === 1) {
-      this.eventListeners.delete(eventId);
+    if (multiplexId) {
+      const attached = eventIds.filter((id): id is string => id !== null);
+      if (attached.length) {
+        this.multiplexedEvents.set(multiplexId, new Set(attached));
+      } else {
+        this.eventListeners.delete(multiplexId);
+      }
+    }
+
+    return eventIds.map((eventId, i) => {
+      if (eventId === null) {
+        return null;
+      }
+
+      const { listener } = subscriptions[i];
+      this.eventListeners.set(eventId, [
+        ...(this.eventListeners.get(eventId) ?? []),
+        listener,
+      ]);
+
+      return { ...subscriptions[i], eventId, listener, multiplexId };
+    });
+  }
+
+  /**
+   * Removes listeners attached with `addPropListeners` with one command.
+   */
+  async removePropListeners(
+    subscriptions: Array<
+      PropSubscription & { eventId: string; multiplexId?: string }
+    >,
+  ) {
+    const removed = subscriptions
+      .filter(({ eventId, listener, multiplexId }) => {
+        if (!this.detachPropListener(eventId, listener)) {
+          return false;
+        }
+
+        // Drop the multiplexed handler once none of its listeners is left
+        const events = multiplexId
+          ? this.multiplexedEvents.get(multiplexId)
+          : undefined;
+        if (multiplexId && events) {
+          events.delete(eventId);
+          if (!events.size) {
+            this.multiplexedEvents.delete(multiplexId);
+            this.eventListeners.delete(multiplexId);
+          }
+        }
+
+        return true;
+      })
+      .map(({ ns, nsid, prop }) => ({ ns, nsid, prop }));
+
+    if (removed.length) {
       await this.sendCommand({
-        ns,
-        nsid,
-        name: "remove_listener",
-        args: { prop, nsid },
+        ns: "internal",
+        name: "remove_listeners",
+        args: { listeners: removed },
       });
-      return true;
     }
   }
 
@@ -702,6 +1382,7 @@ export class Ableton extends EventEmitter<EventMap> {
    */
   removeAllPropListeners() {
     this.eventListeners.clear();
+    this.multiplexedEvents.clear();
   }
 
   async sendRaw(msg: string, messageId: number) {
@@ -712,19 +1393,23 @@ export class Ableton extends EventEmitter<EventMap> {
     }
 
     const buffer = deflateSync(Buffer.from(msg));
+    const wide = this.features.includes("wide_header");
 
     const byteLimit = this.client.getSendBufferSize() - 100;
     const totalChunks = Math.ceil(buffer.byteLength / byteLimit);
 
+    if (totalChunks > (wide ? 0xffff : 0xff)) {
+      throw new Error(
+        `The message is too large to be sent (${buffer.byteLength} bytes).`,
+      );
+    }
+
     // Split the message into chunks if it becomes too large
     for (let i = 0; i < totalChunks; i++) {
       const chunk = Buffer.concat([
-        // Message ID (1 byte) - identifies which message this chunk belongs to
-        Buffer.alloc(1, messageId),
-        // Chunk index (1 byte) - 0, 1, 2, ... for regular chunks
-        Buffer.alloc(1, i),
-        // Total chunks (1 byte) - number of chunks in this message
-        Buffer.alloc(1, totalChunks),
+        // Message ID, chunk index, and total chunks of the message,
+        // one byte each or 16 bit each with the wide header
+        createHeader(messageId, i, totalChunks, wide),
         // Chunk data
         buffer.subarray(i * byteLimit, i * byteLimit + byteLimit),
       ]);
@@ -735,9 +1420,19 @@ export class Ableton extends EventEmitter<EventMap> {
     }
   }
 
+  private nextMessageId() {
+    const max = this.features.includes("wide_header") ? 0x10000 : 0x100;
+    return (this.messageId + 1) % max;
+  }
+
   isConnected() {
     return this._isConnected;
   }
+
+  /** Returns the protocol features negotiated with the Remote Script. */
+  getProtocolFeatures() {
+    return this.features;
+  }
 }
 
 export * from "./util/package-version.js";
@@ -18,6 +18,7 @@ export interface GettableProperties {
   user_library: RawBrowserItem[];
   user_folders: RawBrowserItem[];
   hotswap_target: RawBrowserItem;
+  index_status: BrowserIndexStatus;
 }
 
 export interface TransformedProperties {
@@ -46,6 +47,40 @@ export interface ObservableProperties {
   hotswap_target: BrowserItem;
 }
 
+/** Browser roots that are covered by the index. */
+export type BrowserRoot =
+  | "audio_effects"
+  | "clips"
+  | "current_project"
+  | "drums"
+  | "instruments"
+  | "max_for_live"
+  | "midi_effects"
+  | "packs"
+  | "plugins"
+  | "samples"
+  | "sounds"
+  | "user_library"
+  | "user_folders";
+
+export interface BrowserIndexStatus {
+  state: "idle" | "building" | "ready" | "failed";
+  /** Amount of indexed items */
+  items: number;
+  /** Roots that are still being indexed */
+  pending_roots: BrowserRoot[];
+}
+
+export interface BrowserSearchResult {
+  name: string;
+  uri: string;
+  /** Names of the item's root, its parents, and the item itself */
+  path: string[];
+  is_loadable: boolean;
+  is_device: boolean;
+  root: BrowserRoot;
+}
+
 export interface RawBrowser {
   readonly id: string;
 }
@@ -113,4 +148,36 @@ export class Browser extends Namespace<
   public async stopPreview() {
     return this.sendCommand("stop_preview");
   }
+
+  /**
+   * Searches the browser index for items whose path contains all words
+   * of the query. Items whose name starts with the query come first.
+   * While the index is being built, only indexed items are found.
+   */
+  public async search(
+    query: string,
+    limit = 50,
+  ): Promise<BrowserSearchResult[]> {
+    return this.sendCommand("search", { query, limit });
+  }
+
+  /** Returns the browser item of a search result, e.g. to load it. */
+  public async resolveItem(
+    result: BrowserSearchResult,
+  ): Promise<BrowserItem | null> {
+    const item = await this.sendCommand("resolve_item", {
+      path: result.path,
+    });
+    return item ? new BrowserItem(this.ableton, item) : null;
+  }
+
+  /**
+   * Indexes the given roots, or all roots, again in the background.
+   * The other roots keep their indexed items.
+   */
+  public async refreshIndex(
+    roots?: BrowserRoot[],
+  ): Promise<BrowserIndexStatus> {
+    return this.sendCommand("refresh_index", { roots });
+  }
 }
@@ -4,8 +4,12 @@ import { Color } from "../util/color.js";
 import { DeviceParameter } from "./device-parameter.js";
 import {
   Note,
+  NoteColumns,
+  NoteColumnsInput,
   NoteExtended,
   noteToTuple,
+  packNoteColumns,
+  unpackNoteColumns,
   NoteTuple,
   tupleToNote,
 } from "../util/note.js";
@@ -162,6 +166,28 @@ export interface RawClip {
   readonly muted: boolean;
 }
 
+/**
+ * The start time, pitch, and id of the last note of a page. Notes are
+ * sorted by these, and the next page starts after the given note.
+ */
+export type NotesCursor = [number, number, number];
+
+export interface NotesPage {
+  notes: NoteExtended[];
+  /** The cursor of the next page, or null if this is the last page */
+  next: NotesCursor | null;
+  /** The total amount of notes in the requested range */
+  total: number;
+}
+
+export interface StreamedNotesPage {
+  notes: NoteExtended[];
+  /** The index of the first note of this page */
+  cursor: number;
+  /** The total amount of notes in the requested range */
+  total: number;
+}
+
 /**
  * This class represents an entry in Live's Session view matrix.
  */
@@ -307,11 +333,130 @@ export class Clip extends Namespace<
     });
   }
 
+  /**
+   * Returns all notes matching the given range with one array per
+   * property, which is much cheaper to encode and decode for large
+   * clips. If `packed` is set, the arrays are sent as binary data and
+   * returned as typed arrays.
+   */
+  async getNotesColumns(
+    fromTime: number,
+    fromPitch: number,
+    timeSpan: number,
+    pitchSpan: number,
+    packed = true,
+  ): Promise<NoteColumns> {
+    const columns = await this.sendCommand("get_notes_extended", {
+      from_pitch: fromPitch,
+      pitch_span: pitchSpan,
+      from_time: fromTime,
+      time_span: timeSpan,
+      layout: packed ? "packed" : "columns",
+    });
+
+    return packed ? unpackNoteColumns(columns) : columns;
+  }
+
+  /**
+   * Returns a page of up to `limit` notes matching the given range, sorted
+   * by start time and pitch, that come after the given cursor. Pass the
+   * returned `next` cursor to get the following page. Notes that are added
+   * or removed in between don't cause other notes to be skipped or repeated.
+   * `limit` must be at least 1.
+   */
+  async getNotesPage(
+    cursor: NotesCursor | null = null,
+    limit = 1000,
+    fromTime = 0,
+    fromPitch = 0,
+    timeSpan = 99999999999999,
+    pitchSpan = 128,
+  ): Promise<NotesPage> {
+    return this.sendCommand("get_notes_page", {
+      cursor,
+      limit,
+      from_time: fromTime,
+      from_pitch: fromPitch,
+      time_span: timeSpan,
+      pitch_span: pitchSpan,
+    });
+  }
+
+  /**
+   * Returns all notes matching the given range, sorted by start time and
+   * pitch. The Remote Script streams them in pages of `pageSize` notes over
+   * multiple ticks, which keeps Live responsive for clips with many notes.
+   *
+   * @param onPage Called with every page as soon as it arrives
+   */
+  async streamNotesExtended(
+    fromTime: number,
+    fromPitch: number,
+    timeSpan: number,
+    pitchSpan: number,
+    onPage?: (page: StreamedNotesPage) => unknown,
+    pageSize = 1000,
+  ): Promise<NoteExtended[]> {
+    const notes: NoteExtended[] = [];
+
+    await this.sendStreamCommand(
+      "stream_notes_extended",
+      {
+        from_time: fromTime,
+        from_pitch: fromPitch,
+        time_span: timeSpan,
+        pitch_span: pitchSpan,
+        page_size: pageSize,
+      },
+      (page: StreamedNotesPage) => {
+        notes.push(...page.notes);
+        onPage?.(page);
+      },
+    );
+
+    return notes;
+  }
+
   /**
    *  Available since Live 11.0. Replaces modifying notes with remove_notes followed by set_notes.
+   *
+   * The Remote Script keeps an index of the clip's notes, so it only reads
+   * the time and pitch range of the modified notes. If the range is given,
+   * only the notes in that range are read instead.
+   */
+  applyNoteModifications(
+    notes: Array<Partial<NoteExtended> & Pick<NoteExtended, "note_id">>,
+    range?: {
+      fromTime?: number;
+      fromPitch?: number;
+      timeSpan?: number;
+      pitchSpan?: number;
+    },
+  ) {
+    return this.sendCommand("apply_note_modifications", {
+      notes,
+      from_time: range?.fromTime,
+      from_pitch: range?.fromPitch,
+      time_span: range?.timeSpan,
+      pitch_span: range?.pitchSpan,
+    });
+  }
+
+  /**
+   * Modifies, removes, and adds notes in a single undo step.
+   * Available since Live 11.0.
+   *
+   * @returns the ids of the added notes in the same order
    */
-  applyNoteModifications(notes: NoteExtended[]) {
-    return this.sendCommand("apply_note_modifications", { notes });
+  applyNoteDelta(delta: {
+    add?: Array<
+      Partial<Omit<NoteExtended, "note_id">> &
+        Pick<NoteExtended, "pitch" | "start_time" | "duration">
+    >;
+    remove?: number[];
+    modify?: Array<Partial<NoteExtended> & Pick<NoteExtended, "note_id">>;
+  }): Promise<number[]> {
+    return this.sendCommand("apply_note_delta", delta);
   }
 
   /**
@@ -433,10 +578,15 @@ export class Clip extends Namespace<
   }
 
   /**
-   * Adds the given notes to the clip.
+   * Adds the given notes to the clip. Large amounts of notes can
+   * be passed in the columnar layout returned by `getNotesColumns`.
    */
-  setNotes(notes: Note[]): Promise<void> {
-    return this.sendCommand("set_notes", { notes: notes.map(noteToTuple) });
+  setNotes(notes: Note[] | NoteColumnsInput): Promise<void> {
+    return this.sendCommand("set_notes", {
+      notes: Array.isArray(notes)
+        ? notes.map(noteToTuple)
+        : packNoteColumns(notes),
+    });
   }
 
   /**
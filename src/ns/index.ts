@@ -1,4 +1,9 @@
-import { Ableton } from "../index.js";
+import {
+  Ableton,
+  ListenerOptions,
+  PropSubscription,
+  StreamResult,
+} from "../index.js";
 
 export class Namespace<GP, TP, SP, OP> {
   protected transformers: {
@@ -15,9 +20,17 @@ export class Namespace<GP, TP, SP, OP> {
     protected nsid?: string,
   ) {}
 
+  /**
+   * Gets the value of the given prop.
+   *
+   * @param fields For props that contain a list of Live objects, only
+   * reads the given fields of each object. The `id` is always included.
+   * Passing fields for any other prop is rejected with an error.
+   */
   async get<T extends keyof GP>(
     prop: T,
     useCache?: boolean,
+    fields?: string[],
   ): Promise<T extends keyof TP ? TP[T] : GP[T]> {
     const cache = useCache ?? !!this.cachedProps[prop];
     const res = await this.ableton.getProp(
@@ -25,6 +38,7 @@ export class Namespace<GP, TP, SP, OP> {
       this.nsid,
       String(prop),
       cache,
+      fields,
     );
 
     const transformer =
@@ -44,21 +58,40 @@ export class Namespace<GP, TP, SP, OP> {
   async addListener<T extends keyof OP>(
     prop: T,
     listener: (data: T extends keyof TP ? TP[T] : OP[T]) => any,
+    options?: ListenerOptions,
   ) {
-    const transformer =
-      this.transformers[prop as any as Extract<keyof GP, keyof TP>];
+    const subscription = this.subscription(prop, listener);
     return this.ableton.addPropListener(
       this.ns,
       this.nsid,
-      String(prop),
-      (data) => {
+      subscription.prop,
+      subscription.listener,
+      options,
+    );
+  }
+
+  /**
+   * Creates a subscription to the given prop that can be attached
+   * together with others using `Ableton.addPropListeners`.
+   */
+  subscription<T extends keyof OP>(
+    prop: T,
+    listener: (data: T extends keyof TP ? TP[T] : OP[T]) => any,
+  ): PropSubscription {
+    const transformer =
+      this.transformers[prop as any as Extract<keyof GP, keyof TP>];
+    return {
+      ns: this.ns,
+      nsid: this.nsid,
+      prop: String(prop),
+      listener: (data) => {
         if (data !== null && transformer) {
           listener(transformer(data) as any);
         } else {
           listener(data);
         }
       },
-    );
+    };
   }
 
   /**
@@ -75,6 +108,21 @@ export class Namespace<GP, TP, SP, OP> {
     });
   }
 
+  /**
+   * Sends a raw function invocation to Ableton whose result is
+   * streamed back in chunks. `onChunk` is called for every chunk.
+   */
+  protected async sendStreamCommand(
+    name: string,
+    args: { [k: string]: any } | undefined,
+    onChunk: (chunk: any) => unknown,
+  ): Promise<StreamResult> {
+    return this.ableton.sendCommand(
+      { ns: this.ns, nsid: this.nsid, name, args },
+      onChunk,
+    );
+  }
+
   /**
    * Sends a raw function invocation to Ableton and expects the
    * result to be a CacheResponse with `data` and an `etag`.
@@ -1,16 +1,148 @@
-import { Ableton } from "../index.js";
+import { Ableton, ProtocolFeature } from "../index.js";
 import { Namespace } from "./index.js";
 import { packageVersion } from "../util/package-version.js";
 import semver from "semver";
 
+export interface RegistryStats {
+  /** Total amount of objects known to the Remote Script */
+  size: number;
+  /** Objects that are kept until they're deleted in Live */
+  persistent: number;
+  /** Objects, like browser items, that are evicted when there are too many */
+  transient: number;
+  max_transient: number;
+  hits: number;
+  misses: number;
+  evictions: number;
+}
+
+export interface SendStats {
+  /** Bytes the Remote Script sends per tick, adapted to the client's feedback */
+  budget: number;
+  /** Packets waiting in the MIDI, telemetry, events, results, and bulk queues */
+  queued: [number, number, number, number, number];
+  queued_bytes: number;
+  /** Incoming messages of which some chunks are still missing */
+  partial_messages: number;
+  partial_bytes: number;
+  /** Bytes of sent frames kept for retransmission */
+  retransmit_bytes: number;
+}
+
+export interface SchedulerStats {
+  /** Time in ms the Remote Script may spend on its work per tick */
+  budget_ms: number;
+  /** Time in ms spent on background work, like browser indexing, per tick */
+  background_budget_ms: number;
+  /** Amount of ticks that took longer than the budget */
+  overruns: number;
+}
+
+export interface CommandStats {
+  count: number;
+  errors: number;
+  total_ms: number;
+  max_ms: number;
+  mean_ms: number;
+  /** Amount of commands per bucket of `latency_buckets_ms` */
+  histogram: number[];
+}
+
+export interface ScriptStats {
+  /** Seconds since the stats have been reset */
+  duration_s: number;
+  /**
+   * Upper bounds of the latency histogram buckets. The last
+   * bucket counts all commands above the largest bound.
+   */
+  latency_buckets_ms: number[];
+  /** Stats per command, keyed by `namespace.name` */
+  commands: Record<string, CommandStats>;
+  bytes_in: number;
+  packets_in: number;
+  bytes_out: number;
+  packets_out: number;
+  frames_out: number;
+  /** Compressed size of all sent frames divided by their original size */
+  compression_ratio: number | null;
+  send: SendStats;
+  scheduler: SchedulerStats;
+  registry: RegistryStats;
+  listeners: number;
+  dirty_listeners: number;
+  /** Rate-limited listeners whose latest value hasn't been sent yet */
+  held_listeners: number;
+  streams: number;
+}
+
+export interface ProfileCallSite {
+  /** File, line, and name of the function */
+  function: string;
+  calls: number;
+  /** Time spent in the function itself */
+  total_ms: number;
+  /** Time spent in the function and everything it called */
+  cumulative_ms: number;
+}
+
+export interface ProfileSummary {
+  /** Path of the pstats file written by the Remote Script */
+  path: string;
+  /** Call sites sorted by cumulative time */
+  top: ProfileCallSite[];
+}
+
+export interface ProfileStatus {
+  running: boolean;
+  commands_left: number | null;
+  seconds_left: number | null;
+  /** Summary of the last finished session */
+  summary: ProfileSummary | null;
+}
+
+export interface ProfileOptions {
+  /** Profiles the next n commands */
+  commands?: number;
+  /** Profiles everything for the given amount of seconds */
+  seconds?: number;
+  /** Amount of call sites to include in the summary */
+  limit?: number;
+}
+
+/** A numeric prop of a Live object that's sampled by the telemetry. */
+export interface TelemetryChannel {
+  ns: string;
+  /** The id of the object, can be omitted for singletons like the song */
+  nsid?: string;
+  prop: string;
+}
+
+export interface TelemetryStatus {
+  /** Amount of sampled channels, 0 if the telemetry is stopped */
+  channels: number;
+  /** Time between two samples in ms */
+  interval: number;
+  /** Sequence number of the next sample */
+  sequence: number;
+}
+
 export interface GettableProperties {
   version: string;
   ping: boolean;
+  registry_stats: RegistryStats;
+  send_stats: SendStats;
+  scheduler_stats: SchedulerStats;
+  tick_budget: number;
+  stats: ScriptStats;
+  profile: ProfileStatus;
+  telemetry: TelemetryStatus;
 }
 
 export interface TransformedProperties {}
 
-export interface SettableProperties {}
+export interface SettableProperties {
+  tick_budget: number;
+}
 
 export interface ObservableProperties {}
 
@@ -28,4 +160,84 @@ export class Internal extends Namespace<
     const pluginVersion = await this.get("version");
     return !semver.lt(pluginVersion, packageVersion);
   }
+
+  /** Resets the counters returned by `get("stats")`. */
+  async resetStats(): Promise<boolean> {
+    return this.sendCommand("reset_stats");
+  }
+
+  /**
+   * Starts profiling command handlers and listener callbacks in
+   * the Remote Script. Internal commands aren't profiled.
+   */
+  async startProfiling(options: ProfileOptions = {}): Promise<ProfileStatus> {
+    return this.sendCommand("start_profiling", options);
+  }
+
+  /** Ends the running profiling session early and returns its summary. */
+  async stopProfiling(): Promise<ProfileSummary | null> {
+    return this.sendCommand("stop_profiling");
+  }
+
+  /**
+   * Runs a profiling session and resolves with its summary once it's done.
+   * The full stats are written to a pstats file in the temp directory.
+   */
+  async profile(
+    options: ProfileOptions = {},
+    pollInterval = 250,
+  ): Promise<ProfileSummary | null> {
+    let status = await this.startProfiling(options);
+    while (status.running) {
+      await new Promise((res) => setTimeout(res, pollInterval));
+      status = await this.get("profile", false);
+    }
+    return status.summary;
+  }
+
+  /**
+   * Samples the given channels every `interval` ms and emits their values
+   * in a `telemetry` event on the Ableton instance. Each sample is sent
+   * as one binary frame, which requires the `binary` protocol feature.
+   * Replaces the channels of a previous call.
+   */
+  async startTelemetry(
+    channels: TelemetryChannel[],
+    interval = 33,
+  ): Promise<TelemetryStatus> {
+    return this.sendCommand("start_telemetry", { channels, interval });
+  }
+
+  async stopTelemetry(): Promise<boolean> {
+    return this.sendCommand("stop_telemetry");
+  }
+
+  /**
+   * Requests the given protocol features from the Remote Script.
+   * @returns the features that have been enabled
+   */
+  async negotiateFeatures(
+    features: ProtocolFeature[],
+  ): Promise<ProtocolFeature[]> {
+    return this.sendCommand("negotiate_features", { features });
+  }
+
+  /**
+   * Requests chunks of a frame again that haven't arrived.
+   * @returns false if the Remote Script doesn't have the frame anymore
+   */
+  async retransmit(messageId: number, chunks: number[]): Promise<boolean> {
+    return this.sendCommand("retransmit", {
+      message_id: messageId,
+      chunks,
+    });
+  }
+
+  /**
+   * Tells the Remote Script that frames have been lost,
+   * so it reduces the amount of data sent per tick.
+   */
+  async reportDroppedFrames(count: number): Promise<SendStats> {
+    return this.sendCommand("report_dropped_frames", { count });
+  }
 }
@@ -45,8 +45,11 @@ export class MidiMessage {
   command: MidiCommand;
   parameter1: number | null = null;
   parameter2: number | null = null;
+  time: number | null;
 
   constructor(raw: RawMidiMessage) {
+    this.time = raw.time ?? null;
+
     switch (raw.bytes.length) {
       case 0:
         throw "bytes missing from midi message";
@@ -96,6 +99,11 @@ export class MidiMessage {
 
 export interface RawMidiMessage {
   bytes: number[];
+  /**
+   * The time in seconds at which the Remote Script received the message.
+   * Only set with the `binary` protocol feature.
+   */
+  time?: number;
 }
 
 export interface GettableProperties {}
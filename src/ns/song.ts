@@ -5,6 +5,11 @@ import { CuePoint, RawCuePoint } from "./cue-point.js";
 import { SongView } from "./song-view.js";
 import { Scene, RawScene } from "./scene.js";
 import { RawDevice } from "./device.js";
+import { DeviceParameter, RawDeviceParameter } from "./device-parameter.js";
+import { RawChain } from "./chain.js";
+import { RawDrumPad } from "./drum-pad.js";
+import { RawClipSlot } from "./clip-slot.js";
+import { RawClip } from "./clip.js";
 
 export interface GettableProperties {
   appointed_device: RawDevice;
@@ -196,6 +201,70 @@ export enum RecordingQuantization {
   rec_q_thirtysecond = "rec_q_thirtysecond",
 }
 
+/** Result of each value written with `setParameterValues`. */
+export enum ParameterWriteStatus {
+  Ok = 0,
+  /** The parameter doesn't exist anymore */
+  Stale = 1,
+  /** The value is outside of the parameter's min and max */
+  OutOfRange = 2,
+  /** The parameter is disabled */
+  Disabled = 3,
+  /** Live rejected the value, or the id doesn't belong to a parameter */
+  Failed = 4,
+  /** Not written because another value of an atomic write is invalid */
+  Skipped = 5,
+}
+
+export interface SnapshotDevice extends RawDevice {
+  readonly parameters?: RawDeviceParameter[];
+  readonly chains?: SnapshotChain[];
+  readonly return_chains?: SnapshotChain[];
+  readonly drum_pads?: SnapshotDrumPad[];
+}
+
+export interface SnapshotChain extends RawChain {
+  readonly devices?: SnapshotDevice[];
+}
+
+export interface SnapshotDrumPad extends RawDrumPad {
+  readonly chains?: SnapshotChain[];
+}
+
+export interface SnapshotClipSlot extends RawClipSlot {
+  readonly clip?: RawClip;
+}
+
+export interface SnapshotMixerDevice {
+  readonly id: string;
+  readonly volume?: RawDeviceParameter;
+  readonly panning?: RawDeviceParameter;
+  readonly track_activator?: RawDeviceParameter;
+  readonly crossfader?: RawDeviceParameter;
+  readonly cue_volume?: RawDeviceParameter;
+  readonly song_tempo?: RawDeviceParameter;
+  readonly sends: RawDeviceParameter[];
+}
+
+export interface SnapshotTrack extends RawTrack {
+  readonly mixer_device?: SnapshotMixerDevice;
+  readonly clip_slots?: SnapshotClipSlot[];
+  readonly devices?: SnapshotDevice[];
+}
+
+export interface SongSnapshot {
+  tracks: SnapshotTrack[];
+  return_tracks: SnapshotTrack[];
+  master_track: SnapshotTrack | null;
+  scenes: RawScene[];
+}
+
+interface SnapshotChunk {
+  section: "tracks" | "return_tracks" | "master_track" | "scenes";
+  index: number;
+  data: any;
+}
+
 export class Song extends Namespace<
   GettableProperties,
   TransformedProperties,
@@ -277,6 +346,64 @@ export class Song extends Namespace<
     return this.sendCommand("end_undo_step");
   }
 
+  /**
+   * Writes the values of many device parameters within one tick and
+   * one undo step.
+   *
+   * @param atomic If set, nothing is written if any value is invalid
+   * @param clamp If set, values outside of a parameter's range are
+   * clamped instead of being rejected
+   * @returns a status per value in the same order
+   */
+  public async setParameterValues(
+    values: Array<[DeviceParameter | string, number]>,
+    { atomic = true, clamp = false } = {},
+  ): Promise<ParameterWriteStatus[]> {
+    return this.sendCommand("set_parameter_values", {
+      values: values.map(([param, value]) => [
+        typeof param === "string" ? param : param.raw.id,
+        value,
+      ]),
+      atomic,
+      clamp,
+    });
+  }
+
+  /**
+   * Returns a model of all tracks, return tracks, the master track,
+   * and scenes, including each track's mixer, clip slots, devices,
+   * parameters, rack chains, and drum pads, using a single request.
+   * The Remote Script streams the snapshot in chunks of one track each.
+   *
+   * @param depth How many levels of children to include below each
+   * track, e.g. `1` for devices without their parameters and chains.
+   * Includes all levels by default.
+   */
+  public async getSnapshot(depth?: number): Promise<SongSnapshot> {
+    const snapshot: SongSnapshot = {
+      tracks: [],
+      return_tracks: [],
+      master_track: null,
+      scenes: [],
+    };
+
+    await this.sendStreamCommand(
+      "get_snapshot",
+      { depth },
+      (chunk: SnapshotChunk) => {
+        if (chunk.section === "master_track") {
+          snapshot.master_track = chunk.data;
+        } else if (chunk.section === "scenes") {
+          snapshot.scenes = chunk.data;
+        } else {
+          snapshot[chunk.section][chunk.index] = chunk.data;
+        }
+      },
+    );
+
+    return snapshot;
+  }
+
   public async getData(key: string) {
     return this.sendCachedCommand("get_data", { key });
   }
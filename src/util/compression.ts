@@ -0,0 +1,51 @@
+import { unzipSync } from "zlib";
+
+/** Compression strategies, stored in bits 2-3 of the frame flags. */
+export enum CompressionStrategy {
+  Zlib = 0x00,
+  None = 0x04,
+  Fast = 0x08,
+  Dictionary = 0x0c,
+}
+
+const COMPRESSION_MASK = 0x0c;
+
+/**
+ * Preset dictionary containing fragments that recur in most JSON messages.
+ * It's only used for JSON frames, MessagePack and binary frames are sent
+ * with one of the other strategies.
+ * This has to be kept in sync with `midi-script/Compression.py`.
+ */
+export const ZDICT = Buffer.from(
+  '"velocity_deviation": 0.0, "release_velocity": 64.0, ' +
+    '"probability": 1.0, "mute": false, "note_id": ' +
+    '"is_audio_clip": false, "is_midi_clip": true, "muted": false, ' +
+    '"start_time": 0.0, "end_time": ' +
+    '"has_clip": false, "is_playing": false, "is_recording": false, ' +
+    '"is_triggered": false, "is_loadable": true, "is_selected": false, ' +
+    '"is_device": false, "is_folder": false, "source": "", "uri": "' +
+    '"type": "Device.DeviceType.audio_effect", "class_name": "' +
+    '"value": 0.0, "is_quantized": false}, ' +
+    '"is_foldable": false, "is_grouped": false}, ' +
+    '"solo": false, "mute": false, "color": 16725558, "color_index": ' +
+    '"pitch": 60, "duration": 0.25, "velocity": 100.0, ' +
+    '{"event": "result", "data": {"data": [{"id": "live_' +
+    '"etag": "' +
+    ', "name": "' +
+    '"}, {"id": "live_' +
+    '", "uuid": null}' +
+    '{"event": "result", "data": ' +
+    ', "uuid": "',
+);
+
+/** Decompresses a frame based on the compression strategy in its flags. */
+export const decompress = (data: Buffer, flags: number) => {
+  switch (flags & COMPRESSION_MASK) {
+    case CompressionStrategy.None:
+      return data;
+    case CompressionStrategy.Dictionary:
+      return unzipSync(data, { dictionary: ZDICT });
+    default:
+      return unzipSync(data);
+  }
+};
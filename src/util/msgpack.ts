@@ -0,0 +1,138 @@
+/**
+ * A minimal MessagePack decoder for the subset of types
+ * the Remote Script's encoder produces.
+ */
+class Decoder {
+  private offset = 0;
+
+  constructor(private buffer: Buffer) {}
+
+  hasMore() {
+    return this.offset < this.buffer.length;
+  }
+
+  decode(): any {
+    const type = this.buffer[this.offset++];
+
+    if (type < 0x80) {
+      return type;
+    }
+    if (type < 0x90) {
+      return this.map(type & 0x0f);
+    }
+    if (type < 0xa0) {
+      return this.array(type & 0x0f);
+    }
+    if (type < 0xc0) {
+      return this.str(type & 0x1f);
+    }
+    if (type >= 0xe0) {
+      return type - 0x100;
+    }
+
+    switch (type) {
+      case 0xc0:
+        return null;
+      case 0xc2:
+        return false;
+      case 0xc3:
+        return true;
+      case 0xc4:
+        return this.bin(this.read(1, this.buffer.readUInt8));
+      case 0xc5:
+        return this.bin(this.read(2, this.buffer.readUInt16BE));
+      case 0xc6:
+        return this.bin(this.read(4, this.buffer.readUInt32BE));
+      case 0xca:
+        return this.read(4, this.buffer.readFloatBE);
+      case 0xcb:
+        return this.read(8, this.buffer.readDoubleBE);
+      case 0xcc:
+        return this.read(1, this.buffer.readUInt8);
+      case 0xcd:
+        return this.read(2, this.buffer.readUInt16BE);
+      case 0xce:
+        return this.read(4, this.buffer.readUInt32BE);
+      case 0xcf:
+        return Number(this.read(8, this.buffer.readBigUInt64BE));
+      case 0xd0:
+        return this.read(1, this.buffer.readInt8);
+      case 0xd1:
+        return this.read(2, this.buffer.readInt16BE);
+      case 0xd2:
+        return this.read(4, this.buffer.readInt32BE);
+      case 0xd3:
+        return Number(this.read(8, this.buffer.readBigInt64BE));
+      case 0xd9:
+        return this.str(this.read(1, this.buffer.readUInt8));
+      case 0xda:
+        return this.str(this.read(2, this.buffer.readUInt16BE));
+      case 0xdb:
+        return this.str(this.read(4, this.buffer.readUInt32BE));
+      case 0xdc:
+        return this.array(this.read(2, this.buffer.readUInt16BE));
+      case 0xdd:
+        return this.array(this.read(4, this.buffer.readUInt32BE));
+      case 0xde:
+        return this.map(this.read(2, this.buffer.readUInt16BE));
+      case 0xdf:
+        return this.map(this.read(4, this.buffer.readUInt32BE));
+      default:
+        throw new Error(`Unsupported MessagePack type: 0x${type.toString(16)}`);
+    }
+  }
+
+  private read<T>(length: number, reader: (offset: number) => T): T {
+    const value = reader.call(this.buffer, this.offset);
+    this.offset += length;
+    return value;
+  }
+
+  private str(length: number) {
+    const value = this.buffer.toString(
+      "utf8",
+      this.offset,
+      this.offset + length,
+    );
+    this.offset += length;
+    return value;
+  }
+
+  private bin(length: number) {
+    const value = this.buffer.subarray(this.offset, this.offset + length);
+    this.offset += length;
+    return value;
+  }
+
+  private array(length: number) {
+    const value = new Array(length);
+    for (let i = 0; i < length; i++) {
+      value[i] = this.decode();
+    }
+    return value;
+  }
+
+  private map(length: number) {
+    const value: { [k: string]: any } = {};
+    for (let i = 0; i < length; i++) {
+      const key = this.decode();
+      value[key] = this.decode();
+    }
+    return value;
+  }
+}
+
+/** Decodes a single MessagePack-encoded value. */
+export const decode = (buffer: Buffer) => new Decoder(buffer).decode();
+
+/** Decodes all concatenated MessagePack-encoded values in the buffer. */
+export const decodeAll = (buffer: Buffer) => {
+  const decoder = new Decoder(buffer);
+  const values: any[] = [];
+
+  while (decoder.hasMore()) {
+    values.push(decoder.decode());
+  }
+
+  return values;
+};
@@ -41,3 +41,65 @@ export const noteToTuple = (note: Note): NoteTuple => [
   note.velocity,
   note.muted,
 ];
+
+/**
+ * Typed arrays of the packed columns of a note list,
+ * matching `NOTE_COLUMNS` in `midi-script/Clip.py`.
+ */
+const NOTE_COLUMN_TYPES = {
+  note_id: Uint32Array,
+  pitch: Uint8Array,
+  start_time: Float64Array,
+  duration: Float64Array,
+  velocity: Float32Array,
+  mute: Uint8Array,
+  probability: Float32Array,
+  velocity_deviation: Float32Array,
+  release_velocity: Float32Array,
+};
+
+type NoteColumnName = keyof typeof NOTE_COLUMN_TYPES;
+
+/** A list of notes with one array per property. */
+export type NoteColumns = { count: number } & {
+  [K in NoteColumnName]: ArrayLike<number>;
+};
+
+/** Notes that can be added to a clip in the columnar layout. */
+export type NoteColumnsInput = { count: number } & Pick<
+  NoteColumns,
+  "pitch" | "start_time" | "duration" | "velocity" | "mute"
+>;
+
+/**
+ * Converts packed columns to typed arrays. Columns are base64-encoded
+ * strings with JSON, and buffers with MessagePack. Packed arrays are
+ * little-endian, like the typed arrays on all common platforms.
+ */
+export const unpackNoteColumns = (packed: Record<string, any>) => {
+  const columns: Record<string, any> = { count: packed.count };
+
+  for (const [name, TypedArray] of Object.entries(NOTE_COLUMN_TYPES)) {
+    const value = packed[name];
+    const bytes =
+      typeof value === "string" ? Buffer.from(value, "base64") : value;
+    // Copies the bytes, so the typed array is properly aligned
+    columns[name] = new TypedArray(new Uint8Array(bytes).buffer);
+  }
+
+  return columns as NoteColumns;
+};
+
+/** Packs the columns needed to add notes, base64-encoded for JSON. */
+export const packNoteColumns = (notes: NoteColumnsInput) => {
+  const packed: Record<string, any> = { count: notes.count };
+  const names = ["pitch", "start_time", "duration", "velocity", "mute"];
+
+  for (const name of names as Array<keyof NoteColumnsInput>) {
+    const TypedArray = NOTE_COLUMN_TYPES[name as NoteColumnName];
+    const array = TypedArray.from(notes[name] as ArrayLike<number>);
+    packed[name] = Buffer.from(array.buffer).toString("base64");
+  }
+
+  return packed;
+};
@@ -0,0 +1,173 @@
+"""
+Loads the Remote Script outside of Live for the unit tests.
+
+Live's API is mostly used inside functions, so a Live module with
+placeholders for the enums read at import time is enough to import the
+handlers. Objects passed to them are fakes that only have the properties
+the tested code reads.
+"""
+import os
+import socket
+import struct
+import sys
+import types
+
+MIDI_SCRIPT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "midi-script")
+
+
+class LivePlaceholder(object):
+    """Stands in for Live's types, so enum members can be read at import time"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return LivePlaceholder(self.path + "." + name)
+
+    def __repr__(self):
+        return self.path
+
+
+if "Live" not in sys.modules:
+    live = types.ModuleType("Live")
+    for name in ("Song", "Track"):
+        setattr(live, name, LivePlaceholder("Live." + name))
+    sys.modules["Live"] = live
+
+# Empty base classes of Live's framework, so the control surface itself
+# can be imported. Tests create it without calling its __init__.
+if "_Framework" not in sys.modules:
+    framework = types.ModuleType("_Framework")
+    framework.__path__ = []
+    sys.modules["_Framework"] = framework
+    for name in ("ControlSurface", "SessionComponent"):
+        module = types.ModuleType("_Framework." + name)
+        setattr(module, name, type(name, (object,), {}))
+        sys.modules[module.__name__] = module
+
+# Load the Remote Script as a package without running its __init__,
+# which depends on Live's embedded modules
+if "AbletonJS" not in sys.modules:
+    package = types.ModuleType("AbletonJS")
+    package.__path__ = [MIDI_SCRIPT_PATH]
+    sys.modules["AbletonJS"] = package
+
+
+class FakeUdpSocket(object):
+    """Records sent packets and returns queued packets from recv"""
+
+    def __init__(self):
+        self.sent = []
+        self.received = []
+
+    def sendto(self, packet, addr):
+        self.sent.append(bytes(packet))
+
+    def recv(self, size):
+        if not self.received:
+            # EAGAIN on macOS, which the script expects when nothing's left
+            raise socket.error(35, "Resource temporarily unavailable")
+        return self.received.pop(0)
+
+    def close(self):
+        pass
+
+
+def make_socket(handler=None, features=(), chunk_limit=1000):
+    """Returns the script's Socket without binding a port or writing port files"""
+    from AbletonJS.Socket import Socket
+
+    Socket.show_message = staticmethod(lambda message: None)
+    init_socket, read_remote_port = Socket.init_socket, Socket.read_remote_port
+    Socket.init_socket = Socket.read_remote_port = lambda self: None
+    try:
+        sock = Socket(handler)
+    finally:
+        Socket.init_socket, Socket.read_remote_port = init_socket, read_remote_port
+
+    sock._socket = FakeUdpSocket()
+    sock._chunk_limit = chunk_limit
+    sock.set_features(features)
+    return sock
+
+
+class FakeSocket(object):
+    def __init__(self, features=()):
+        self.features = set(features)
+
+    def has_feature(self, feature):
+        return feature in self.features
+
+
+def unpackb(data):
+    """Decodes MessagePack, only used to check the script's encoder"""
+    value, offset = _unpack(data, 0)
+    if offset != len(data):
+        raise ValueError("Trailing data after offset %d" % offset)
+    return value
+
+
+def _unpack(data, offset):
+    code = data[offset]
+    offset += 1
+
+    if code <= 0x7f:
+        return code, offset
+    if code >= 0xe0:
+        return code - 0x100, offset
+    if 0x80 <= code <= 0x8f:
+        return _unpack_map(data, offset, code & 0x0f)
+    if 0x90 <= code <= 0x9f:
+        return _unpack_array(data, offset, code & 0x0f)
+    if 0xa0 <= code <= 0xbf:
+        return _unpack_str(data, offset, code & 0x1f)
+    if code == 0xc0:
+        return None, offset
+    if code == 0xc2:
+        return False, offset
+    if code == 0xc3:
+        return True, offset
+
+    fixed = {0xca: ">f", 0xcb: ">d", 0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q",
+             0xd0: ">b", 0xd1: ">h", 0xd2: ">i", 0xd3: ">q"}
+    if code in fixed:
+        size = struct.calcsize(fixed[code])
+        return struct.unpack_from(fixed[code], data, offset)[0], offset + size
+
+    lengths = {0xc4: ">B", 0xc5: ">H", 0xc6: ">I", 0xd9: ">B", 0xda: ">H",
+               0xdb: ">I", 0xdc: ">H", 0xdd: ">I", 0xde: ">H", 0xdf: ">I"}
+    if code in lengths:
+        length = struct.unpack_from(lengths[code], data, offset)[0]
+        offset += struct.calcsize(lengths[code])
+        if code in (0xc4, 0xc5, 0xc6):
+            return bytes(data[offset:offset + length]), offset + length
+        if code in (0xd9, 0xda, 0xdb):
+            return _unpack_str(data, offset, length)
+        if code in (0xdc, 0xdd):
+            return _unpack_array(data, offset, length)
+        return _unpack_map(data, offset, length)
+
+    raise ValueError("Unsupported type 0x%02x" % code)
+
+
+def _unpack_str(data, offset, length):
+    return data[offset:offset + length].decode("utf8"), offset + length
+
+
+def _unpack_array(data, offset, length):
+    values = []
+    for _ in range(length):
+        value, offset = _unpack(data, offset)
+        values.append(value)
+    return values, offset
+
+
+def _unpack_map(data, offset, length):
+    values = {}
+    for _ in range(length):
+        key, offset = _unpack(data, offset)
+        values[key], offset = _unpack(data, offset)
+    return values, offset
@@ -0,0 +1,70 @@
+import unittest
+
+from helpers import make_socket
+
+from AbletonJS.AbletonJS import AbletonJS
+from AbletonJS.Interface import Interface
+
+
+class Echo(Interface):
+    def get_ns(self, nsid):
+        return None
+
+    def echo(self, ns, value):
+        return value
+
+    def fail(self, ns):
+        raise ValueError("Failed")
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        self.socket = make_socket()
+        send = self.socket.send
+
+        def record(name, obj=None, uuid=None, **kwargs):
+            self.sent.append((name, obj, uuid))
+            return send(name, obj, uuid, **kwargs)
+
+        self.socket.send = record
+
+        # The control surface's __init__ needs Live, only the handlers are used
+        self.surface = AbletonJS.__new__(AbletonJS)
+        self.surface.socket = self.socket
+        self.surface.handlers = {"echo": Echo(None, self.socket)}
+
+    def command(self, uuid, name, args=None, ns="echo"):
+        return {"uuid": uuid, "ns": ns, "name": name, "args": args or {}}
+
+    def test_results_are_sent_as_one_response(self):
+        self.surface.command_handler({"uuid": "batch", "ns": "batch", "commands": [
+            self.command("a", "echo", {"value": 1}),
+            self.command("b", "fail"),
+            self.command("c", "echo", ns="unknown"),
+            {"uuid": "d", "ns": "batch", "commands": []},
+            self.command("e", "echo", {"value": [2, 3]}),
+        ]})
+
+        name, results, uuid = self.sent[-1]
+        self.assertEqual((name, uuid), ("batch", "batch"))
+        self.assertEqual([(result["uuid"], result["event"]) for result in results], [
+            ("a", "result"), ("b", "error"), ("c", "error"), ("d", "error"), ("e", "result")])
+        self.assertEqual(results[0]["data"], 1)
+        self.assertEqual(results[1]["data"], "Failed")
+        self.assertEqual(results[3]["data"], "Batches can't be nested")
+        self.assertEqual(results[4]["data"], [2, 3])
+        # The results are only sent as part of the batch
+        self.assertEqual([len(queue) for queue in self.socket._send_queues], [0, 0, 0, 1, 0])
+
+    def test_commands_after_a_batch_are_sent_on_their_own(self):
+        self.surface.command_handler({"uuid": "batch", "ns": "batch", "commands": [
+            self.command("a", "echo", {"value": 1})]})
+        self.surface.command_handler(self.command("b", "echo", {"value": 2}))
+
+        self.assertIsNone(self.socket._batch)
+        self.assertEqual(self.sent[-1], ("result", 2, "b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import helpers  # noqa: F401
+
+from AbletonJS.BrowserIndex import BrowserIndex, ROOTS
+
+
+class FakeItem(object):
+    def __init__(self, name, children=None, is_device=False):
+        self.name = name
+        self.uri = u"query:" + name
+        self.children = children or []
+        self.is_folder = children is not None and not is_device
+        self.is_device = is_device
+        self.is_loadable = children is None or is_device
+
+
+class FakeBrowser(object):
+    def __init__(self):
+        for root in ROOTS:
+            setattr(self, root, FakeItem(root, []))
+        self.user_folders = []
+
+
+class FakeApplication(object):
+    def __init__(self):
+        self.browser = FakeBrowser()
+
+
+def make_browser():
+    application = FakeApplication()
+    browser = application.browser
+    browser.drums.children = [
+        FakeItem(u"Kits", [FakeItem(u"808 Core Kit.adg"), FakeItem(u"909 Core Kit.adg")]),
+        FakeItem(u"Drum Rack", [FakeItem(u"Kick 808.adg")], is_device=True),
+    ]
+    browser.samples.children = [
+        FakeItem(u"Loops", [FakeItem(u"AC/DC Riff.wav"), FakeItem(u"Kick Loop.wav")]),
+    ]
+    return application
+
+
+class BrowserIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def make_index(self, application):
+        index = BrowserIndex(application)
+        index.get_cache_path = lambda: os.path.join(self.dir, "index.jsonl")
+        return index
+
+    def build(self, index):
+        # Starts building without any time left in the tick
+        index.run(0)
+        for _ in index._job:
+            pass
+        index._job = None
+
+    def test_search(self):
+        index = self.make_index(make_browser())
+        self.build(index)
+
+        results = index.search(u"kick")
+        # Shorter paths come first
+        self.assertEqual([result["name"] for result in results],
+                         [u"Kick Loop.wav", u"Kick 808.adg"])
+        self.assertEqual(results[1]["path"], [u"drums", u"Drum Rack", u"Kick 808.adg"])
+        self.assertEqual(results[1]["root"], u"drums")
+        # Names starting with the query come before names containing it
+        self.assertEqual([result["name"] for result in index.search(u"808")],
+                         [u"808 Core Kit.adg", u"Kick 808.adg"])
+
+        # All words have to be in the path, in any order
+        self.assertEqual([result["name"] for result in index.search(u"core drums 909")],
+                         [u"909 Core Kit.adg"])
+        self.assertEqual(len(index.search(u"kit", limit=1)), 1)
+        self.assertEqual(index.search(u"missing"), [])
+
+    def test_resolve(self):
+        application = make_browser()
+        index = self.make_index(application)
+        self.build(index)
+
+        for result in index.search(u"riff") + index.search(u"808 core"):
+            self.assertEqual(index.resolve(result["path"]).uri, result["uri"])
+
+        self.assertIsNone(index.resolve([u"samples", u"Loops", u"Missing.wav"]))
+        self.assertIsNone(index.resolve([u"unknown"]))
+        self.assertRaises(ValueError, index.resolve, u"samples/Loops")
+
+    def test_cache_round_trip(self):
+        application = make_browser()
+        index = self.make_index(application)
+        self.build(index)
+        self.assertTrue(os.path.exists(index.get_cache_path()))
+
+        cached = self.make_index(application)
+        for _ in cached.load_cache():
+            pass
+        self.assertEqual(cached.roots, index.roots)
+        self.assertEqual(cached.search(u"riff"), index.search(u"riff"))
+
+    def test_cache_is_written_in_chunks(self):
+        application = make_browser()
+        application.browser.sounds.children = [FakeItem(u"Sound %d" % i) for i in range(1200)]
+        index = self.make_index(application)
+        self.build(index)
+
+        with open(index.get_cache_path()) as f:
+            lines = f.readlines()
+        # Format, a header per root, and three chunks of sounds
+        self.assertEqual(len(lines), 1 + len(ROOTS) + 1 + 1 + 3)
+
+        cached = self.make_index(application)
+        self.assertEqual(len(list(cached.load_cache())), 5)
+        self.assertEqual(len(cached.roots["sounds"]["items"]), 1200)
+
+    def test_only_changed_roots_are_indexed_on_startup(self):
+        application = make_browser()
+        self.build(self.make_index(application))
+        application.browser.samples.children.append(FakeItem(u"New.wav"))
+
+        index = self.make_index(application)
+        index.run(0)
+        while not index._cache_loaded:
+            next(index._job)
+        # The cache is searchable before the roots have been indexed again
+        self.assertEqual(len(index.search(u"riff")), 1)
+
+        while index._current is None:
+            next(index._job)
+        self.assertEqual(index.get_status()["pending_roots"], [u"samples"])
+        self.build(index)
+        self.assertEqual(len(index.search(u"new")), 1)
+
+    def test_nested_changes_need_a_refresh(self):
+        application = make_browser()
+        self.build(self.make_index(application))
+
+        # Only a nested folder changes, so the root's signature stays the same
+        application.browser.samples.children[0].children.append(FakeItem(u"Snare.wav"))
+
+        index = self.make_index(application)
+        self.build(index)
+        self.assertEqual(index.search(u"snare"), [])
+
+        index.refresh([u"samples"])
+        self.build(index)
+        self.assertEqual([result["name"] for result in index.search(u"snare")], [u"Snare.wav"])
+
+        cached = self.make_index(application)
+        for _ in cached.load_cache():
+            pass
+        self.assertEqual(len(cached.search(u"snare")), 1)
+
+    def test_refresh_keeps_other_roots(self):
+        application = make_browser()
+        self.build(self.make_index(application))
+        application.browser.drums.children.append(FakeItem(u"Clap.adg"))
+
+        index = self.make_index(application)
+        self.assertEqual(index.refresh([u"drums"])["pending_roots"], [u"drums"])
+        while index._current != u"drums":
+            next(index._job)
+
+        self.assertEqual(len(index.search(u"riff")), 1)
+        self.build(index)
+        self.assertEqual(len(index.search(u"riff")), 1)
+        self.assertEqual(len(index.search(u"clap")), 1)
+
+    def test_failed_roots_are_skipped(self):
+        application = make_browser()
+        del application.browser.clips
+        index = self.make_index(application)
+        self.build(index)
+
+        self.assertEqual(index.state, "ready")
+        self.assertNotIn(u"clips", index.roots)
+        self.assertEqual(len(index.search(u"kick")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,303 @@
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from helpers import FakeSocket
+
+from AbletonJS.Clip import Clip, NOTE_COLUMNS
+
+
+class FakeNote(object):
+    def __init__(self, note_id, pitch, start_time, duration=0.25, velocity=100.0, mute=False):
+        self.note_id = note_id
+        self.pitch = pitch
+        self.start_time = start_time
+        self.duration = duration
+        self.velocity = velocity
+        self.mute = mute
+        self.probability = 1.0
+        self.velocity_deviation = 0.0
+        self.release_velocity = 64.0
+
+
+class FakeClip(object):
+    def __init__(self, notes):
+        self.notes = notes
+        self.added = None
+        self.notes_listeners = []
+        self.fetches = 0
+        self.ranges = []
+
+    def get_notes_extended(self, from_pitch, pitch_span, from_time, time_span):
+        self.fetches += 1
+        self.ranges.append((from_pitch, pitch_span, from_time, time_span))
+        return [note for note in self.notes
+                if from_pitch <= note.pitch < from_pitch + pitch_span
+                and from_time <= note.start_time < from_time + time_span]
+
+    def set_notes(self, notes):
+        self.added = notes
+
+    def apply_note_modifications(self, notes):
+        # The notes are modified in place, but Live reports the change anyway
+        self.change_notes(self.notes)
+
+    def remove_notes_by_id(self, note_ids):
+        self.change_notes([note for note in self.notes if note.note_id not in note_ids])
+
+    def add_new_notes(self, specifications):
+        first_id = max([note.note_id for note in self.notes] + [0]) + 1
+        added = [FakeNote(first_id + i, spec.pitch, spec.start_time, spec.duration)
+                 for i, spec in enumerate(specifications)]
+        self.change_notes(self.notes + added)
+        return tuple(note.note_id for note in added)
+
+    def add_notes_listener(self, fn):
+        self.notes_listeners.append(fn)
+
+    def remove_notes_listener(self, fn):
+        self.notes_listeners.remove(fn)
+
+    def change_notes(self, notes):
+        self.notes = notes
+        for fn in list(self.notes_listeners):
+            fn()
+
+
+class FakeNoteSpecification(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeSong(object):
+    def __init__(self):
+        self.undo_steps = []
+
+    def begin_undo_step(self):
+        self.undo_steps.append("begin")
+
+    def end_undo_step(self):
+        self.undo_steps.append("end")
+
+
+class FakeControlSurface(object):
+    def __init__(self):
+        self._song = FakeSong()
+
+    def song(self):
+        return self._song
+
+
+def make_notes(count):
+    return [FakeNote(i + 1, 36 + i % 48, (i * 7 % 64) * 0.25, 0.25 + i % 4 * 0.25,
+                     float(60 + i % 60), i % 5 == 0) for i in range(count)]
+
+
+class NoteColumnsTest(unittest.TestCase):
+    def setUp(self):
+        self.notes = make_notes(100)
+        self.clip = FakeClip(self.notes)
+
+    def assertColumns(self, columns):
+        self.assertEqual(columns["count"], len(self.notes))
+        for field, _ in NOTE_COLUMNS:
+            self.assertEqual(list(columns[field]),
+                             [getattr(note, field) for note in self.notes])
+
+    def test_columns(self):
+        handler = Clip(None, FakeSocket())
+        columns = handler.get_notes_extended(self.clip, layout="columns")
+        self.assertColumns(columns)
+
+    def test_packed_columns_with_json(self):
+        handler = Clip(None, FakeSocket())
+        packed = handler.get_notes_extended(self.clip, layout="packed")
+        self.assertIsInstance(packed["pitch"], str)
+
+        types = dict(NOTE_COLUMNS)
+        columns = dict((field, Clip.read_note_column(packed, field, types[field]))
+                       for field in types)
+        columns["count"] = packed["count"]
+        self.assertColumns(columns)
+
+    def test_packed_columns_with_msgpack(self):
+        handler = Clip(None, FakeSocket(["msgpack"]))
+        packed = handler.get_notes_extended(self.clip, layout="packed")
+        self.assertIsInstance(packed["pitch"], bytes)
+        self.assertEqual(len(packed["start_time"]), 8 * len(self.notes))
+
+    def test_set_notes_from_columns(self):
+        handler = Clip(None, FakeSocket())
+        expected = tuple((note.pitch, note.start_time, note.duration, note.velocity, note.mute)
+                         for note in self.notes)
+
+        for layout in ("columns", "packed"):
+            columns = handler.get_notes_extended(self.clip, layout=layout)
+            handler.set_notes(self.clip, columns)
+            self.assertEqual(self.clip.added, expected)
+
+    def test_empty_clip(self):
+        handler = Clip(None, FakeSocket())
+        packed = handler.get_notes_extended(FakeClip([]), layout="packed")
+        self.assertEqual(packed["count"], 0)
+        handler.set_notes(self.clip, packed)
+        self.assertEqual(self.clip.added, ())
+
+
+class NoteIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.clip = FakeClip(make_notes(100))
+        self.handler = Clip(None, FakeSocket())
+
+    def test_modifications_only_fetch_the_indexed_range(self):
+        self.handler.index_notes(self.clip)
+        note_5, note_6 = self.clip.notes[4], self.clip.notes[5]
+        expected_range = (note_5.pitch, note_6.pitch - note_5.pitch + 1,
+                          min(note_5.start_time, note_6.start_time), mock.ANY)
+
+        self.handler.apply_note_modifications(
+            self.clip, [{"note_id": 5, "velocity": 10.0}, {"note_id": 6, "pitch": 100}])
+
+        self.assertEqual(note_5.velocity, 10.0)
+        self.assertEqual(self.clip.ranges[-1], expected_range)
+        # The handler's own change is tracked in the index
+        self.assertEqual(self.handler.get_note_index(self.clip)[6], (100, note_6.start_time))
+
+    def test_unknown_notes_are_indexed_again(self):
+        self.handler.index_notes(self.clip)
+        self.clip.notes.append(FakeNote(1000, 60, 1.0))
+
+        self.handler.apply_note_modifications(self.clip, [{"note_id": 1000, "mute": True}])
+        self.assertTrue(self.clip.notes[-1].mute)
+        self.assertEqual(self.clip.fetches, 2)
+        self.assertIn(1000, self.handler.get_note_index(self.clip))
+
+    def test_other_changes_drop_the_index(self):
+        self.handler.index_notes(self.clip)
+        self.clip.change_notes(self.clip.notes[1:])
+
+        self.assertIsNone(self.handler.get_note_index(self.clip))
+        self.assertEqual(self.clip.notes_listeners, [])
+
+    def test_clear_note_indexes_removes_the_listeners(self):
+        clips = [FakeClip(make_notes(10)) for _ in range(3)]
+        for clip in clips:
+            self.handler.index_notes(clip)
+
+        self.handler.clear_note_indexes()
+        self.assertEqual(len(self.handler.note_indexes), 0)
+        self.assertEqual([clip.notes_listeners for clip in clips], [[], [], []])
+
+
+@mock.patch("Live.Clip", mock.Mock(MidiNoteSpecification=FakeNoteSpecification), create=True)
+class NoteDeltaTest(unittest.TestCase):
+    def setUp(self):
+        self.clip = FakeClip(make_notes(20))
+        self.c_instance = FakeControlSurface()
+        self.handler = Clip(self.c_instance, FakeSocket())
+
+    def test_delta_is_one_undo_step(self):
+        self.handler.index_notes(self.clip)
+        added = self.handler.apply_note_delta(
+            self.clip,
+            add=[{"pitch": 60, "start_time": 4, "duration": 1, "velocity": 90.0},
+                 {"pitch": 62, "start_time": 5, "duration": 1}],
+            remove=[1, 2],
+            modify=[{"note_id": 3, "velocity": 1.0}])
+
+        self.assertEqual(added, [21, 22])
+        self.assertEqual(self.c_instance.song().undo_steps, ["begin", "end"])
+        notes = dict((note.note_id, note) for note in self.clip.notes)
+        self.assertEqual(sorted(notes), list(range(3, 23)))
+        self.assertEqual(notes[3].velocity, 1.0)
+        self.assertEqual((notes[21].pitch, notes[21].start_time), (60, 4))
+
+        # The handler's own changes are tracked in the index
+        index = self.handler.get_note_index(self.clip)
+        self.assertEqual(sorted(index), list(range(3, 23)))
+        self.assertEqual(index[22], (62, 5))
+
+    def test_index_rebuilt_by_modifications_is_updated(self):
+        self.handler.index_notes(self.clip)
+        # A note the index doesn't know yet makes the modification index the notes again
+        self.clip.notes.append(FakeNote(100, 70, 2.0))
+
+        added = self.handler.apply_note_delta(
+            self.clip, add=[{"pitch": 60, "start_time": 4, "duration": 1}],
+            remove=[1], modify=[{"note_id": 100, "velocity": 1.0}])
+
+        index = self.handler.get_note_index(self.clip)
+        self.assertNotIn(1, index)
+        self.assertIn(100, index)
+        self.assertEqual(index[added[0]], (60, 4))
+
+    def test_delta_without_index(self):
+        added = self.handler.apply_note_delta(self.clip, remove=[1])
+        self.assertEqual(added, [])
+        self.assertEqual(len(self.clip.notes), 19)
+        self.assertIsNone(self.handler.get_note_index(self.clip))
+
+
+class NotesPageTest(unittest.TestCase):
+    def setUp(self):
+        self.clip = FakeClip(make_notes(250))
+        self.handler = Clip(None, FakeSocket())
+
+    def read_pages(self, limit, between_pages=None):
+        pages = []
+        cursor = None
+        while True:
+            page = self.handler.get_notes_page(self.clip, cursor, limit)
+            pages.append(page)
+            cursor = page["next"]
+            if cursor is None:
+                return pages
+            if between_pages:
+                between_pages(len(pages))
+
+    def test_pages_are_sorted_and_complete(self):
+        pages = self.read_pages(100)
+        notes = [note for page in pages for note in page["notes"]]
+
+        self.assertEqual([len(page["notes"]) for page in pages], [100, 100, 50])
+        self.assertEqual(len(set(note["note_id"] for note in notes)), 250)
+        keys = [(note["start_time"], note["pitch"], note["note_id"]) for note in notes]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_notes_are_only_read_once(self):
+        self.read_pages(10)
+        self.assertEqual(self.clip.fetches, 1)
+        # The snapshot is released after the last page
+        self.assertEqual(self.handler.note_indexes[id(self.clip)].get("snapshot"), None)
+
+    def test_limit_must_be_positive(self):
+        for limit in (0, -1):
+            with self.assertRaises(ValueError):
+                self.handler.get_notes_page(self.clip, None, limit)
+        self.assertEqual(self.clip.fetches, 0)
+
+    def test_changes_between_pages(self):
+        removed = set()
+
+        def change(page_count):
+            # Remove notes on both sides of the cursor and add one before it
+            removed.update(note.note_id for note in self.clip.notes
+                           if note.note_id % 10 == page_count)
+            self.clip.change_notes(
+                [note for note in self.clip.notes if note.note_id not in removed] +
+                [FakeNote(1000 + page_count, 60, 0.0)])
+
+        pages = self.read_pages(100, change)
+        ids = [note["note_id"] for page in pages for note in page["notes"]]
+
+        self.assertEqual(len(ids), len(set(ids)))
+        # Every note that existed throughout is returned exactly once
+        self.assertTrue((set(range(1, 251)) - removed).issubset(ids))
+        self.assertEqual(self.clip.fetches, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import json
+import unittest
+import zlib
+
+import helpers  # noqa: F401
+
+from AbletonJS import Compression
+
+
+def decompress(strategy, data):
+    if strategy == Compression.COMPRESSION_NONE:
+        return data
+    if strategy == Compression.COMPRESSION_DICT:
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS, Compression.ZDICT)
+        return decompressor.decompress(data) + decompressor.flush()
+    return zlib.decompress(data)
+
+
+def result(data):
+    return json.dumps({"event": "result", "data": data, "uuid": "a20f25a0"}).encode("utf8")
+
+
+class CompressionTest(unittest.TestCase):
+    def assertStrategy(self, data, expected, dictionary=True):
+        strategy, compressed = Compression.compress(data, dictionary)
+        self.assertEqual(strategy, expected)
+        self.assertEqual(decompress(strategy, compressed), data)
+        return compressed
+
+    def test_small_payloads_are_sent_as_is(self):
+        self.assertStrategy(result(0.5), Compression.COMPRESSION_NONE)
+
+    def test_large_payloads_use_the_fast_level(self):
+        data = result([{"name": "Track %d" % i, "mute": False} for i in range(5000)])
+        self.assertGreater(len(data), Compression.FAST_THRESHOLD)
+        self.assertStrategy(data, Compression.COMPRESSION_FAST)
+
+    def test_json_payloads_use_the_dictionary(self):
+        data = result([{"pitch": 60, "duration": 0.25, "velocity": 100.0,
+                        "mute": False, "probability": 1.0}] * 4)
+        compressed = self.assertStrategy(data, Compression.COMPRESSION_DICT)
+        self.assertLess(len(compressed), len(zlib.compress(data)))
+
+    def test_other_payloads_skip_the_dictionary(self):
+        data = bytes(bytearray(range(256)))
+        self.assertStrategy(data, Compression.COMPRESSION_ZLIB, dictionary=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+from helpers import make_socket
+
+from AbletonJS.Interface import Interface
+
+
+class FakeItem(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeContainer(object):
+    def __init__(self):
+        self.tempo = 120.0
+        self.items = [FakeItem("a"), FakeItem("b")]
+        self.listeners = {}
+
+    def add_tempo_listener(self, fn):
+        self.listeners["tempo"] = fn
+
+    def add_items_listener(self, fn):
+        self.listeners["items"] = fn
+
+    def change(self, prop, value):
+        setattr(self, prop, value)
+        self.listeners[prop]()
+
+
+class Container(Interface):
+    def __init__(self, c_instance, socket):
+        super(Container, self).__init__(c_instance, socket)
+        self.reads = 0
+
+    def get_items(self, ns, fields=None):
+        self.reads += 1
+        return [dict((field, item.name) for field in fields or ["name"]) for item in ns.items]
+
+
+class EtagMemoTest(unittest.TestCase):
+    def setUp(self):
+        self.container = FakeContainer()
+        Interface.obj_ids.add("live_1", self.container)
+        self.addCleanup(Interface.listeners.clear)
+        self.sent = []
+        socket = make_socket()
+        socket.send = lambda name, obj=None, uuid=None, **kwargs: self.sent.append(obj)
+        self.handler = Container(None, socket)
+
+    def get_prop(self, args, etag=None):
+        self.handler.run_command({"uuid": "u", "ns": "container", "nsid": "live_1",
+                                  "name": "get_prop", "args": args, "cache": True, "etag": etag})
+        # Encoded results keep the value they were encoded from
+        return getattr(self.sent[-1], "value", self.sent[-1])
+
+    def test_plain_props(self):
+        self.handler.add_listener(self.container, "tempo", "e1", nsid="live_1")
+        etag = self.get_prop({"prop": "tempo"})["etag"]
+
+        self.container.tempo = 100.0
+        # The listener hasn't fired, so the memoized etag is still valid
+        self.assertEqual(self.get_prop({"prop": "tempo"}, etag), {"__cached": True})
+
+        self.container.change("tempo", 90.0)
+        self.assertEqual(self.get_prop({"prop": "tempo"}, etag)["data"], 90.0)
+
+    def test_getters_are_memoized_per_arguments(self):
+        self.handler.add_listener(self.container, "items", "e1", nsid="live_1")
+        etag = self.get_prop({"prop": "items"})["etag"]
+        projected = self.get_prop({"prop": "items", "fields": ["name"]})["etag"]
+        self.assertEqual(self.handler.reads, 2)
+
+        self.assertEqual(self.get_prop({"prop": "items"}, etag), {"__cached": True})
+        self.assertEqual(self.get_prop({"prop": "items", "fields": ["name"]}, projected),
+                         {"__cached": True})
+        self.assertEqual(self.handler.reads, 2)
+
+        # Another projection isn't answered from the memo of the first one
+        self.get_prop({"prop": "items", "fields": ["name", "id"]}, projected)
+        self.assertEqual(self.handler.reads, 3)
+
+    def test_getters_are_read_again_once_the_listener_fires(self):
+        self.handler.add_listener(self.container, "items", "e1", nsid="live_1")
+        etag = self.get_prop({"prop": "items"})["etag"]
+
+        self.container.change("items", [FakeItem("c")])
+        self.assertEqual(self.get_prop({"prop": "items"}, etag)["data"], [{"name": "c"}])
+        # Once to send the listener event, and once for the request
+        self.assertEqual(self.handler.reads, 3)
+
+    def test_props_without_listener_are_read(self):
+        etag = self.get_prop({"prop": "items"})["etag"]
+        self.assertEqual(self.get_prop({"prop": "items"}, etag), {"__cached": True})
+        self.assertEqual(self.handler.reads, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
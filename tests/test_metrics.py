@@ -0,0 +1,52 @@
+import unittest
+
+import helpers  # noqa: F401
+
+from AbletonJS.Metrics import LATENCY_BUCKETS_MS, Metrics
+
+
+class MetricsTest(unittest.TestCase):
+    def test_command_stats(self):
+        metrics = Metrics()
+        metrics.record_command("song.get_prop", 0.2)
+        metrics.record_command("song.get_prop", 3.0, error=True)
+        metrics.record_command("song.get_prop", 5000.0)
+
+        stats = metrics.get_stats()["commands"]["song.get_prop"]
+        self.assertEqual(stats["count"], 3)
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["max_ms"], 5000.0)
+        self.assertAlmostEqual(stats["mean_ms"], 5003.2 / 3)
+        self.assertEqual(len(stats["histogram"]), len(LATENCY_BUCKETS_MS) + 1)
+        # Bounds are inclusive, and the last bucket counts everything above them
+        self.assertEqual(stats["histogram"][0], 1)
+        self.assertEqual(stats["histogram"][LATENCY_BUCKETS_MS.index(5)], 1)
+        self.assertEqual(stats["histogram"][-1], 1)
+
+    def test_traffic(self):
+        metrics = Metrics()
+        self.assertIsNone(metrics.get_stats()["compression_ratio"])
+
+        metrics.record_packet_in(100)
+        metrics.record_packet_out(40)
+        metrics.record_frame_out(200, 50)
+
+        stats = metrics.get_stats()
+        self.assertEqual((stats["packets_in"], stats["bytes_in"]), (1, 100))
+        self.assertEqual((stats["packets_out"], stats["bytes_out"]), (1, 40))
+        self.assertEqual(stats["frames_out"], 1)
+        self.assertEqual(stats["compression_ratio"], 0.25)
+
+    def test_reset(self):
+        metrics = Metrics()
+        metrics.record_command("song.get_prop", 1.0)
+        metrics.record_packet_in(100)
+        metrics.reset()
+
+        stats = metrics.get_stats()
+        self.assertEqual(stats["commands"], {})
+        self.assertEqual(stats["bytes_in"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
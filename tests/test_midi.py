@@ -0,0 +1,118 @@
+import struct
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from helpers import FakeSocket
+
+from AbletonJS.Midi import Midi, MIDI_FRAME
+from AbletonJS.Socket import LANE_MIDI
+
+
+class RecordingSocket(FakeSocket):
+    def __init__(self, features=("binary",)):
+        super(RecordingSocket, self).__init__(features)
+        self.frames = []
+        self.sent = []
+
+    def send_binary(self, data, lane, immediate=False):
+        self.frames.append((data, lane, immediate))
+
+    def send(self, name, obj=None, uuid=None, immediate=False, lane=None):
+        self.sent.append((name, obj, lane))
+
+
+def parse_frame(data):
+    kind, id_length, count, start = struct.unpack_from(">BBHd", data)
+    offset = struct.calcsize(">BBHd")
+    event_id = data[offset:offset + id_length].decode("utf8")
+    offset += id_length
+
+    messages = []
+    for _ in range(count):
+        time_offset, length = struct.unpack_from(">IH", data, offset)
+        offset += struct.calcsize(">IH")
+        messages.append((time_offset, list(bytearray(data[offset:offset + length]))))
+        offset += length
+
+    return kind, event_id, start, messages
+
+
+class MidiTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 10.0
+        patcher = mock.patch("AbletonJS.Midi.time.time", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_midi(self, features=("binary",), **options):
+        socket = RecordingSocket(features)
+        midi = Midi(None, socket, set(), lambda: None)
+        midi.add_listener(midi, "midi", "midi-event", **options)
+        return midi, socket
+
+    def receive(self, midi, *messages):
+        for message in messages:
+            midi.send_midi(message)
+            self.now += 0.0015
+
+    def test_messages_are_sent_in_one_frame_per_tick(self):
+        midi, socket = self.make_midi()
+        self.receive(midi, (0x90, 60, 100), (0xB0, 1, 64), (0x80, 60, 0))
+        self.assertEqual(socket.frames, [])
+
+        midi.flush_midi()
+        midi.flush_midi()
+
+        self.assertEqual(len(socket.frames), 1)
+        data, lane, immediate = socket.frames[0]
+        self.assertEqual((lane, immediate), (LANE_MIDI, False))
+        self.assertEqual(parse_frame(data), (MIDI_FRAME, "midi-event", 10.0, [
+            (0, [0x90, 60, 100]), (1500, [0xB0, 1, 64]), (3000, [0x80, 60, 0])]))
+
+    def test_continuous_messages_are_coalesced(self):
+        midi, socket = self.make_midi(coalesce=True)
+        self.receive(midi, (0xB0, 1, 10), (0xB0, 2, 10), (0x90, 60, 100), (0xB0, 1, 20),
+                     (0xE0, 0, 64), (0xE0, 0, 70), (0xB1, 1, 30), (0x90, 60, 100))
+        midi.flush_midi()
+
+        _, _, _, messages = parse_frame(socket.frames[0][0])
+        # The latest value keeps the position of the first message
+        self.assertEqual([message for _, message in messages], [
+            [0xB0, 1, 20], [0xB0, 2, 10], [0x90, 60, 100], [0xE0, 0, 70],
+            [0xB1, 1, 30], [0x90, 60, 100]])
+        # ...and its own time, which is 3 ms after the CC that was second
+        self.assertEqual(messages[0][0] - messages[1][0], 3000)
+
+    def test_notes_can_be_sent_immediately(self):
+        midi, socket = self.make_midi(immediate_notes=True)
+        self.receive(midi, (0xB0, 1, 10))
+        self.assertEqual(socket.frames, [])
+
+        self.receive(midi, (0x90, 60, 100))
+        data, _, immediate = socket.frames[0]
+        self.assertTrue(immediate)
+        self.assertEqual(len(parse_frame(data)[3]), 2)
+
+    def test_messages_are_sent_as_events_without_binary_frames(self):
+        midi, socket = self.make_midi(features=())
+        self.receive(midi, (0x90, 60, 100))
+        midi.flush_midi()
+
+        self.assertEqual(socket.frames, [])
+        self.assertEqual(socket.sent, [("midi-event", {"bytes": (0x90, 60, 100)}, LANE_MIDI)])
+
+    def test_removing_the_listener_drops_buffered_messages(self):
+        midi, socket = self.make_midi()
+        self.receive(midi, (0x90, 60, 100))
+        midi.remove_midi_listener(None)
+        midi.flush_midi()
+
+        self.assertEqual(socket.frames, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
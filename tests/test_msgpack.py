@@ -0,0 +1,80 @@
+import unittest
+
+from helpers import unpackb
+
+from AbletonJS import MsgPack
+
+
+class MsgPackTest(unittest.TestCase):
+    def assertRoundTrip(self, value, expected=None):
+        self.assertEqual(unpackb(MsgPack.packb(value)),
+                         value if expected is None else expected)
+
+    def test_scalars(self):
+        for value in (None, True, False, 0, 1, -1, 0.5, -1e300, u"", u"abc"):
+            self.assertRoundTrip(value)
+
+    def test_int_boundaries(self):
+        for value in (0x7f, 0x80, 0xff, 0x100, 0xffff, 0x10000, 0xffffffff,
+                      0x100000000, 0xffffffffffffffff, -0x20, -0x21, -0x80,
+                      -0x81, -0x8000, -0x8001, -0x80000000, -0x80000001,
+                      -0x8000000000000000):
+            self.assertRoundTrip(value)
+
+    def test_int_sizes(self):
+        self.assertEqual(len(MsgPack.packb(0x7f)), 1)
+        self.assertEqual(len(MsgPack.packb(-0x20)), 1)
+        self.assertEqual(len(MsgPack.packb(0xff)), 2)
+        self.assertEqual(len(MsgPack.packb(0xffffffffffffffff)), 9)
+
+    def test_ints_out_of_range_become_floats(self):
+        self.assertRoundTrip(2 ** 64, float(2 ** 64))
+        self.assertRoundTrip(-2 ** 63 - 1, float(-2 ** 63 - 1))
+
+    def test_strings(self):
+        for length in (31, 32, 0xff, 0x100, 0x10000):
+            self.assertRoundTrip(u"x" * length)
+        self.assertRoundTrip(u"Drüms \U0001f941")
+
+    def test_bytes(self):
+        for length in (0, 5, 0x100, 0x10000):
+            self.assertRoundTrip(b"\x00\xff" * (length // 2))
+        self.assertRoundTrip(bytearray(b"abc"), b"abc")
+
+    def test_arrays(self):
+        for length in (0, 15, 16, 0x10000):
+            self.assertRoundTrip(list(range(length)))
+        self.assertRoundTrip((1, 2), [1, 2])
+        self.assertRoundTrip(iter([1, 2]), [1, 2])
+
+    def test_nested_maps(self):
+        value = {
+            u"event": u"result",
+            u"data": {u"tracks": [{u"id": u"live_1", u"name": u"1-Audio",
+                                   u"devices": [], u"color": 16725558}]},
+            u"uuid": None,
+        }
+        self.assertRoundTrip(value)
+        self.assertRoundTrip(dict((u"k%d" % i, i) for i in range(20)))
+
+    def test_non_string_keys(self):
+        self.assertRoundTrip({1: u"a"}, {u"1": u"a"})
+
+    def test_unknown_objects_become_strings(self):
+        class Unknown(object):
+            def __str__(self):
+                return "unknown"
+
+        self.assertRoundTrip(Unknown(), u"unknown")
+
+    def test_map_header(self):
+        header = MsgPack.pack_map_header(2)
+        body = MsgPack.packb(u"a") + MsgPack.packb(1) + \
+            MsgPack.packb(u"b") + MsgPack.packb([2])
+        self.assertEqual(unpackb(header + body), {u"a": 1, u"b": [2]})
+        self.assertEqual(unpackb(MsgPack.pack_map_header(0x10000) + b"".join(
+            MsgPack.packb(u"%d" % i) + MsgPack.packb(i) for i in range(0x10000)))[u"65535"], 65535)
+
+
+if __name__ == "__main__":
+    unittest.main()
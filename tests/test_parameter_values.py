@@ -0,0 +1,107 @@
+import unittest
+
+from helpers import FakeSocket
+
+from AbletonJS.Interface import Interface
+from AbletonJS.Song import (Song, PARAMETER_OK, PARAMETER_STALE, PARAMETER_OUT_OF_RANGE,
+                            PARAMETER_DISABLED, PARAMETER_FAILED, PARAMETER_SKIPPED)
+
+
+class FakeParameter(object):
+    def __init__(self, value=0.0, min=0.0, max=1.0, is_enabled=True, rejected=None):
+        self.min = min
+        self.max = max
+        self.is_enabled = is_enabled
+        # A value Live refuses to set, although it's in range
+        self.rejected = rejected
+        self._value = value
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if value == self.rejected:
+            raise RuntimeError("Can't set the value")
+        self._value = value
+
+
+class FakeSong(object):
+    def __init__(self):
+        self.undo_steps = []
+
+    def begin_undo_step(self):
+        self.undo_steps.append("begin")
+
+    def end_undo_step(self):
+        self.undo_steps.append("end")
+
+
+class FakeControlSurface(object):
+    def __init__(self, song):
+        self._song = song
+
+    def song(self):
+        return self._song
+
+
+class ParameterValuesTest(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(Interface.obj_ids.clear)
+        self.song = FakeSong()
+        self.handler = Song(FakeControlSurface(self.song), FakeSocket())
+        self.params = {}
+        for obj_id, param in (("live_1", FakeParameter()),
+                              ("live_2", FakeParameter(min=-1.0)),
+                              ("live_3", FakeParameter(is_enabled=False)),
+                              ("live_4", FakeParameter(max=127, rejected=127))):
+            Interface.obj_ids.add(obj_id, param)
+            self.params[obj_id] = param
+
+    def values(self):
+        return dict((obj_id, param.value) for obj_id, param in self.params.items())
+
+    def test_valid_pairs_are_written_in_one_undo_step(self):
+        statuses = self.handler.set_parameter_values(
+            self.song, [["live_1", 0.5], ["live_2", -0.5], ["live_4", 64]])
+
+        self.assertEqual(statuses, [PARAMETER_OK] * 3)
+        self.assertEqual(self.values(), {"live_1": 0.5, "live_2": -0.5, "live_3": 0.0,
+                                         "live_4": 64})
+        self.assertEqual(self.song.undo_steps, ["begin", "end"])
+
+    def test_mixed_pairs_are_skipped_if_atomic(self):
+        pairs = [["live_1", 0.5], ["live_9", 0.5], ["live_2", 2.0], ["live_3", 0.5],
+                 ["live_1", "loud"], ["live_1"], ["live_1", float("nan")], ["live_2", -1.0]]
+        statuses = self.handler.set_parameter_values(self.song, pairs)
+
+        self.assertEqual(statuses, [
+            PARAMETER_SKIPPED, PARAMETER_STALE, PARAMETER_OUT_OF_RANGE, PARAMETER_DISABLED,
+            PARAMETER_FAILED, PARAMETER_FAILED, PARAMETER_FAILED, PARAMETER_SKIPPED])
+        self.assertEqual(self.values()["live_1"], 0.0)
+        self.assertEqual(self.song.undo_steps, [])
+
+    def test_valid_pairs_of_mixed_ones_are_written_if_not_atomic(self):
+        statuses = self.handler.set_parameter_values(
+            self.song, [["live_1", 0.5], ["live_9", 0.5], ["live_2", 2.0], ["live_4", 127]],
+            atomic=False)
+
+        # live_4 accepts the range check, but Live rejects the value
+        self.assertEqual(statuses, [PARAMETER_OK, PARAMETER_STALE, PARAMETER_OUT_OF_RANGE,
+                                    PARAMETER_FAILED])
+        self.assertEqual(self.values()["live_1"], 0.5)
+        self.assertEqual(self.values()["live_2"], 0.0)
+        self.assertEqual(self.song.undo_steps, ["begin", "end"])
+
+    def test_values_are_clamped(self):
+        statuses = self.handler.set_parameter_values(
+            self.song, [["live_1", 2.0], ["live_2", -5.0]], clamp=True)
+
+        self.assertEqual(statuses, [PARAMETER_OK, PARAMETER_OK])
+        self.assertEqual(self.values()["live_1"], 1.0)
+        self.assertEqual(self.values()["live_2"], -1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
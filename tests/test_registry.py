@@ -0,0 +1,105 @@
+import unittest
+
+import helpers  # noqa: F401
+
+from AbletonJS.Registry import ObjectRegistry, StaleObjectError
+
+
+class FakeObject(object):
+    def __init__(self):
+        self.deleted = False
+
+    def __eq__(self, other):
+        # Live's objects compare equal to None once they've been deleted
+        return other is None and self.deleted
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = object.__hash__
+
+
+class ObjectRegistryTest(unittest.TestCase):
+    def test_persistent_objects(self):
+        registry = ObjectRegistry()
+        obj = FakeObject()
+        registry.add("live_1", obj)
+
+        self.assertIs(registry.get("live_1"), obj)
+        self.assertIn("live_1", registry)
+        self.assertEqual(registry.hits, 1)
+
+    def test_unknown_ids(self):
+        registry = ObjectRegistry()
+        self.assertRaises(StaleObjectError, registry.get, "live_1")
+        self.assertEqual(registry.misses, 1)
+
+    def test_evicts_least_recently_used(self):
+        registry = ObjectRegistry(max_transient=2)
+        objects = [FakeObject() for _ in range(3)]
+
+        registry.add("a", objects[0], transient=True)
+        registry.add("b", objects[1], transient=True)
+        # Using a marks it as recently used, so b is evicted
+        registry.get("a")
+        registry.add("c", objects[2], transient=True)
+
+        self.assertIn("a", registry)
+        self.assertNotIn("b", registry)
+        self.assertIn("c", registry)
+        self.assertEqual(registry.evictions, 1)
+        self.assertRaises(StaleObjectError, registry.get, "b")
+
+    def test_persistent_objects_are_not_evicted(self):
+        registry = ObjectRegistry(max_transient=1)
+        registry.add("live_1", FakeObject())
+        registry.add("a", FakeObject(), transient=True)
+        registry.add("b", FakeObject(), transient=True)
+
+        self.assertIn("live_1", registry)
+        self.assertEqual(registry.get_stats()["persistent"], 1)
+        self.assertEqual(registry.get_stats()["transient"], 1)
+
+    def test_deleted_objects_are_stale(self):
+        registry = ObjectRegistry()
+        obj = FakeObject()
+        registry.add("live_1", obj)
+        obj.deleted = True
+
+        self.assertRaises(StaleObjectError, registry.get, "live_1")
+        self.assertNotIn("live_1", registry)
+
+    def test_sweep(self):
+        registry = ObjectRegistry()
+        objects = [FakeObject() for _ in range(5)]
+        for i, obj in enumerate(objects):
+            registry.add("live_%d" % i, obj)
+        objects[1].deleted = True
+        objects[3].deleted = True
+
+        self.assertEqual(registry.sweep(limit=5), 2)
+        self.assertEqual(len(registry), 3)
+
+    def test_anonymous_ids_are_stable(self):
+        registry = ObjectRegistry()
+        obj = FakeObject()
+        obj_id = registry.add_anonymous(obj, transient=True)
+
+        self.assertEqual(registry.add_anonymous(obj, transient=True), obj_id)
+        self.assertIs(registry.get(obj_id), obj)
+
+    def test_anonymous_ids_are_not_reused(self):
+        registry = ObjectRegistry(max_transient=1)
+        first_id = registry.add_anonymous(FakeObject(), transient=True)
+        # The first object is evicted and freed, so its address can be reused
+        second = FakeObject()
+        second_id = registry.add_anonymous(second, transient=True)
+        third_id = registry.add_anonymous(FakeObject(), transient=True)
+
+        self.assertEqual(len(set([first_id, second_id, third_id])), 3)
+        self.assertRaises(StaleObjectError, registry.get, first_id)
+        self.assertRaises(StaleObjectError, registry.get, second_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
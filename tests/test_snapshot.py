@@ -0,0 +1,104 @@
+import itertools
+import unittest
+
+import helpers  # noqa: F401
+
+from AbletonJS.Interface import Interface
+from AbletonJS.Snapshot import snapshot_song
+
+live_ptrs = itertools.count(1)
+
+
+class FakeLiveObject(object):
+    def __init__(self, **props):
+        self._live_ptr = next(live_ptrs)
+        self.name = u""
+        self.color = 0
+        self.color_index = 0
+        self.__dict__.update(props)
+
+
+def make_parameter(name):
+    return FakeLiveObject(name=name, value=0.5, is_quantized=False)
+
+
+def make_device(name, chains=()):
+    return FakeLiveObject(
+        name=name, type=1, class_name=name, chains=list(chains),
+        parameters=[make_parameter(u"Device On")])
+
+
+def make_track(name, devices=(), clip_slots=()):
+    mixer_device = FakeLiveObject(
+        volume=make_parameter(u"Volume"), panning=make_parameter(u"Pan"),
+        track_activator=make_parameter(u"Track On"), sends=[make_parameter(u"A")])
+    return FakeLiveObject(name=name, is_foldable=False, is_grouped=False,
+                          mixer_device=mixer_device, devices=list(devices),
+                          clip_slots=list(clip_slots))
+
+
+def make_clip_slot(clip=None):
+    return FakeLiveObject(has_clip=clip is not None, clip=clip, is_playing=False,
+                          is_recording=False, is_triggered=False)
+
+
+def make_song():
+    clip = FakeLiveObject(name=u"Beat", is_audio_clip=False, is_midi_clip=True,
+                          start_time=0.0, end_time=4.0, muted=False)
+    rack = make_device(u"Rack", [FakeLiveObject(name=u"Chain", devices=[make_device(u"Operator")])])
+    return FakeLiveObject(
+        tracks=[make_track(u"Drums", [rack], [make_clip_slot(clip), make_clip_slot()]),
+                make_track(u"Bass")],
+        return_tracks=[make_track(u"Reverb")],
+        master_track=make_track(u"Master"),
+        scenes=[FakeLiveObject(name=u"Intro"), FakeLiveObject(name=u"Verse")])
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.song = make_song()
+        self.addCleanup(Interface.obj_ids.clear)
+
+    def test_chunks(self):
+        chunks = list(snapshot_song(self.song, None))
+
+        self.assertEqual([(chunk["section"], chunk["index"]) for chunk in chunks], [
+            ("tracks", 0), ("tracks", 1), ("return_tracks", 0),
+            ("master_track", 0), ("scenes", 0)])
+        self.assertEqual([scene["name"] for scene in chunks[-1]["data"]], [u"Intro", u"Verse"])
+
+    def test_full_depth(self):
+        drums = next(snapshot_song(self.song, None))["data"]
+
+        self.assertEqual(drums["name"], u"Drums")
+        self.assertIs(Interface.get_obj(drums["id"]), self.song.tracks[0])
+        self.assertEqual(drums["mixer_device"]["volume"]["name"], u"Volume")
+        self.assertEqual([send["name"] for send in drums["mixer_device"]["sends"]], [u"A"])
+        self.assertEqual(drums["clip_slots"][0]["clip"]["name"], u"Beat")
+        self.assertNotIn("clip", drums["clip_slots"][1])
+
+        rack = drums["devices"][0]
+        self.assertEqual(rack["parameters"][0]["name"], u"Device On")
+        self.assertEqual(rack["return_chains"], [])
+        self.assertEqual(rack["drum_pads"], [])
+        operator = rack["chains"][0]["devices"][0]
+        self.assertEqual(operator["name"], u"Operator")
+        self.assertEqual(len(operator["parameters"]), 1)
+
+    def test_depth_limits_the_children(self):
+        drums = next(snapshot_song(self.song, 0))["data"]
+        self.assertNotIn("devices", drums)
+        self.assertNotIn("mixer_device", drums)
+
+        drums = next(snapshot_song(self.song, 1))["data"]
+        self.assertEqual(drums["devices"][0]["name"], u"Rack")
+        self.assertNotIn("parameters", drums["devices"][0])
+
+        drums = next(snapshot_song(self.song, 2))["data"]
+        chain = drums["devices"][0]["chains"][0]
+        self.assertEqual(chain["name"], u"Chain")
+        self.assertNotIn("devices", chain)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+import json
+import os
+import struct
+import unittest
+import zlib
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from helpers import make_socket
+
+from AbletonJS.Socket import (INITIAL_SEND_BUDGET, LANE_BULK, LANE_EVENTS, LANE_MIDI,
+                              LANE_RESULTS, MIN_SEND_BUDGET, PARTIAL_MESSAGE_TIMEOUT,
+                              SEND_BUDGET_STEP)
+
+
+def header(packet):
+    """Returns the message id, chunk index, and chunk count of a v1 packet"""
+    return tuple(bytearray(packet[3:6]))
+
+
+class SendLanesTest(unittest.TestCase):
+    def setUp(self):
+        self.socket = make_socket(features=["compression"])
+        self.sent = self.socket._socket.sent
+
+    def send_frame(self, size, lane):
+        # Random bytes don't compress, so the frame keeps its size
+        self.socket._send_frame(os.urandom(size), 0, False, lane)
+        return self.socket._message_id
+
+    def test_lanes_are_drained_in_priority_order(self):
+        bulk = self.send_frame(200, LANE_BULK)
+        result = self.send_frame(200, LANE_RESULTS)
+        event = self.send_frame(200, LANE_EVENTS)
+        midi = self.send_frame(200, LANE_MIDI)
+        self.socket.flush()
+
+        self.assertEqual([header(p)[0] for p in self.sent], [midi, event, result, bulk])
+
+    def test_chunks_stay_in_the_lane_of_their_frame(self):
+        large = self.send_frame(6500, LANE_EVENTS)
+        small = self.send_frame(200, LANE_EVENTS)
+        self.assertEqual(len(self.socket._send_queues[LANE_EVENTS]), 8)
+        self.assertEqual(len(self.socket._send_queues[LANE_BULK]), 0)
+
+        # Drain in many small steps, like ticks with a small budget
+        while any(self.socket._send_queues):
+            self.socket._budget_left = 3000
+            self.socket.flush()
+
+        ids = [header(p)[0] for p in self.sent]
+        self.assertEqual(ids, [large] * 7 + [small])
+        self.assertEqual([header(p)[1] for p in self.sent[:7]], list(range(7)))
+
+    def test_budget_limits_each_call(self):
+        for _ in range(5):
+            self.send_frame(500, LANE_RESULTS)
+        self.socket._budget_left = 1000
+        self.socket.flush()
+
+        # The packet that exceeds the budget is still sent
+        self.assertEqual(len(self.sent), 2)
+        self.assertEqual(len(self.socket._send_queues[LANE_RESULTS]), 3)
+
+
+class SendBudgetTest(unittest.TestCase):
+    def setUp(self):
+        self.socket = make_socket()
+
+    def test_budget_grows_while_queues_are_backed_up(self):
+        self.socket._send_queues[LANE_RESULTS].append(b"x")
+        self.socket._budget_left = 0
+        self.socket._update_send_budget()
+
+        self.assertEqual(self.socket._send_budget, INITIAL_SEND_BUDGET + SEND_BUDGET_STEP)
+        self.assertEqual(self.socket._budget_left, self.socket._send_budget)
+
+    def test_budget_stays_when_queues_are_drained(self):
+        self.socket._budget_left = 0
+        self.socket._update_send_budget()
+        self.assertEqual(self.socket._send_budget, INITIAL_SEND_BUDGET)
+
+    def test_congestion_halves_the_budget(self):
+        self.socket.report_congestion()
+        self.assertEqual(self.socket._send_budget, INITIAL_SEND_BUDGET // 2)
+
+        for _ in range(10):
+            self.socket.report_congestion()
+        self.assertEqual(self.socket._send_budget, MIN_SEND_BUDGET)
+        self.assertLessEqual(self.socket._budget_left, MIN_SEND_BUDGET)
+
+
+def legacy_packet(message_id, index, count, data):
+    return struct.pack("BBB", message_id, index, count) + data
+
+
+def v1_packet(message_id, index, count, data):
+    return struct.pack("BBBBBB", 1, 0, 0, message_id, index, count) + data
+
+
+def v2_packet(message_id, index, count, data):
+    return struct.pack(">BBBHHH", 2, 0, 0, message_id, index, count) + data
+
+
+class ReceiveTest(unittest.TestCase):
+    def setUp(self):
+        self.socket = make_socket()
+
+    def test_header_versions(self):
+        self.assertEqual(self.socket._parse_header(legacy_packet(7, 1, 3, b"abc")),
+                         (7, 1, 3, b"abc"))
+        self.assertEqual(self.socket._parse_header(v1_packet(7, 1, 3, b"abc")),
+                         (7, 1, 3, b"abc"))
+        self.assertEqual(self.socket._parse_header(v2_packet(40000, 300, 1000, b"abc")),
+                         (40000, 300, 1000, b"abc"))
+        self.assertRaises(ValueError, self.socket._parse_header,
+                          struct.pack("BBB", 9, 0, 0) + b"abc")
+
+    def test_invalid_packets_are_dropped(self):
+        self.assertIsNone(self.socket._receive_chunk(struct.pack("BBB", 9, 0, 0)))
+        self.assertEqual(len(self.socket._chunks), 0)
+
+    def test_chunks_out_of_order_and_duplicates(self):
+        chunks = [b"aa", b"bb", b"cc"]
+        receive = self.socket._receive_chunk
+
+        self.assertIsNone(receive(v2_packet(500, 2, 3, chunks[2])))
+        self.assertIsNone(receive(v2_packet(500, 0, 3, chunks[0])))
+        # A duplicate chunk doesn't complete the message or count twice
+        self.assertIsNone(receive(v2_packet(500, 0, 3, b"xx")))
+        self.assertEqual(self.socket._chunks_size, 4)
+
+        self.assertEqual(receive(v2_packet(500, 1, 3, chunks[1])), b"aabbcc")
+        self.assertEqual(len(self.socket._chunks), 0)
+        self.assertEqual(self.socket._chunks_size, 0)
+
+    def test_interleaved_messages(self):
+        receive = self.socket._receive_chunk
+        self.assertIsNone(receive(v1_packet(1, 0, 2, b"a")))
+        self.assertIsNone(receive(v1_packet(2, 1, 2, b"d")))
+        self.assertEqual(receive(v1_packet(2, 0, 2, b"c")), b"cd")
+        self.assertEqual(receive(v1_packet(1, 1, 2, b"b")), b"ab")
+
+    def test_incomplete_messages_expire(self):
+        self.socket._receive_chunk(v1_packet(1, 0, 2, b"old"))
+        self.socket._chunks[1]["time"] -= PARTIAL_MESSAGE_TIMEOUT + 1
+        self.socket._receive_chunk(v1_packet(2, 0, 2, b"new"))
+        self.socket._expire_partial_messages()
+
+        self.assertEqual(list(self.socket._chunks), [2])
+        self.assertEqual(self.socket._chunks_size, 3)
+
+    def test_oldest_messages_expire_above_the_size_limit(self):
+        with mock.patch("AbletonJS.Socket.MAX_PARTIAL_MESSAGE_BYTES", 5):
+            self.socket._receive_chunk(v1_packet(1, 0, 2, b"abc"))
+            self.socket._receive_chunk(v1_packet(2, 0, 2, b"def"))
+
+        self.assertEqual(list(self.socket._chunks), [2])
+
+    def test_process_handles_reassembled_commands(self):
+        payloads = []
+        self.socket.input_handler = payloads.append
+        data = zlib.compress(json.dumps({"uuid": "1", "ns": "song"}).encode("utf8"))
+        half = len(data) // 2
+        self.socket._socket.received = [v1_packet(3, 1, 2, data[half:]),
+                                        v1_packet(3, 0, 2, data[:half])]
+        self.socket.process()
+
+        self.assertEqual(payloads, [{"uuid": "1", "ns": "song"}])
+
+
+class RetransmitTest(unittest.TestCase):
+    def setUp(self):
+        self.socket = make_socket(features=["compression", "wide_header", "retransmit"])
+        self.sent = self.socket._socket.sent
+
+    def test_missing_chunks_are_sent_again(self):
+        self.socket._send_frame(os.urandom(4500), 0, False, LANE_RESULTS)
+        message_id = self.socket._message_id
+        self.socket.flush()
+        original = list(self.sent)
+        self.assertEqual(len(original), 5)
+        del self.sent[:]
+
+        self.assertTrue(self.socket.retransmit(message_id, [1, 3, 99]))
+        self.assertEqual(len(self.socket._send_queues[LANE_BULK]), 2)
+        self.socket.flush()
+        self.assertEqual(self.sent, [original[1], original[3]])
+
+    def test_unknown_frames(self):
+        self.assertFalse(self.socket.retransmit(1234, [0]))
+
+    def test_only_chunked_frames_are_kept(self):
+        self.socket._send_frame(b"small", 0, False, LANE_RESULTS)
+        self.assertFalse(self.socket.retransmit(self.socket._message_id, [0]))
+
+    def test_buffer_is_limited(self):
+        with mock.patch("AbletonJS.Socket.RETRANSMIT_BUFFER_BYTES", 6000):
+            first = self.socket._message_id + 1
+            self.socket._send_frame(os.urandom(4500), 0, False, LANE_RESULTS)
+            self.socket._send_frame(os.urandom(4500), 0, False, LANE_RESULTS)
+
+        self.assertFalse(self.socket.retransmit(first, [0]))
+        self.assertTrue(self.socket.retransmit(first + 1, [0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
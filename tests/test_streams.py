@@ -0,0 +1,77 @@
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+import helpers  # noqa: F401
+
+from AbletonJS.Interface import Interface
+
+
+class RecordingSocket(object):
+    def __init__(self):
+        self.sent = []
+
+    def send(self, event, data, uuid, lane=None):
+        self.sent.append((event, data, uuid))
+
+
+class StreamsTest(unittest.TestCase):
+    def setUp(self):
+        self.socket = RecordingSocket()
+        self.addCleanup(lambda: Interface.streams.__delitem__(slice(None)))
+
+    def add_stream(self, generator, uuid):
+        Interface.streams.append(
+            {"generator": generator, "uuid": uuid, "socket": self.socket, "chunks": 0})
+
+    def test_streams_are_advanced_until_the_deadline(self):
+        self.add_stream(iter([1, 2, 3]), "a")
+        Interface.process_streams(float("inf"))
+
+        self.assertEqual(self.socket.sent, [
+            ("stream", 1, "a"), ("stream", 2, "a"), ("stream", 3, "a"),
+            ("result", {"done": True, "chunks": 3}, "a")])
+        self.assertEqual(Interface.streams, [])
+
+    def test_paused_streams_wait_for_the_next_call(self):
+        steps = []
+
+        def paused():
+            while True:
+                steps.append(1)
+                yield None
+
+        self.add_stream(paused(), "a")
+        self.add_stream(iter([1, 2]), "b")
+
+        # The deadline is only reached after many passes, which a paused
+        # stream must not be advanced in
+        clock = iter([0] * 100)
+        with mock.patch("AbletonJS.Interface.time.time", lambda: next(clock, 1)):
+            Interface.process_streams(1)
+
+        self.assertEqual(len(steps), 1)
+        self.assertEqual([event for event, _, uuid in self.socket.sent if uuid == "b"],
+                         ["stream", "stream", "result"])
+
+        Interface.process_streams(float("inf"))
+        self.assertEqual(len(steps), 2)
+
+    def test_failing_streams_send_an_error(self):
+        def failing():
+            yield 1
+            raise ValueError("Broken")
+
+        self.add_stream(failing(), "a")
+        Interface.process_streams()
+        Interface.process_streams()
+
+        self.assertEqual(self.socket.sent, [("stream", 1, "a"), ("error", "Broken", "a")])
+        self.assertEqual(Interface.streams, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+import helpers  # noqa: F401
+
+from AbletonJS.Interface import Interface
+
+KEY = "live_1:value"
+
+
+class ThrottleTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        self.value = 0.0
+        self.sent = []
+        patcher = mock.patch("AbletonJS.Interface.time.time", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(Interface.listeners.clear)
+        self.addCleanup(Interface.held_listeners.clear)
+
+    def throttle(self, min_interval=None, deadband=None):
+        send = Interface.throttle(KEY, lambda: self.value, self.sent.append,
+                                  min_interval, deadband)
+        Interface.listeners[KEY] = {"send": send}
+        return send
+
+    def test_min_interval(self):
+        send = self.throttle(min_interval=50)
+        send()
+        self.value = 0.1
+        self.now += 0.01
+        send()
+
+        self.assertEqual(self.sent, [0.0])
+        self.assertIn(KEY, Interface.held_listeners)
+
+        # The held value is sent once the interval has passed
+        self.value = 0.2
+        self.now += 0.05
+        Interface.held_listeners.pop(KEY)()
+        self.assertEqual(self.sent, [0.0, 0.2])
+        self.assertNotIn(KEY, Interface.held_listeners)
+
+    def test_deadband_skips_small_changes_of_a_settled_value(self):
+        send = self.throttle(deadband=0.1)
+        send()
+        self.value = 0.05
+        send()
+        self.assertEqual(self.sent, [0.0])
+        self.assertIn(KEY, Interface.held_listeners)
+
+        # The value hasn't moved since it was held, so it's sent to settle
+        Interface.held_listeners.pop(KEY)()
+        self.assertEqual(self.sent, [0.0, 0.05])
+
+    def test_deadband_waits_for_moving_values(self):
+        send = self.throttle(deadband=0.1)
+        send()
+
+        for value in (0.02, 0.04, 0.06):
+            self.value = value
+            Interface.held_listeners.pop(KEY, send)()
+            self.assertEqual(self.sent, [0.0])
+
+        Interface.held_listeners.pop(KEY)()
+        self.assertEqual(self.sent, [0.0, 0.06])
+        self.assertNotIn(KEY, Interface.held_listeners)
+
+    def test_deadband_sends_large_changes(self):
+        send = self.throttle(deadband=0.1)
+        send()
+        self.value = 0.5
+        send()
+        self.assertEqual(self.sent, [0.0, 0.5])
+
+    def test_deadband_ignores_unchanged_values(self):
+        send = self.throttle(deadband=0.1)
+        send()
+        send()
+        self.assertEqual(self.sent, [0.0])
+        self.assertNotIn(KEY, Interface.held_listeners)
+
+    def test_deadband_only_applies_to_numbers(self):
+        send = self.throttle(deadband=0.1)
+        self.value = "a"
+        send()
+        self.value = "b"
+        send()
+        self.assertEqual(self.sent, ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()